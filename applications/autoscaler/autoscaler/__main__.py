@@ -1,16 +1,30 @@
+import asyncio
 import logging
 import os
 import signal
-import threading
-import time
+import socket
 
 import docker
 from dotenv import load_dotenv
 
-from autoscaler.api import start_flask_app
+from autoscaler.amqp_monitor import AmqpQueueMonitor
+from autoscaler.api import ApiServer
+from autoscaler.api_client import ApiClient
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.budget import ReplicaBudget
+from autoscaler.config import ScalerConfig, build_scaler, load_configs, validate_config
+from autoscaler.health import HealthCheck
+from autoscaler.leader import LeaderElector
+from autoscaler.manager import ScalerManager
+from autoscaler.metric_source import check_prometheus
 from autoscaler.queue_monitor import QueueMonitor
-from autoscaler.scaler import Scaler
+from autoscaler.sampler import QueueSampler
+from autoscaler.schedule import ContestSchedule
+from autoscaler.scheduler import Scheduler
+from autoscaler.service_cache import ServiceStateCache, docker_breaker
 from autoscaler.service_monitor import ServiceMonitor
+from autoscaler.state import StateStore
+from autoscaler.trace import TraceRecorder
 
 load_dotenv()
 
@@ -25,65 +39,231 @@ rabbitmq_port = os.getenv("RABBITMQ_PORT")
 rabbitmq_username = os.getenv("RABBITMQ_USER")
 rabbitmq_password = os.getenv("RABBITMQ_PASSWORD")
 rabbitmq_vhost = os.getenv("RABBITMQ_VHOST")
+queue_probe = os.getenv("QUEUE_PROBE", "management")
+amqp_port = int(os.getenv("AMQP_PORT", 5672))
+stats_interval = float(os.getenv("STATS_INTERVAL", 30))
 
-queue_name = os.getenv("QUEUE_NAME")
-service_name = os.getenv("SERVICE_NAME")
-
-messages_per_replica = int(os.getenv("MESSAGES_PER_REPLICA", 1))
-min_replicas = int(os.getenv("MIN_REPLICAS", 1))
-max_replicas = int(os.getenv("MAX_REPLICAS", 3))
-cooldown = int(os.getenv("COOLDOWN", 60))
+policy_file = os.getenv("POLICY_FILE")
+namespace = os.getenv("STACK_NAMESPACE", "forseti")
 interval = int(os.getenv("INTERVAL", 10))
+tick_timeout = float(os.getenv("TICK_TIMEOUT", interval))
+jitter = float(os.getenv("JITTER", 1))
+request_timeout = float(os.getenv("REQUEST_TIMEOUT", 5))
+resync_interval = int(os.getenv("RESYNC_INTERVAL", 60))
+watch_events = os.getenv("WATCH_EVENTS", "true") == "true"
+trace_file = os.getenv("TRACE_FILE")
+sample_interval = float(os.getenv("SAMPLE_INTERVAL", 0))
+sample_window = int(os.getenv("SAMPLE_WINDOW", 10))
+smoothing = os.getenv("SMOOTHING", "median")
+smoothing_alpha = float(os.getenv("SMOOTHING_ALPHA", 0.3))
+
+api_url = os.getenv("API_URL")
+prewarm_lead_time = int(os.getenv("PREWARM_LEAD_TIME", 300))
+prewarm_start_duration = int(os.getenv("PREWARM_START_DURATION", 600))
+prewarm_end_rush = int(os.getenv("PREWARM_END_RUSH", 1800))
+schedule_refresh_interval = int(os.getenv("SCHEDULE_REFRESH_INTERVAL", 60))
+prometheus_url = os.getenv("PROMETHEUS_URL")
+leader_election = os.getenv("LEADER_ELECTION", "false") == "true"
+lease_service = os.getenv("LEASE_SERVICE", f"{namespace}_autojudge-autoscaler")
+lease_duration = float(os.getenv("LEASE_DURATION", 3 * tick_timeout))
+state_file = os.getenv("STATE_FILE")
+state_window = int(os.getenv("STATE_WINDOW", 900))
+breaker_threshold = int(os.getenv("BREAKER_THRESHOLD", 3))
+breaker_reset_timeout = float(os.getenv("BREAKER_RESET_TIMEOUT", interval))
+replica_budget = int(os.getenv("REPLICA_BUDGET", 0))
+health_max_staleness = float(os.getenv("HEALTH_MAX_STALENESS", 3 * interval))
 
 port = int(os.environ.get("PORT", 7000))
 
 
-docker_client = docker.from_env()
+# The Docker SDK keeps a pooled keep-alive session to the socket
+docker_client = docker.from_env(timeout=request_timeout)
+docker_circuit = docker_breaker(
+    failure_threshold=breaker_threshold, reset_timeout=breaker_reset_timeout
+)
 
 
-queue_monitor = QueueMonitor(
-    queue_name=queue_name,
-    host=rabbitmq_host,
-    port=int(rabbitmq_port),
-    vhost=rabbitmq_vhost,
-    username=rabbitmq_username,
-    password=rabbitmq_password,
+defaults = ScalerConfig.from_env()
+if policy_file:
+    configs = load_configs(policy_file, defaults)
+else:
+    validate_config(defaults)
+    configs = [defaults]
+# Prometheus only runs with the telemetry of the stack. A missing URL is a
+# configuration error, but Prometheus being down is not: the policies that
+# depend on it hold their services on every tick until it answers again.
+if any(config.metric_query or config.target_utilisation > 0 for config in configs):
+    if not prometheus_url:
+        raise ValueError("PROMETHEUS_URL is required by the configured policies")
+    try:
+        check_prometheus(prometheus_url, timeout=request_timeout)
+    except ValueError as e:
+        logging.warning(f"{e}, holding the policies that depend on it")
+
+rabbitmq_breaker = CircuitBreaker(
+    "rabbitmq",
+    failure_threshold=breaker_threshold,
+    reset_timeout=breaker_reset_timeout,
+)
+if queue_probe == "amqp":
+    queue_monitor = AmqpQueueMonitor(
+        host=rabbitmq_host,
+        port=int(rabbitmq_port),
+        vhost=rabbitmq_vhost,
+        username=rabbitmq_username,
+        password=rabbitmq_password,
+        queue_names=sorted({config.queue_name for config in configs} - {""}),
+        amqp_port=amqp_port,
+        stats_interval=stats_interval,
+        timeout=request_timeout,
+        breaker=rabbitmq_breaker,
+        probe_breaker=CircuitBreaker(
+            "amqp",
+            failure_threshold=breaker_threshold,
+            reset_timeout=breaker_reset_timeout,
+        ),
+    )
+else:
+    queue_monitor = QueueMonitor(
+        host=rabbitmq_host,
+        port=int(rabbitmq_port),
+        vhost=rabbitmq_vhost,
+        username=rabbitmq_username,
+        password=rabbitmq_password,
+        timeout=request_timeout,
+        breaker=rabbitmq_breaker,
+    )
+
+recorder = TraceRecorder(trace_file) if trace_file else None
+state_store = StateStore(state_file, max_age=state_window) if state_file else None
+schedule = (
+    ContestSchedule(
+        api_client=ApiClient(api_url=api_url, timeout=request_timeout),
+        lead_time=prewarm_lead_time,
+        start_duration=prewarm_start_duration,
+        end_rush=prewarm_end_rush,
+        refresh_interval=schedule_refresh_interval,
+    )
+    if api_url
+    else None
 )
-service_monitor = ServiceMonitor(
+# A tick that started on a lease renewed half a lease ago still scales
+# before the lease expires
+if leader_election and tick_timeout >= lease_duration / 2:
+    raise ValueError("TICK_TIMEOUT must be shorter than half of LEASE_DURATION")
+elector = (
+    LeaderElector(
+        docker_client=docker_client,
+        service_name=lease_service,
+        identity=socket.gethostname(),
+        lease_duration=lease_duration,
+        breaker=docker_circuit,
+    )
+    if leader_election
+    else None
+)
+# Shared by the pools of the policy file, e.g. one autojudge per language
+budget = ReplicaBudget(replica_budget) if replica_budget > 0 else None
+scalers = [
+    build_scaler(
+        config,
+        queue_monitor=queue_monitor,
+        service_monitor=ServiceMonitor(
+            docker_client=docker_client,
+            service_name=config.service_name,
+            breaker=docker_circuit,
+            lease=elector.holds_lease if elector is not None else None,
+        ),
+        docker_client=docker_client,
+        recorder=recorder,
+        schedule=schedule,
+        prometheus_url=prometheus_url,
+        state_store=state_store,
+        budget=budget,
+    )
+    for config in configs
+]
+if state_store is not None:
+    # Resume the cooldown, forecasts and stabilization windows where the
+    # previous process left them
+    state = state_store.load()
+    for scaler in scalers:
+        scaler.restore(state.get(scaler.service_monitor.service_name, []))
+service_cache = ServiceStateCache(
     docker_client=docker_client,
-    service_name=service_name,
+    namespace=namespace,
+    resync_interval=resync_interval if watch_events else 0,
+    breaker=docker_circuit,
 )
-
-scaler = Scaler(
+sampler = (
+    QueueSampler(
+        queue_monitor=queue_monitor,
+        window=sample_window,
+        statistic=smoothing,
+        alpha=smoothing_alpha,
+        max_age=3 * sample_interval,
+    )
+    if sample_interval > 0
+    else None
+)
+manager = ScalerManager(
     queue_monitor=queue_monitor,
-    service_monitor=service_monitor,
-    cooldown=cooldown,
-    messages_per_replica=messages_per_replica,
-    min_replicas=min_replicas,
-    max_replicas=max_replicas,
+    service_cache=service_cache,
+    scalers=scalers,
+    schedule=schedule,
+    elector=elector,
+    sampler=sampler,
 )
+health = HealthCheck(manager=manager, max_staleness=health_max_staleness)
 
-is_active = True
 
+async def main():
+    schedulers = [
+        Scheduler(
+            tick=manager.scale,
+            interval=interval,
+            timeout=tick_timeout,
+            jitter=jitter,
+        )
+    ]
+    if sampler is not None:
+        schedulers.append(
+            Scheduler(
+                tick=manager.sample,
+                interval=sample_interval,
+                timeout=sample_interval,
+                name="sampling",
+            )
+        )
+        manager.on_wake = schedulers[0].wake
 
-def sigterm(signum, frame):
-    global is_active
-    logging.info("Received SIGTERM, shutting down gracefully...")
-    is_active = False
+    def sigterm():
+        logging.info("Received SIGTERM, shutting down gracefully...")
+        for scheduler in schedulers:
+            scheduler.stop()
 
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, sigterm)
+    await asyncio.gather(*(scheduler.run() for scheduler in schedulers))
 
-signal.signal(signal.SIGTERM, sigterm)
 
 if __name__ == "__main__":
-    logging.info("Starting auto-scaler")
-
-    server_thread = threading.Thread(
-        target=start_flask_app, args=[queue_monitor, service_monitor, port], daemon=True
-    )
-    server_thread.start()
+    logging.info(f"Starting auto-scaler for {len(scalers)} service(s)")
+    server = ApiServer(health=health, port=port)
+    server.start()
+    if watch_events:
+        service_cache.start()
 
-    while is_active:
-        threading.Thread(target=scaler.scale).start()
-        time.sleep(interval)
+    asyncio.run(main())
+    server.stop()
+    service_cache.stop()
+    # Hand over to another replica without waiting for the lease to expire
+    if elector is not None:
+        elector.release()
+    if state_store is not None:
+        state_store.close()
+    if recorder is not None:
+        recorder.close()
+    if isinstance(queue_monitor, AmqpQueueMonitor):
+        queue_monitor.close()
 
     logging.info("Auto-scaler stopped")
@@ -0,0 +1,142 @@
+import dataclasses
+import logging
+import threading
+import time
+from typing import Callable
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import ChannelClosedByBroker
+
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+
+NOT_FOUND = 404
+
+
+class AmqpQueueMonitor(QueueMonitor):
+    # Ready messages and consumers come from a passive queue.declare on a
+    # persistent channel, which the broker answers from the queue process
+    # itself without aggregating stats. A declare cannot see the messages
+    # being judged, so the unacked messages, rates and head message timestamp
+    # come from the management API, polled every stats_interval seconds.
+    # Messages then count the ready ones as of now plus the unacked ones as of
+    # the last poll. With a stats_interval of 0 they only count the ready ones.
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        vhost: str,
+        username: str,
+        password: str,
+        queue_names: list[str],
+        amqp_port: int = 5672,
+        stats_interval: float = 30,
+        timeout: float = 5,
+        breaker: CircuitBreaker | None = None,
+        probe_breaker: CircuitBreaker | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(
+            host=host,
+            port=port,
+            vhost=vhost,
+            username=username,
+            password=password,
+            timeout=timeout,
+            breaker=breaker,
+        )
+        self.queue_names = queue_names
+        self.amqp_port = amqp_port
+        self.stats_interval = stats_interval
+        # The management API failing must not stop the probe
+        self.probe_breaker = probe_breaker or CircuitBreaker("amqp")
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.connection: pika.BlockingConnection | None = None
+        self.channel: BlockingChannel | None = None
+        self.stats: dict[str, QueueSnapshot] = {}
+        self.stats_at: float | None = None
+
+    def connect(self) -> BlockingChannel:
+        if self.connection is None or self.connection.is_closed:
+            self.connection = pika.BlockingConnection(
+                pika.ConnectionParameters(
+                    host=self.host,
+                    port=self.amqp_port,
+                    virtual_host=self.vhost,
+                    credentials=pika.PlainCredentials(self.username, self.password),
+                    socket_timeout=self.timeout,
+                    blocked_connection_timeout=self.timeout,
+                )
+            )
+        if self.channel is None or self.channel.is_closed:
+            self.channel = self.connection.channel()
+        return self.channel
+
+    def declare(self, queue_name: str) -> tuple[int, int] | None:
+        with self.lock:
+            channel = self.connect()
+            try:
+                frame = channel.queue_declare(queue=queue_name, passive=True)
+            except ChannelClosedByBroker as e:
+                # The broker closes the channel on a missing queue, the
+                # connection itself is still usable
+                self.channel = None
+                if e.reply_code == NOT_FOUND:
+                    return None
+                raise
+            except Exception:
+                self.close()
+                raise
+        return frame.method.message_count, frame.method.consumer_count
+
+    def close(self) -> None:
+        connection, self.connection, self.channel = self.connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.warning(f"Error closing the AMQP connection: {e}")
+
+    def refresh_stats(self) -> None:
+        if self.stats_interval <= 0:
+            return
+        now = self.clock()
+        if self.stats_at is not None and now - self.stats_at < self.stats_interval:
+            return
+        self.stats_at = now
+        try:
+            self.stats = super().get_snapshots()
+        except Exception as e:
+            # Depth and consumers stay fresh, only the rates get older
+            logging.warning(f"Error fetching queue stats: {e}")
+
+    def probe(self, queue_name: str) -> QueueSnapshot | None:
+        counts = self.probe_breaker.call(self.declare, queue_name)
+        if counts is None:
+            return None
+        messages_ready, consumers = counts
+        stats = self.stats.get(queue_name, QueueSnapshot(messages=0))
+        return dataclasses.replace(
+            stats,
+            messages=messages_ready + stats.messages_unacknowledged,
+            messages_ready=messages_ready,
+            consumers=consumers,
+        )
+
+    def get_snapshot(self, queue_name: str) -> QueueSnapshot:
+        self.refresh_stats()
+        snapshot = self.probe(queue_name)
+        if snapshot is None:
+            raise ValueError(f"Queue {queue_name} not found")
+        return snapshot
+
+    def get_snapshots(self) -> dict[str, QueueSnapshot]:
+        self.refresh_stats()
+        snapshots = {}
+        for queue_name in self.queue_names:
+            snapshot = self.probe(queue_name)
+            if snapshot is not None:
+                snapshots[queue_name] = snapshot
+        return snapshots
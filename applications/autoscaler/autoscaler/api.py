@@ -1,38 +1,102 @@
+import json
 import logging
+import threading
+from typing import Callable, Iterable
+from wsgiref.simple_server import WSGIRequestHandler, make_server
 
-from flask import Flask, Response, jsonify
-from prometheus_client import REGISTRY, generate_latest
+from prometheus_client import REGISTRY, make_wsgi_app
+from prometheus_client.exposition import ThreadingWSGIServer
 
-from autoscaler.queue_monitor import QueueMonitor
-from autoscaler.service_monitor import ServiceMonitor
+from autoscaler.health import HealthCheck
 
-app = Flask(__name__)
+STATUS_LINES = {
+    200: "200 OK",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    500: "500 Internal Server Error",
+    503: "503 Service Unavailable",
+}
 
-logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
+class QuietRequestHandler(WSGIRequestHandler):
+    # Probes and scrapes would flood the logs
+    def log_message(self, format: str, *args) -> None:
+        pass
 
-def start_flask_app(
-    queue_monitor: QueueMonitor, service_monitor: ServiceMonitor, port: int
-):
-    @app.route("/health")
-    def health_check():
-        try:
-            # Check if the scaler components are healthy
-            queue_monitor.get_number_of_messages()  # Test SQS connection
-            service_monitor.get_current_replicas()  # Test Docker connection
 
-            return jsonify({"status": "healthy"}), 200
-        except Exception as e:
-            logging.error(f"Health check failed: {e}")
-            return jsonify({"status": "unhealthy"}), 503
-
-    @app.route("/metrics")
-    def metrics():
-        # Generate Prometheus metrics
-        metrics_output = generate_latest(REGISTRY)
-        return Response(
-            metrics_output, mimetype="text/plain; version=0.0.4; charset=utf-8"
+class ApiServer:
+    # Serves the probes and the metrics from a thread of their own, with the
+    # WSGI server and the exposition of prometheus_client. The scaling ticks
+    # run on the worker thread of the scheduler, so a slow tick never delays
+    # a scrape.
+    def __init__(self, health: HealthCheck, port: int, host: str = "0.0.0.0"):
+        self.health = health
+        self.host = host
+        self.port = port
+        self.server: ThreadingWSGIServer | None = None
+        self.thread: threading.Thread | None = None
+        # Compresses the metrics when the scraper accepts gzip
+        self.metrics = make_wsgi_app(REGISTRY)
+        self.routes = {
+            "/health": self.health_check,
+            "/ready": self.readiness_check,
+            "/status": self.status,
+        }
+
+    def start(self) -> None:
+        self.server = make_server(
+            self.host,
+            self.port,
+            self.app,
+            server_class=ThreadingWSGIServer,
+            handler_class=QuietRequestHandler,
         )
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"API server listening on port {self.port}")
+
+    def stop(self) -> None:
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    # Probes are served from the last scaling tick and never touch RabbitMQ
+    # or Docker
+    def health_check(self) -> tuple[int, dict]:
+        is_healthy, body = self.health.health()
+        return 200 if is_healthy else 503, body
+
+    def readiness_check(self) -> tuple[int, dict]:
+        is_ready, body = self.health.ready()
+        return 200 if is_ready else 503, body
 
-    logging.info(f"Flask server starting on port {port}")
-    app.run(host="0.0.0.0", port=port, debug=False, use_reloader=False)
+    def status(self) -> tuple[int, dict]:
+        return 200, self.health.status()
+
+    def respond(self, method: str, path: str) -> tuple[int, dict]:
+        if method not in ("GET", "HEAD"):
+            return 405, {"error": "method not allowed"}
+        route = self.routes.get(path)
+        if route is None:
+            return 404, {"error": "not found"}
+        try:
+            return route()
+        except Exception as e:
+            logging.error(f"Error serving {path}: {e}")
+            return 500, {"error": "internal server error"}
+
+    def app(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        method = environ["REQUEST_METHOD"]
+        path = environ["PATH_INFO"]
+        if path == "/metrics" and method in ("GET", "HEAD"):
+            return self.metrics(environ, start_response)
+        status, body = self.respond(method, path)
+        data = json.dumps(body).encode()
+        start_response(
+            STATUS_LINES[status],
+            [("Content-Type", "application/json"), ("Content-Length", str(len(data)))],
+        )
+        return [] if method == "HEAD" else [data]
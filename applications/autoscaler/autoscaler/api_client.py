@@ -0,0 +1,24 @@
+import requests
+
+
+class ApiClient:
+    # The schedule is public, so the autoscaler never signs in. A root
+    # session would revoke the sessions of the root admin and of the other
+    # autoscaler replicas on every sign-in.
+    def __init__(
+        self,
+        api_url: str,
+        timeout: float = 5,
+        verify: str | bool = True,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.http.verify = verify
+
+    def find_contest_schedule(self) -> list[dict]:
+        response = self.http.get(
+            f"{self.api_url}/v1/public/contests/schedule", timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
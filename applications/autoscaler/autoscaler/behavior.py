@@ -0,0 +1,73 @@
+import math
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ScalingRules:
+    stabilization_window: float = 0
+    max_step: int = 0
+    max_percent: int = 0
+
+    def max_change(self, current_replicas: int) -> int | None:
+        if self.max_step <= 0 and self.max_percent <= 0:
+            return None
+        by_percent = math.ceil(current_replicas * self.max_percent / 100)
+        return max(1, self.max_step, by_percent)
+
+
+@dataclass
+class Behavior:
+    scale_up: ScalingRules = field(default_factory=ScalingRules)
+    scale_down: ScalingRules = field(default_factory=ScalingRules)
+    tolerance: float = 0
+    recommendations: deque[tuple[float, int]] = field(default_factory=deque)
+
+    def stabilize(self, now: float, current_replicas: int, recommended: int) -> int:
+        # Same algorithm as the Kubernetes HPA: scale up to the lowest and
+        # down to the highest recommendation seen in each window
+        self.recommendations.append((now, recommended))
+        longest_window = max(
+            self.scale_up.stabilization_window, self.scale_down.stabilization_window
+        )
+        while now - self.recommendations[0][0] > longest_window:
+            self.recommendations.popleft()
+
+        up_recommendation = min(
+            replicas
+            for timestamp, replicas in self.recommendations
+            if now - timestamp <= self.scale_up.stabilization_window
+        )
+        down_recommendation = max(
+            replicas
+            for timestamp, replicas in self.recommendations
+            if now - timestamp <= self.scale_down.stabilization_window
+        )
+        if current_replicas < up_recommendation:
+            return up_recommendation
+        if current_replicas > down_recommendation:
+            return down_recommendation
+        return current_replicas
+
+    def limit(self, current_replicas: int, desired_replicas: int) -> int:
+        if desired_replicas > current_replicas:
+            max_change = self.scale_up.max_change(current_replicas)
+            if max_change is not None:
+                return min(desired_replicas, current_replicas + max_change)
+        elif desired_replicas < current_replicas:
+            max_change = self.scale_down.max_change(current_replicas)
+            if max_change is not None:
+                return max(desired_replicas, current_replicas - max_change)
+        return desired_replicas
+
+    def apply(self, now: float, current_replicas: int, desired: float) -> int:
+        # Same dead-band as the Kubernetes HPA, on the ratio between the
+        # unrounded recommendation and the current replicas
+        if current_replicas > 0 and (
+            abs(desired - current_replicas) <= current_replicas * self.tolerance
+        ):
+            recommended = current_replicas
+        else:
+            recommended = math.ceil(round(desired, 6))
+        desired_replicas = self.stabilize(now, current_replicas, recommended)
+        return self.limit(current_replicas, desired_replicas)
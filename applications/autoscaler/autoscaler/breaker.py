@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from typing import Callable, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+BREAKER_STATE = Gauge(
+    "autoscaler_breaker_state",
+    "State of the circuit breaker: 0 closed, 1 half-open, 2 open",
+    ["dependency"],
+)
+BREAKER_REJECTED_CALLS = Counter(
+    "autoscaler_breaker_rejected_calls",
+    "Number of calls rejected while the circuit breaker was open",
+    ["dependency"],
+)
+DEPENDENCY_LATENCY = Histogram(
+    "autoscaler_dependency_latency_seconds",
+    "Latency of the calls made to a dependency",
+    ["dependency", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half-open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        dependency: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 5,
+        max_reset_timeout: float = 300,
+        ignored: tuple[type[Exception], ...] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.dependency = dependency
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        # Errors that prove the dependency is up, e.g. a missing resource
+        self.ignored = ignored
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.openings = 0
+        self.retry_at = 0.0
+        BREAKER_STATE.labels(dependency=dependency).set(STATE_VALUES[CLOSED])
+
+    def set_state(self, state: str) -> None:
+        if state != self.state:
+            logging.warning(f"Circuit breaker for {self.dependency} is now {state}")
+        self.state = state
+        BREAKER_STATE.labels(dependency=self.dependency).set(STATE_VALUES[state])
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.clock() >= self.retry_at:
+                # A single trial call decides whether the dependency is back
+                self.set_state(HALF_OPEN)
+                return
+            BREAKER_REJECTED_CALLS.labels(dependency=self.dependency).inc()
+            raise CircuitOpenError(f"Circuit breaker for {self.dependency} is open")
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.openings = 0
+            self.set_state(CLOSED)
+
+    def on_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                # Exponential backoff between trial calls
+                timeout = min(
+                    self.max_reset_timeout, self.reset_timeout * 2**self.openings
+                )
+                self.openings += 1
+                self.retry_at = self.clock() + timeout
+                self.set_state(OPEN)
+
+    def call(self, function: Callable[..., T], *args, **kwargs) -> T:
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = function(*args, **kwargs)
+        except self.ignored:
+            self.on_success()
+            raise
+        except Exception:
+            DEPENDENCY_LATENCY.labels(
+                dependency=self.dependency, outcome="failure"
+            ).observe(time.monotonic() - start)
+            self.on_failure()
+            raise
+        DEPENDENCY_LATENCY.labels(
+            dependency=self.dependency, outcome="success"
+        ).observe(time.monotonic() - start)
+        self.on_success()
+        return result
@@ -0,0 +1,117 @@
+import logging
+import threading
+from typing import Callable
+
+from prometheus_client import Gauge
+
+BUDGET_REPLICAS = Gauge(
+    "autoscaler_budget_replicas",
+    "Replicas allocated to the service from the global replica budget",
+    ["service_name"],
+)
+BORROWED_REPLICAS = Gauge(
+    "autoscaler_borrowed_replicas",
+    "Replicas allocated to the service beyond its reserved share of the budget",
+    ["service_name"],
+)
+
+
+class ReplicaBudget:
+    # Every pool is guaranteed its reserved share, the share an idle pool
+    # does not use is lent to the pools whose demand exceeds their own
+    def __init__(self, total: int):
+        self.total = total
+        self.lock = threading.Lock()
+        self.reserved: dict[str, int] = {}
+        self.demands: dict[str, int] = {}
+        # Replicas each pool was last seen running or was last granted
+        self.held: dict[str, int] = {}
+        # Scales a pool down to the given replicas and returns the replicas
+        # it ended up with
+        self.reclaimers: dict[str, Callable[[int], int]] = {}
+
+    def register(
+        self,
+        service_name: str,
+        reserved: int,
+        reclaim: Callable[[int], int] | None = None,
+    ) -> None:
+        with self.lock:
+            if sum(self.reserved.values()) + reserved > self.total:
+                raise ValueError(
+                    f"Reserved replicas of {service_name} exceed the replica budget"
+                )
+            self.reserved[service_name] = reserved
+            if reclaim is not None:
+                self.reclaimers[service_name] = reclaim
+
+    def allocate(self) -> dict[str, int]:
+        # Pools that did not report a demand yet hold on to their share
+        demands = {
+            name: self.demands.get(name, reserved)
+            for name, reserved in self.reserved.items()
+        }
+        allocation = {
+            name: min(demand, self.reserved[name]) for name, demand in demands.items()
+        }
+        spare = self.total - sum(allocation.values())
+        while spare > 0:
+            # One replica at a time to the pool with the largest unmet demand
+            name = max(
+                sorted(demands),
+                key=lambda name: demands[name] - allocation[name],
+            )
+            if demands[name] <= allocation[name]:
+                break
+            allocation[name] += 1
+            spare -= 1
+        return allocation
+
+    def reclaim(self, allocation: dict[str, int], service_name: str) -> None:
+        # Borrowers give their extra replicas back as soon as the pool that
+        # lent them needs its share, rather than on their own next tick
+        for name, held in self.held.items():
+            if (
+                name == service_name
+                or held <= max(allocation[name], self.reserved[name])
+                or name not in self.reclaimers
+            ):
+                continue
+            logging.info(
+                f"Reclaiming {held - allocation[name]} borrowed replicas "
+                f"of {name} for {service_name}"
+            )
+            try:
+                self.held[name] = self.reclaimers[name](allocation[name])
+            except Exception as e:
+                logging.error(f"Error reclaiming replicas of {name}: {e}")
+
+    def fit(
+        self,
+        service_name: str,
+        current_replicas: int,
+        desired_replicas: int,
+        reclaim: bool = True,
+    ) -> int:
+        with self.lock:
+            self.demands[service_name] = desired_replicas
+            self.held[service_name] = current_replicas
+            allocation = self.allocate()
+            if reclaim:
+                self.reclaim(allocation, service_name)
+            # Replicas a borrower could not give back yet are not handed out
+            held = sum(
+                replicas for name, replicas in self.held.items() if name != service_name
+            )
+            allowed = max(
+                min(allocation[service_name], self.total - held),
+                min(current_replicas, allocation[service_name]),
+            )
+            self.held[service_name] = max(
+                current_replicas, min(desired_replicas, allowed)
+            )
+        BUDGET_REPLICAS.labels(service_name=service_name).set(allowed)
+        BORROWED_REPLICAS.labels(service_name=service_name).set(
+            max(0, allowed - self.reserved[service_name])
+        )
+        return min(desired_replicas, allowed)
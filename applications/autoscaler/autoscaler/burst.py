@@ -0,0 +1,47 @@
+import math
+
+from prometheus_client import Gauge
+
+from autoscaler.policy import Sample
+from autoscaler.queue_monitor import QueueSnapshot
+
+DEPTH_GROWTH = Gauge(
+    "autoscaler_depth_growth",
+    "Growth of the queue depth between ticks, in messages per second",
+    ["service_name"],
+)
+
+
+class BurstDetector:
+    # Fires when the queue grows faster than factor times what the current
+    # replicas can drain, the target drains the backlog and keeps up with
+    # the arrivals within drain_time
+    def __init__(self, factor: float, per_replica_ack_rate: float, drain_time: float):
+        self.factor = factor
+        self.per_replica_ack_rate = per_replica_ack_rate
+        self.drain_time = drain_time
+        self.previous: tuple[float, int] | None = None
+
+    def target(
+        self, service_name: str, sample: Sample, latest: QueueSnapshot | None = None
+    ) -> int | None:
+        # The growth is taken from the latest raw read, a smoothed depth lags
+        # behind the very burst it should reveal
+        queue = latest or sample.queue
+        previous, self.previous = self.previous, (sample.timestamp, queue.messages)
+        if previous is None or self.per_replica_ack_rate <= 0:
+            return None
+        elapsed = sample.timestamp - previous[0]
+        if elapsed <= 0:
+            return None
+        growth = (queue.messages - previous[1]) / elapsed
+        DEPTH_GROWTH.labels(service_name=service_name).set(growth)
+        # The measured throughput, when known, over the nominal one
+        drain_rate = queue.ack_rate or sample.replicas * self.per_replica_ack_rate
+        if growth <= self.factor * drain_rate:
+            return None
+        target_rate = growth + drain_rate
+        # Like the rate policy, a drain time of zero leaves the backlog out
+        if self.drain_time > 0:
+            target_rate += queue.messages / self.drain_time
+        return math.ceil(target_rate / self.per_replica_ack_rate)
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+
+from docker import DockerClient
+from docker.models.services import Service
+
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.service_cache import docker_breaker
+
+
+@dataclass(frozen=True)
+class Resources:
+    nano_cpus: int = 0
+    memory_bytes: int = 0
+
+    @classmethod
+    def from_spec(cls, spec: dict | None) -> "Resources":
+        spec = spec or {}
+        return cls(
+            nano_cpus=spec.get("NanoCPUs", 0),
+            memory_bytes=spec.get("MemoryBytes", 0),
+        )
+
+    def __add__(self, other: "Resources") -> "Resources":
+        return Resources(
+            nano_cpus=self.nano_cpus + other.nano_cpus,
+            memory_bytes=self.memory_bytes + other.memory_bytes,
+        )
+
+    def __sub__(self, other: "Resources") -> "Resources":
+        return Resources(
+            nano_cpus=self.nano_cpus - other.nano_cpus,
+            memory_bytes=self.memory_bytes - other.memory_bytes,
+        )
+
+    def fits(self, reservation: "Resources") -> int:
+        slots = []
+        if reservation.nano_cpus > 0:
+            slots.append(self.nano_cpus // reservation.nano_cpus)
+        if reservation.memory_bytes > 0:
+            slots.append(self.memory_bytes // reservation.memory_bytes)
+        return max(0, min(slots))
+
+
+def task_reservation(spec: dict) -> Resources:
+    return Resources.from_spec((spec.get("Resources") or {}).get("Reservations"))
+
+
+def matches_constraint(node: dict, constraint: str) -> bool:
+    operator = "!=" if "!=" in constraint else "=="
+    key, _, expected = (part.strip() for part in constraint.partition(operator))
+    spec = node["Spec"]
+    if key == "node.id":
+        value = node["ID"]
+    elif key == "node.hostname":
+        value = node["Description"]["Hostname"]
+    elif key == "node.role":
+        value = spec["Role"]
+    elif key.startswith("node.labels."):
+        value = (spec.get("Labels") or {}).get(key.removeprefix("node.labels."))
+    else:
+        # Engine and platform constraints are not modelled
+        return True
+    return (value == expected) == (operator == "==")
+
+
+class CapacityModel:
+    def __init__(
+        self, docker_client: DockerClient, breaker: CircuitBreaker | None = None
+    ):
+        self.docker_client = docker_client
+        self.breaker = breaker or docker_breaker()
+
+    def placeable_replicas(self, service: Service) -> int | None:
+        task_template = service.attrs["Spec"]["TaskTemplate"]
+        reservation = task_reservation(task_template)
+        if reservation.nano_cpus <= 0 and reservation.memory_bytes <= 0:
+            return None
+        constraints = (task_template.get("Placement") or {}).get("Constraints") or []
+
+        reserved: dict[str, Resources] = {}
+        replicas = 0
+        tasks = self.breaker.call(
+            self.docker_client.api.tasks, filters={"desired-state": "running"}
+        )
+        for task in tasks:
+            # Pending tasks have not been assigned to a node and reserve nothing
+            node_id = task.get("NodeID")
+            if not node_id:
+                continue
+            if task["ServiceID"] == service.id:
+                replicas += 1
+            used = reserved.get(node_id, Resources())
+            reserved[node_id] = used + task_reservation(task["Spec"])
+
+        for node in self.breaker.call(self.docker_client.api.nodes):
+            if node["Status"]["State"] != "ready":
+                continue
+            if node["Spec"]["Availability"] != "active":
+                continue
+            if not all(matches_constraint(node, c) for c in constraints):
+                continue
+            total = Resources.from_spec(node["Description"]["Resources"])
+            free = total - reserved.get(node["ID"], Resources())
+            replicas += free.fits(reservation)
+        return replicas
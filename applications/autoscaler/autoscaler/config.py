@@ -0,0 +1,277 @@
+import configparser
+import dataclasses
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Mapping
+
+from docker import DockerClient
+
+from autoscaler.behavior import Behavior, ScalingRules
+from autoscaler.budget import ReplicaBudget
+from autoscaler.burst import BurstDetector
+from autoscaler.capacity import CapacityModel
+from autoscaler.drainer import IdleDrainer
+from autoscaler.metric_source import PrometheusMetricSource
+from autoscaler.policy import (
+    CompositePolicy,
+    DepthPolicy,
+    MetricPolicy,
+    Policy,
+    PredictivePolicy,
+    QueueWaitPolicy,
+    RatePolicy,
+    UtilisationPolicy,
+)
+from autoscaler.queue_monitor import QueueMonitor
+from autoscaler.scaler import Scaler
+from autoscaler.schedule import ContestSchedule
+from autoscaler.service_monitor import ServiceMonitor
+from autoscaler.shadow import ShadowPolicy
+from autoscaler.state import StateStore
+from autoscaler.trace import TraceRecorder
+from autoscaler.utilisation import UtilisationMonitor
+
+
+def parse(field: dataclasses.Field, value: str):
+    if field.type is bool:
+        return value.strip().lower() in ("true", "1", "yes")
+    return field.type(value)
+
+
+@dataclass(frozen=True)
+class ScalerConfig:
+    name: str
+    queue_name: str
+    service_name: str
+    policy: str = "depth"
+    messages_per_replica: int = 1
+    min_replicas: int = 1
+    max_replicas: int = 3
+    cooldown: int = 60
+    convergence_timeout: int = 120
+    cold_start: int = 30
+    forecast_window: int = 300
+    per_replica_ack_rate: float = 0.1
+    max_concurrent_submissions: int = 1
+    backlog_drain_time: int = 60
+    max_queue_wait_seconds: int = 15
+    scale_up_stabilization_window: int = 0
+    scale_up_max_step: int = 0
+    scale_up_max_percent: int = 0
+    scale_down_stabilization_window: int = 0
+    scale_down_max_step: int = 0
+    scale_down_max_percent: int = 0
+    tolerance: float = 0
+    graceful_scale_in: bool = False
+    prewarm_replicas: int = 0
+    capacity_aware: bool = False
+    target_utilisation: float = 0
+    metric_query: str = ""
+    target_value: float = 1
+    reserved_replicas: int = 0
+    burst_factor: float = 0
+    wake_replicas: int = 0
+    idle_timeout: int = 0
+    shadow_policies: str = ""
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = os.environ) -> "ScalerConfig":
+        values = {}
+        for field in dataclasses.fields(cls):
+            value = env.get(field.name.upper())
+            if field.name != "name" and value is not None:
+                values[field.name] = parse(field, value)
+        values.setdefault("name", values.get("service_name", "default"))
+        values.setdefault("queue_name", "")
+        values.setdefault("service_name", "")
+        return cls(**values)
+
+    @classmethod
+    def from_section(
+        cls, section: configparser.SectionProxy, defaults: "ScalerConfig"
+    ) -> "ScalerConfig":
+        values = {"name": section.name}
+        for field in dataclasses.fields(cls):
+            if field.name == "name" or field.name not in section:
+                continue
+            values[field.name] = parse(field, section[field.name])
+        return dataclasses.replace(defaults, **values)
+
+
+def load_configs(
+    path: str, defaults: ScalerConfig, validate: bool = True
+) -> list[ScalerConfig]:
+    # PromQL expressions may contain a literal %
+    parser = configparser.ConfigParser(interpolation=None)
+    with open(path) as file:
+        parser.read_file(file)
+
+    configs = [
+        ScalerConfig.from_section(parser[section], defaults)
+        for section in parser.sections()
+    ]
+    if validate:
+        for config in configs:
+            validate_config(config)
+    return configs
+
+
+def validate_config(config: ScalerConfig) -> None:
+    if not config.service_name:
+        raise ValueError(f"Policy {config.name} must define service_name")
+    if not config.queue_name and not config.metric_query:
+        raise ValueError(f"Policy {config.name} must define queue_name or metric_query")
+    if config.policy == "metric" and not config.metric_query:
+        raise ValueError(f"Policy {config.name} must define metric_query")
+    # Without a queue every other policy would scale on an empty snapshot
+    if not config.queue_name and config.policy != "metric":
+        raise ValueError(
+            f"Policy {config.name} has no queue_name and must use the metric policy"
+        )
+
+
+def build_queue_policy(config: ScalerConfig) -> Policy:
+    if config.policy == "predictive":
+        return PredictivePolicy(
+            messages_per_replica=config.messages_per_replica,
+            cold_start=config.cold_start,
+            window=config.forecast_window,
+        )
+    if config.policy == "rate":
+        return RatePolicy(
+            per_replica_ack_rate=config.per_replica_ack_rate,
+            backlog_drain_time=config.backlog_drain_time,
+            max_concurrent_submissions=config.max_concurrent_submissions,
+        )
+    if config.policy == "queue_wait":
+        return QueueWaitPolicy(max_queue_wait=config.max_queue_wait_seconds)
+    if config.policy == "metric":
+        return MetricPolicy(target_value=config.target_value)
+    if config.policy == "depth":
+        return DepthPolicy(messages_per_replica=config.messages_per_replica)
+    raise ValueError(f"Unknown scaling policy: {config.policy}")
+
+
+def build_policy(config: ScalerConfig) -> Policy:
+    policy = build_queue_policy(config)
+    if config.target_utilisation > 0:
+        return CompositePolicy(
+            [policy, UtilisationPolicy(target_utilisation=config.target_utilisation)]
+        )
+    return policy
+
+
+def build_shadows(config: ScalerConfig) -> list[ShadowPolicy]:
+    # Shadows share the parameters of the active policy, e.g.
+    # shadow_policies=predictive,rate
+    names = [name.strip() for name in config.shadow_policies.split(",")]
+    return [
+        ShadowPolicy(
+            service_name=config.service_name,
+            policy=build_queue_policy(dataclasses.replace(config, policy=name)),
+            min_replicas=config.min_replicas,
+            max_replicas=config.max_replicas,
+            per_replica_ack_rate=config.per_replica_ack_rate,
+            cold_start=config.cold_start,
+        )
+        for name in names
+        if name
+    ]
+
+
+def build_behavior(config: ScalerConfig) -> Behavior:
+    return Behavior(
+        scale_up=ScalingRules(
+            stabilization_window=config.scale_up_stabilization_window,
+            max_step=config.scale_up_max_step,
+            max_percent=config.scale_up_max_percent,
+        ),
+        scale_down=ScalingRules(
+            stabilization_window=config.scale_down_stabilization_window,
+            max_step=config.scale_down_max_step,
+            max_percent=config.scale_down_max_percent,
+        ),
+        tolerance=config.tolerance,
+    )
+
+
+def build_scaler(
+    config: ScalerConfig,
+    queue_monitor: QueueMonitor,
+    service_monitor: ServiceMonitor,
+    docker_client: DockerClient | None = None,
+    recorder: TraceRecorder | None = None,
+    schedule: ContestSchedule | None = None,
+    prometheus_url: str | None = None,
+    state_store: StateStore | None = None,
+    budget: ReplicaBudget | None = None,
+    clock: Callable[[], float] = time.time,
+) -> Scaler:
+    metric_source = None
+    if config.metric_query:
+        if not prometheus_url:
+            raise ValueError(f"Policy {config.name} needs a Prometheus URL")
+        metric_source = PrometheusMetricSource(
+            url=prometheus_url, query=config.metric_query
+        )
+    utilisation_monitor = None
+    if config.target_utilisation > 0:
+        # cAdvisor runs with the telemetry of the stack
+        if not prometheus_url:
+            raise ValueError(f"Policy {config.name} needs a Prometheus URL")
+        utilisation_monitor = UtilisationMonitor(
+            url=prometheus_url,
+            service_name=config.service_name,
+            max_concurrent_submissions=config.max_concurrent_submissions,
+        )
+    scaler = Scaler(
+        queue_monitor=queue_monitor,
+        service_monitor=service_monitor,
+        queue_name=config.queue_name,
+        cooldown=config.cooldown,
+        messages_per_replica=config.messages_per_replica,
+        min_replicas=config.min_replicas,
+        max_replicas=config.max_replicas,
+        policy=build_policy(config),
+        behavior=build_behavior(config),
+        drainer=(
+            IdleDrainer(queue_monitor=queue_monitor)
+            if config.graceful_scale_in
+            else None
+        ),
+        recorder=recorder,
+        schedule=schedule,
+        prewarm_replicas=config.prewarm_replicas,
+        capacity=(
+            CapacityModel(docker_client, breaker=service_monitor.breaker)
+            if config.capacity_aware and docker_client is not None
+            else None
+        ),
+        utilisation_monitor=utilisation_monitor,
+        metric_source=metric_source,
+        state_store=state_store,
+        budget=budget,
+        burst=(
+            BurstDetector(
+                factor=config.burst_factor,
+                per_replica_ack_rate=config.per_replica_ack_rate,
+                drain_time=config.backlog_drain_time,
+            )
+            if config.burst_factor > 0
+            else None
+        ),
+        wake_replicas=config.wake_replicas,
+        idle_timeout=config.idle_timeout,
+        shadows=build_shadows(config),
+        convergence_timeout=config.convergence_timeout,
+        clock=clock,
+    )
+    if budget is not None:
+        # The minimum replicas of a pool always come out of its own share
+        budget.register(
+            config.service_name,
+            max(config.reserved_replicas, config.min_replicas),
+            reclaim=scaler.reclaim,
+        )
+    return scaler
@@ -0,0 +1,58 @@
+import logging
+
+from prometheus_client import Counter
+
+from autoscaler.queue_monitor import QueueMonitor
+from autoscaler.service_monitor import ServiceMonitor
+
+DRAINED_TASKS = Counter(
+    "autoscaler_drained_tasks",
+    "Number of tasks removed by scaling in no further than the idle tasks",
+    ["service_name"],
+)
+
+
+def task_addresses(task: dict) -> set[str]:
+    return {
+        address.split("/")[0]
+        for attachment in task.get("NetworksAttachments") or []
+        for address in attachment.get("Addresses") or []
+    }
+
+
+class IdleDrainer:
+    # Scales in by at most the number of idle tasks, so a busy judge is never
+    # needed to make up the difference. Swarm still picks the tasks to remove,
+    # a busy one stops consuming on SIGTERM and finishes its submission within
+    # the stop_grace_period of the service.
+    def __init__(self, queue_monitor: QueueMonitor):
+        self.queue_monitor = queue_monitor
+
+    def scale_in(
+        self,
+        service_monitor: ServiceMonitor,
+        queue_name: str,
+        current_replicas: int,
+        desired_replicas: int,
+    ) -> int:
+        tasks = service_monitor.get_tasks()
+        busy_hosts = {
+            consumer.peer_host
+            for consumer in self.queue_monitor.get_consumers(queue_name)
+            if consumer.messages_unacknowledged > 0
+        }
+        idle_tasks = [task for task in tasks if not task_addresses(task) & busy_hosts]
+
+        replicas = max(desired_replicas, current_replicas - len(idle_tasks))
+        if replicas == current_replicas:
+            logging.info(
+                f"No idle task of {service_monitor.service_name} to remove, "
+                f"postponing scale in"
+            )
+            return current_replicas
+
+        DRAINED_TASKS.labels(service_name=service_monitor.service_name).inc(
+            current_replicas - replicas
+        )
+        service_monitor.scale(replicas)
+        return replicas
@@ -0,0 +1,44 @@
+import time
+from typing import Callable
+
+from autoscaler.manager import ScalerManager
+
+
+class HealthCheck:
+    def __init__(
+        self,
+        manager: ScalerManager,
+        max_staleness: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.manager = manager
+        self.max_staleness = max_staleness
+        self.clock = clock
+
+    def age(self, timestamp: float | None) -> float | None:
+        if timestamp is None:
+            return None
+        return max(0.0, self.clock() - timestamp)
+
+    def health(self) -> tuple[bool, dict]:
+        # Only the tick loop itself is checked, restarting the container does
+        # not help when RabbitMQ or Docker are slow
+        last_tick_at = self.manager.last_tick_at or self.manager.started_at
+        age = self.age(last_tick_at)
+        is_healthy = age < self.max_staleness
+        return is_healthy, {
+            "status": "healthy" if is_healthy else "unhealthy",
+            "last_tick_age": self.age(self.manager.last_tick_at),
+        }
+
+    def ready(self) -> tuple[bool, dict]:
+        age = self.age(self.manager.last_fresh_at)
+        is_ready = age is not None and age < self.max_staleness
+        return is_ready, {
+            "status": "ready" if is_ready else "not ready",
+            "last_fresh_age": age,
+            "last_error": self.manager.last_error,
+        }
+
+    def status(self) -> dict:
+        return self.manager.status()
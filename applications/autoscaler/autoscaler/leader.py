@@ -0,0 +1,128 @@
+import logging
+import time
+from typing import Callable
+
+from docker import DockerClient
+from prometheus_client import Counter, Gauge
+
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.service_cache import docker_breaker
+
+LEADER = Gauge("autoscaler_leader", "Whether this replica holds the scaling lease")
+LEADER_TRANSITIONS = Counter(
+    "autoscaler_leader_transitions",
+    "Number of times this replica gained or lost the lease",
+)
+
+HOLDER_LABEL = "com.forsetijudge.autoscaler.leader"
+RENEWED_LABEL = "com.forsetijudge.autoscaler.renewed"
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+class LeaderElector:
+    def __init__(
+        self,
+        docker_client: DockerClient,
+        service_name: str,
+        identity: str,
+        lease_duration: float = 30,
+        breaker: CircuitBreaker | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.docker_client = docker_client
+        self.service_name = service_name
+        self.identity = identity
+        self.lease_duration = lease_duration
+        self.breaker = breaker or docker_breaker()
+        self.clock = clock
+        self.leader = False
+        self.renewed_at: float | None = None
+        self.observed: tuple[str | None, str | None] | None = None
+        self.observed_at: float | None = None
+
+    def is_leader(self) -> bool:
+        try:
+            leader = self.elect()
+        except Exception as e:
+            logging.error(f"Error renewing the scaling lease: {e}")
+            # Keep leading until our own lease runs out, nobody else can take
+            # it over before that
+            leader = self.holds_lease()
+        if leader != self.leader:
+            logging.info(
+                f"{self.identity} {'acquired' if leader else 'lost'} the scaling lease"
+            )
+            LEADER_TRANSITIONS.inc()
+        self.leader = leader
+        LEADER.set(1 if leader else 0)
+        return leader
+
+    def holds_lease(self) -> bool:
+        # Checked locally right before scaling, a tick that overran its
+        # timeout must not act on a lease another replica may have taken
+        return (
+            self.leader
+            and self.renewed_at is not None
+            and self.clock() - self.renewed_at < self.lease_duration
+        )
+
+    def elect(self) -> bool:
+        now = self.clock()
+        service = self.breaker.call(
+            self.docker_client.api.inspect_service, self.service_name
+        )
+        labels = service["Spec"].get("Labels") or {}
+        record = (labels.get(HOLDER_LABEL), labels.get(RENEWED_LABEL))
+        # Expiry is measured on the local clock from the last time the lease
+        # was seen changing, so clock skew between nodes does not matter
+        if record != self.observed:
+            self.observed = record
+            self.observed_at = now
+
+        holder = record[0]
+        if holder == self.identity:
+            if (
+                self.renewed_at is not None
+                and now - self.renewed_at < self.lease_duration / 2
+            ):
+                return True
+        elif holder and now - self.observed_at < self.lease_duration:
+            return False
+
+        # The spec version makes concurrent acquisitions fail on all but one
+        # replica
+        renewed = str(time.time())
+        self.update_labels(
+            service, {**labels, HOLDER_LABEL: self.identity, RENEWED_LABEL: renewed}
+        )
+        self.renewed_at = now
+        self.observed = (self.identity, renewed)
+        self.observed_at = now
+        return True
+
+    def release(self) -> None:
+        if not self.leader:
+            return
+        try:
+            service = self.breaker.call(
+                self.docker_client.api.inspect_service, self.service_name
+            )
+            labels = service["Spec"].get("Labels") or {}
+            if labels.get(HOLDER_LABEL) == self.identity:
+                self.update_labels(service, {**labels, HOLDER_LABEL: ""})
+        except Exception as e:
+            logging.error(f"Error releasing the scaling lease: {e}")
+        self.leader = False
+        LEADER.set(0)
+
+    def update_labels(self, service: dict, labels: dict[str, str]) -> None:
+        self.breaker.call(
+            self.docker_client.api.update_service,
+            service["ID"],
+            service["Version"]["Index"],
+            labels=labels,
+            fetch_current_spec=True,
+        )
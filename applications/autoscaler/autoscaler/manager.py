@@ -0,0 +1,130 @@
+import logging
+import time
+from typing import Callable
+
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.leader import LeaderElector
+from autoscaler.queue_monitor import QueueMonitor
+from autoscaler.sampler import QueueSampler
+from autoscaler.scaler import FAIL_COUNT, HELD_COUNT, Scaler
+from autoscaler.schedule import ContestSchedule
+from autoscaler.service_cache import ServiceStateCache
+
+
+class ScalerManager:
+    def __init__(
+        self,
+        queue_monitor: QueueMonitor,
+        service_cache: ServiceStateCache,
+        scalers: list[Scaler],
+        schedule: ContestSchedule | None = None,
+        elector: LeaderElector | None = None,
+        sampler: QueueSampler | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.queue_monitor = queue_monitor
+        self.service_cache = service_cache
+        self.scalers = scalers
+        self.schedule = schedule
+        self.elector = elector
+        self.sampler = sampler
+        # Runs a scaling tick ahead of the interval
+        self.on_wake: Callable[[], None] | None = None
+        self.waking: set[str] = set()
+        self.clock = clock
+        self.started_at = clock()
+        self.last_tick_at: float | None = None
+        self.last_fresh_at: float | None = None
+        self.last_error: str | None = None
+
+    def refresh_schedule(self):
+        if self.schedule is None or not self.schedule.is_stale():
+            return
+        try:
+            self.schedule.refresh()
+        except Exception as e:
+            # The last known windows are kept until the API is reachable again
+            logging.error(f"Error fetching the contest schedule: {e}")
+
+    def sample(self):
+        self.sampler.sample()
+        is_waking = False
+        for scaler in self.scalers:
+            service_name = scaler.service_monitor.service_name
+            stats = self.sampler.stats(scaler.queue_name)
+            state = self.service_cache.get(service_name)
+            if stats is None or state is None or state.replicas > 0 or not stats.last:
+                self.waking.discard(service_name)
+            elif service_name not in self.waking:
+                # A service scaled to zero is woken on its first message
+                # instead of at the next scaling tick
+                logging.info(f"Waking up service {service_name}")
+                self.waking.add(service_name)
+                is_waking = True
+        if is_waking and self.on_wake is not None:
+            self.on_wake()
+
+    def scale(self):
+        try:
+            self.scale_services()
+        finally:
+            self.last_tick_at = self.clock()
+
+    def scale_services(self):
+        is_leader = self.elector is None or self.elector.is_leader()
+        self.refresh_schedule()
+        try:
+            # The sampler reads the queues on its own faster loop
+            if self.sampler is not None:
+                snapshots = self.sampler.get_snapshots()
+            else:
+                snapshots = self.queue_monitor.get_snapshots()
+            # Kept up to date by the Docker event stream when it is running
+            if self.service_cache.is_stale():
+                self.service_cache.resync()
+        except CircuitOpenError as e:
+            # Nothing is scaled until fresh data is available again
+            logging.warning(f"Holding all services: {e}")
+            self.last_error = str(e)
+            for scaler in self.scalers:
+                HELD_COUNT.labels(**scaler.labels).inc()
+            return
+        except Exception as e:
+            logging.error(f"Error fetching queues and services: {e}")
+            self.last_error = str(e)
+            for scaler in self.scalers:
+                FAIL_COUNT.labels(**scaler.labels).inc()
+            return
+        self.last_fresh_at = self.clock()
+        self.last_error = None
+
+        for scaler in self.scalers:
+            queue = snapshots.get(scaler.queue_name)
+            state = self.service_cache.get(scaler.service_monitor.service_name)
+            if (queue is None and scaler.queue_name) or state is None:
+                logging.error(
+                    f"Queue {scaler.queue_name} or service "
+                    f"{scaler.service_monitor.service_name} not found"
+                )
+                FAIL_COUNT.labels(**scaler.labels).inc()
+                continue
+            scaler.service_monitor.update(state)
+            scaler.scale(
+                queue=queue,
+                dry_run=not is_leader,
+                latest=(
+                    self.sampler.latest(scaler.queue_name)
+                    if self.sampler is not None
+                    else None
+                ),
+            )
+
+    def status(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "last_tick_at": self.last_tick_at,
+            "last_fresh_at": self.last_fresh_at,
+            "last_error": self.last_error,
+            "leader": self.elector.leader if self.elector is not None else True,
+            "services": [scaler.status for scaler in self.scalers],
+        }
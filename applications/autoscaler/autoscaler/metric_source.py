@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+
+import requests
+
+
+def check_prometheus(url: str, timeout: float = 5) -> None:
+    try:
+        response = requests.get(f"{url.rstrip('/')}/-/ready", timeout=timeout)
+        response.raise_for_status()
+    except Exception as e:
+        raise ValueError(f"Prometheus at {url} is not reachable: {e}") from e
+
+
+class MetricSource(ABC):
+    name: str
+
+    @abstractmethod
+    def get_value(self) -> float:
+        pass
+
+
+class PrometheusMetricSource(MetricSource):
+    name = "prometheus"
+
+    def __init__(self, url: str, query: str, timeout: float = 5):
+        self.url = url.rstrip("/")
+        self.query = query
+        self.timeout = timeout
+        # Keep-alive connections are reused across ticks
+        self.session = requests.Session()
+
+    def get_value(self) -> float:
+        # An empty vector means the series is absent, e.g. no traffic yet
+        return sum(self.get_values())
+
+    def get_values(self) -> list[float]:
+        response = self.session.get(
+            f"{self.url}/api/v1/query",
+            params={"query": self.query},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+        if body.get("status") != "success":
+            raise ValueError(f"Prometheus query failed: {body.get('error')}")
+
+        data = body["data"]
+        if data["resultType"] in ("scalar", "string"):
+            return [float(data["result"][1])]
+        if data["resultType"] == "vector":
+            return [float(series["value"][1]) for series in data["result"]]
+        raise ValueError(f"Unsupported Prometheus result type: {data['resultType']}")
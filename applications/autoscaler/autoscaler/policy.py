@@ -0,0 +1,210 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.utilisation import Utilisation
+
+
+@dataclass(frozen=True)
+class Sample:
+    timestamp: float
+    replicas: int
+    queue: QueueSnapshot
+    utilisation: Utilisation | None = None
+    metric: float | None = None
+
+    @property
+    def messages(self) -> int:
+        return self.queue.messages
+
+    @property
+    def head_message_age(self) -> float:
+        if self.queue.head_message_timestamp is None:
+            return 0.0
+        return max(0.0, self.timestamp - self.queue.head_message_timestamp)
+
+
+class Policy(ABC):
+    name: str
+
+    def observe(self, sample: Sample) -> None:
+        pass
+
+    @abstractmethod
+    def desired(self, sample: Sample) -> float:
+        # Unrounded replicas, the dead-band of the behavior applies to their
+        # ratio to the current replicas
+        pass
+
+    def recommend(self, sample: Sample) -> int:
+        return math.ceil(round(self.desired(sample), 6))
+
+
+class DepthPolicy(Policy):
+    name = "depth"
+
+    def __init__(self, messages_per_replica: int):
+        self.messages_per_replica = messages_per_replica
+
+    def replicas_for(self, messages: float) -> float:
+        if self.messages_per_replica <= 0:
+            return 0.0
+        return max(0.0, messages) / self.messages_per_replica
+
+    def desired(self, sample: Sample) -> float:
+        return self.replicas_for(sample.messages)
+
+
+class PredictivePolicy(DepthPolicy):
+    name = "predictive"
+
+    def __init__(
+        self,
+        messages_per_replica: int,
+        cold_start: float,
+        window: float = 300,
+        alpha: float = 0.5,
+        beta: float = 0.3,
+    ):
+        super().__init__(messages_per_replica)
+        self.cold_start = cold_start
+        self.window = window
+        self.alpha = alpha
+        self.beta = beta
+        self.samples: deque[Sample] = deque()
+
+    def observe(self, sample: Sample) -> None:
+        self.samples.append(sample)
+        while self.samples and (
+            sample.timestamp - self.samples[0].timestamp > self.window
+        ):
+            self.samples.popleft()
+
+    def forecast(self) -> tuple[float, float]:
+        # Holt's linear smoothing over the window, adapted to irregular
+        # intervals. The trend is the net arrival rate in messages per second:
+        # what arrives minus what the current replicas drain.
+        if not self.samples:
+            return 0.0, 0.0
+
+        level = float(self.samples[0].messages)
+        trend = 0.0
+        previous = self.samples[0]
+        for sample in list(self.samples)[1:]:
+            dt = sample.timestamp - previous.timestamp
+            if dt <= 0:
+                continue
+            predicted = level + trend * dt
+            new_level = self.alpha * sample.messages + (1 - self.alpha) * predicted
+            trend = self.beta * (new_level - level) / dt + (1 - self.beta) * trend
+            level = new_level
+            previous = sample
+        return level, trend
+
+    def projected_messages(self) -> float:
+        level, trend = self.forecast()
+        return max(0.0, level + trend * self.cold_start)
+
+    def desired(self, sample: Sample) -> float:
+        return self.replicas_for(self.projected_messages())
+
+
+class RatePolicy(Policy):
+    name = "rate"
+
+    def __init__(
+        self,
+        per_replica_ack_rate: float,
+        backlog_drain_time: float = 60,
+        alpha: float = 0.3,
+        max_concurrent_submissions: int = 1,
+    ):
+        self.per_replica_ack_rate = per_replica_ack_rate
+        self.backlog_drain_time = backlog_drain_time
+        self.alpha = alpha
+        self.max_concurrent_submissions = max_concurrent_submissions
+
+    def observe(self, sample: Sample) -> None:
+        # Only learn the throughput of a replica while the judges are
+        # saturated, otherwise the ack rate just mirrors the publish rate.
+        queue = sample.queue
+        if queue.messages_ready > 0 and queue.consumers > 0 and queue.ack_rate > 0:
+            observed = queue.ack_rate / queue.consumers
+            self.per_replica_ack_rate = (
+                self.alpha * observed + (1 - self.alpha) * self.per_replica_ack_rate
+            )
+
+    def desired(self, sample: Sample) -> float:
+        # Judges still working on a message are never scaled away
+        in_flight = math.ceil(
+            sample.queue.messages_unacknowledged
+            / max(1, self.max_concurrent_submissions)
+        )
+        if self.per_replica_ack_rate <= 0:
+            return in_flight
+        target_rate = sample.queue.publish_rate
+        if self.backlog_drain_time > 0:
+            target_rate += sample.queue.messages_ready / self.backlog_drain_time
+        return max(in_flight, target_rate / self.per_replica_ack_rate)
+
+
+class QueueWaitPolicy(Policy):
+    name = "queue_wait"
+
+    def __init__(self, max_queue_wait: float, scale_in_ratio: float = 0.25):
+        self.max_queue_wait = max_queue_wait
+        self.scale_in_ratio = scale_in_ratio
+
+    def desired(self, sample: Sample) -> float:
+        age = sample.head_message_age
+        if sample.replicas == 0:
+            return 1 if sample.messages > 0 else 0
+        if age > self.max_queue_wait:
+            return max(
+                sample.replicas + 1,
+                math.ceil(sample.replicas * age / self.max_queue_wait),
+            )
+        if age < self.max_queue_wait * self.scale_in_ratio:
+            return sample.replicas - 1
+        return sample.replicas
+
+
+class MetricPolicy(Policy):
+    name = "metric"
+
+    def __init__(self, target_value: float):
+        self.target_value = target_value
+
+    def desired(self, sample: Sample) -> float:
+        if sample.metric is None or self.target_value <= 0:
+            return 0.0
+        return max(0.0, sample.metric) / self.target_value
+
+
+class UtilisationPolicy(Policy):
+    name = "utilisation"
+
+    def __init__(self, target_utilisation: float):
+        self.target_utilisation = target_utilisation
+
+    def desired(self, sample: Sample) -> float:
+        # Same proportional rule as the Kubernetes HPA resource metrics, on
+        # the CPU of the sandboxes
+        if sample.utilisation is None or self.target_utilisation <= 0:
+            return 0.0
+        return sample.replicas * sample.utilisation.cpu / self.target_utilisation
+
+
+class CompositePolicy(Policy):
+    def __init__(self, policies: list[Policy]):
+        self.policies = policies
+        self.name = "+".join(policy.name for policy in policies)
+
+    def observe(self, sample: Sample) -> None:
+        for policy in self.policies:
+            policy.observe(sample)
+
+    def desired(self, sample: Sample) -> float:
+        return max(policy.desired(sample) for policy in self.policies)
@@ -1,31 +1,121 @@
 import urllib.parse
+from dataclasses import dataclass
 
 import requests
 
+from autoscaler.breaker import CircuitBreaker
+
+
+@dataclass(frozen=True)
+class QueueSnapshot:
+    messages: int
+    messages_ready: int = 0
+    messages_unacknowledged: int = 0
+    consumers: int = 0
+    consumer_utilisation: float | None = None
+    publish_rate: float = 0.0
+    ack_rate: float = 0.0
+    deliver_get_rate: float = 0.0
+    head_message_timestamp: float | None = None
+    # Messages acked since the queue was created, a counter of the broker
+    acks: int = 0
+
+    @classmethod
+    def from_response(cls, data: dict) -> "QueueSnapshot":
+        message_stats = data.get("message_stats") or {}
+
+        def rate(name: str) -> float:
+            return float((message_stats.get(name) or {}).get("rate", 0.0))
+
+        return cls(
+            messages=data.get("messages", 0),
+            messages_ready=data.get("messages_ready", 0),
+            messages_unacknowledged=data.get("messages_unacknowledged", 0),
+            consumers=data.get("consumers", 0),
+            consumer_utilisation=data.get("consumer_utilisation"),
+            publish_rate=rate("publish_details"),
+            ack_rate=rate("ack_details"),
+            deliver_get_rate=rate("deliver_get_details"),
+            head_message_timestamp=data.get("head_message_timestamp"),
+            acks=message_stats.get("ack", 0),
+        )
+
+
+@dataclass(frozen=True)
+class ConsumerSnapshot:
+    peer_host: str
+    channel: str
+    messages_unacknowledged: int
+
 
 class QueueMonitor:
     def __init__(
         self,
-        queue_name: str,
         host: str,
         port: int,
         vhost: str,
         username: str,
         password: str,
+        timeout: float = 5,
+        breaker: CircuitBreaker | None = None,
     ):
-        self.queue_name = queue_name
         self.host = host
         self.port = port
         self.vhost = vhost
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker("rabbitmq")
+        # Keep-alive connections are reused across ticks
+        self.session = requests.Session()
+        self.session.auth = (username, password)
 
-    def get_number_of_messages(self) -> int:
-        response = requests.get(
+    @property
+    def url(self) -> str:
+        return (
             f"http://{self.host}:{self.port}/api/queues/"
-            f"{urllib.parse.quote(self.vhost, safe='')}/{self.queue_name}",
-            auth=(self.username, self.password),
+            f"{urllib.parse.quote(self.vhost, safe='')}"
         )
+
+    def fetch(self, url: str):
+        response = self.session.get(url, timeout=self.timeout)
         response.raise_for_status()
-        data = response.json()
-        return data.get("messages", 0)
+        return response.json()
+
+    def get(self, path: str):
+        return self.breaker.call(
+            self.fetch, f"http://{self.host}:{self.port}/api/{path}"
+        )
+
+    def get_snapshot(self, queue_name: str) -> QueueSnapshot:
+        data = self.breaker.call(self.fetch, f"{self.url}/{queue_name}")
+        return QueueSnapshot.from_response(data)
+
+    def get_snapshots(self) -> dict[str, QueueSnapshot]:
+        return {
+            queue["name"]: QueueSnapshot.from_response(queue)
+            for queue in self.breaker.call(self.fetch, self.url)
+        }
+
+    def get_number_of_messages(self, queue_name: str) -> int:
+        return self.get_snapshot(queue_name).messages
+
+    def get_consumers(self, queue_name: str) -> list[ConsumerSnapshot]:
+        vhost = urllib.parse.quote(self.vhost, safe="")
+        # Unacked counts are only reported per channel, a judge consumes the
+        # submission queue on its own channel
+        channels = {
+            channel["name"]: channel.get("messages_unacknowledged", 0)
+            for channel in self.get(f"vhosts/{vhost}/channels")
+        }
+        return [
+            ConsumerSnapshot(
+                peer_host=consumer["channel_details"]["peer_host"],
+                channel=consumer["channel_details"]["name"],
+                messages_unacknowledged=channels.get(
+                    consumer["channel_details"]["name"], 0
+                ),
+            )
+            for consumer in self.get(f"consumers/{vhost}")
+            if consumer["queue"]["name"] == queue_name
+        ]
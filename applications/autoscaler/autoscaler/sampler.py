@@ -0,0 +1,138 @@
+import dataclasses
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from prometheus_client import Gauge
+
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+
+SMOOTHED_MESSAGES = Gauge(
+    "autoscaler_smoothed_messages",
+    "Messages in the queue over the sampling window",
+    ["queue_name", "statistic"],
+)
+
+STATISTICS = ("last", "median", "max", "ewma")
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    last: float
+    median: float
+    max: float
+    ewma: float
+    samples: int
+
+
+def ewma(values: list[float], alpha: float) -> float:
+    average = values[0]
+    for value in values[1:]:
+        average = alpha * value + (1 - alpha) * average
+    return average
+
+
+def window_stats(values: list[float], alpha: float) -> QueueStats:
+    return QueueStats(
+        last=values[-1],
+        median=statistics.median(values),
+        max=max(values),
+        ewma=ewma(values, alpha),
+        samples=len(values),
+    )
+
+
+class QueueSampler:
+    # Reads the queues every few seconds into a ring buffer, the scaling
+    # ticks then act on a smoothed snapshot of the whole window instead of
+    # a single read
+    def __init__(
+        self,
+        queue_monitor: QueueMonitor,
+        window: int = 10,
+        statistic: str = "median",
+        alpha: float = 0.3,
+        max_age: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown smoothing statistic: {statistic}")
+        self.queue_monitor = queue_monitor
+        self.window = window
+        self.statistic = statistic
+        self.alpha = alpha
+        self.max_age = max_age
+        self.clock = clock
+        # Also serializes the reads of the queues, the first scaling tick may
+        # sample while the sampling loop does
+        self.lock = threading.RLock()
+        self.buffers: dict[str, deque[QueueSnapshot]] = {}
+        self.sampled_at: float | None = None
+        self.last_error: Exception | None = None
+
+    def sample(self) -> None:
+        with self.lock:
+            try:
+                snapshots = self.queue_monitor.get_snapshots()
+            except Exception as e:
+                self.last_error = e
+                raise
+            for queue_name, snapshot in snapshots.items():
+                buffer = self.buffers.get(queue_name)
+                if buffer is None:
+                    buffer = self.buffers[queue_name] = deque(maxlen=self.window)
+                buffer.append(snapshot)
+            self.sampled_at = self.clock()
+            self.last_error = None
+
+    def is_stale(self) -> bool:
+        return self.sampled_at is None or self.clock() - self.sampled_at > self.max_age
+
+    def stats(self, queue_name: str) -> QueueStats | None:
+        with self.lock:
+            buffer = self.buffers.get(queue_name)
+            if not buffer:
+                return None
+            return window_stats([snapshot.messages for snapshot in buffer], self.alpha)
+
+    def latest(self, queue_name: str) -> QueueSnapshot | None:
+        with self.lock:
+            buffer = self.buffers.get(queue_name)
+            return buffer[-1] if buffer else None
+
+    def get_snapshots(self) -> dict[str, QueueSnapshot]:
+        with self.lock:
+            if self.sampled_at is None:
+                # The first scaling tick may run before the first sample
+                self.sample()
+        if self.is_stale():
+            if self.last_error is not None:
+                raise self.last_error
+            raise RuntimeError("No fresh queue samples")
+        with self.lock:
+            snapshots = {}
+            for queue_name, buffer in self.buffers.items():
+                messages = window_stats([s.messages for s in buffer], self.alpha)
+                ready = window_stats([s.messages_ready for s in buffer], self.alpha)
+                for statistic in STATISTICS:
+                    SMOOTHED_MESSAGES.labels(
+                        queue_name=queue_name, statistic=statistic
+                    ).set(getattr(messages, statistic))
+                # Everything but the depth is taken from the latest sample, a
+                # queue with a waiting message is never smoothed to empty
+                latest = buffer[-1]
+                snapshots[queue_name] = dataclasses.replace(
+                    latest,
+                    messages=max(
+                        round(getattr(messages, self.statistic)),
+                        min(1, latest.messages),
+                    ),
+                    messages_ready=max(
+                        round(getattr(ready, self.statistic)),
+                        min(1, latest.messages_ready),
+                    ),
+                )
+        return snapshots
@@ -1,18 +1,59 @@
+import dataclasses
 import logging
-import math
 import time
+from dataclasses import dataclass
+from typing import Callable
 
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
-from autoscaler.queue_monitor import QueueMonitor
+from autoscaler.behavior import Behavior
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.budget import ReplicaBudget
+from autoscaler.burst import BurstDetector
+from autoscaler.capacity import CapacityModel
+from autoscaler.drainer import IdleDrainer
+from autoscaler.leader import LeaseLostError
+from autoscaler.metric_source import MetricSource
+from autoscaler.policy import DepthPolicy, Policy, Sample
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+from autoscaler.schedule import ContestSchedule
 from autoscaler.service_monitor import ServiceMonitor
+from autoscaler.shadow import ShadowPolicy
+from autoscaler.state import StateStore, load_sample
+from autoscaler.trace import TraceRecorder
+from autoscaler.utilisation import UtilisationMonitor
 
 CURRENT_REPLICAS = Gauge(
     "autoscaler_current_replicas", "Current number of replicas", ["service_name"]
 )
+HEAD_MESSAGE_AGE = Gauge(
+    "autoscaler_head_message_age_seconds",
+    "Age of the oldest message waiting in the queue",
+    ["service_name"],
+)
+UTILISATION = Gauge(
+    "autoscaler_utilisation",
+    "Average utilisation of the running tasks relative to their limits",
+    ["service_name", "resource"],
+)
+METRIC_VALUE = Gauge(
+    "autoscaler_metric_value",
+    "Last value read from the metric source of the service",
+    ["service_name"],
+)
+MIN_REPLICAS = Gauge(
+    "autoscaler_min_replicas",
+    "Minimum number of replicas, raised while a contest is pre-warmed",
+    ["service_name"],
+)
 DESIRED_REPLICAS = Gauge(
     "autoscaler_desired_replicas", "Desired number of replicas", ["service_name"]
 )
+UNSCHEDULABLE_REPLICAS = Gauge(
+    "autoscaler_unschedulable_replicas",
+    "Desired replicas that cannot be placed on the nodes of the cluster",
+    ["service_name"],
+)
 SCALING_COUNT = Counter(
     "autoscaler_scaling_count",
     "Number of scaling actions",
@@ -21,6 +62,36 @@ SCALING_COUNT = Counter(
 FAIL_COUNT = Counter(
     "autoscaler_fail_count", "Number of failed scaling actions", ["service_name"]
 )
+HELD_COUNT = Counter(
+    "autoscaler_held_count",
+    "Number of ticks where scaling was held for lack of fresh data",
+    ["service_name"],
+)
+SCALE_LATENCY = Histogram(
+    "autoscaler_scale_latency_seconds",
+    "Time until the running tasks match the desired replicas after scaling",
+    ["service_name", "direction"],
+    buckets=(1, 2, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300),
+)
+FIRST_VERDICT_AFTER_IDLE = Histogram(
+    "autoscaler_first_verdict_after_idle_seconds",
+    "Time from the first message seen at zero replicas until one is processed",
+    ["service_name"],
+    buckets=(5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600),
+)
+CONVERGENCE_TIMEOUT_COUNT = Counter(
+    "autoscaler_convergence_timeout_count",
+    "Number of scaling actions that did not converge before their deadline",
+    ["service_name", "direction"],
+)
+
+
+@dataclass(frozen=True)
+class ScaleAction:
+    direction: str
+    replicas: int
+    started_at: float
+    deadline: float
 
 
 class Scaler:
@@ -28,56 +99,413 @@ class Scaler:
         self,
         queue_monitor: QueueMonitor,
         service_monitor: ServiceMonitor,
+        queue_name: str,
         cooldown: int,
         messages_per_replica: int,
         min_replicas: int,
         max_replicas: int,
+        policy: Policy | None = None,
+        behavior: Behavior | None = None,
+        drainer: IdleDrainer | None = None,
+        recorder: TraceRecorder | None = None,
+        schedule: ContestSchedule | None = None,
+        prewarm_replicas: int = 0,
+        capacity: CapacityModel | None = None,
+        utilisation_monitor: UtilisationMonitor | None = None,
+        metric_source: MetricSource | None = None,
+        state_store: StateStore | None = None,
+        budget: ReplicaBudget | None = None,
+        burst: BurstDetector | None = None,
+        wake_replicas: int = 0,
+        idle_timeout: float = 0,
+        shadows: list[ShadowPolicy] | None = None,
+        convergence_timeout: int = 120,
+        clock: Callable[[], float] = time.time,
     ):
         self.queue_monitor = queue_monitor
         self.service_monitor = service_monitor
+        self.queue_name = queue_name
         self.cooldown = cooldown
         self.messages_per_replica = messages_per_replica
         self.min_replicas = min_replicas
         self.max_replicas = max_replicas
+        self.policy = policy or DepthPolicy(messages_per_replica)
+        self.behavior = behavior or Behavior()
+        self.drainer = drainer
+        self.recorder = recorder
+        self.schedule = schedule
+        self.prewarm_replicas = prewarm_replicas
+        self.capacity = capacity
+        self.utilisation_monitor = utilisation_monitor
+        self.metric_source = metric_source
+        self.state_store = state_store
+        self.budget = budget
+        self.burst = burst
+        self.wake_replicas = wake_replicas
+        self.idle_timeout = idle_timeout
+        self.shadows = shadows or []
+        self.idle_since: float | None = None
+        self.woken_at: tuple[float, int] | None = None
+        self.last_metric: float | None = None
+        self.convergence_timeout = convergence_timeout
+        self.clock = clock
         self.last_scale_time: float | None = None
+        self.last_direction: str | None = None
+        self.pending_action: ScaleAction | None = None
+        self.last_replicas: int | None = None
+        self.status: dict = {
+            "service_name": service_monitor.service_name,
+            "queue_name": queue_name,
+            "policy": self.policy.name,
+        }
         self.labels = {
             "service_name": service_monitor.service_name,
         }
 
-    def scale(self):
+    def restore(self, entries: list[dict]) -> None:
+        for entry in entries:
+            if entry["kind"] == "sample":
+                self.policy.observe(load_sample(entry))
+                self.behavior.recommendations.append((entry["t"], entry["rec"]))
+            elif entry["kind"] == "action":
+                action = ScaleAction(**entry["action"])
+                self.last_scale_time = action.started_at
+                self.last_direction = action.direction
+                self.pending_action = None
+                if action.deadline > self.clock():
+                    self.pending_action = action
+
+    def read_metric(self) -> tuple[float, bool]:
+        try:
+            self.last_metric = self.metric_source.get_value()
+        except Exception as e:
+            if self.last_metric is None:
+                raise
+            logging.warning(f"Holding last known metric value: {e}")
+            return self.last_metric, True
+        METRIC_VALUE.labels(**self.labels).set(self.last_metric)
+        return self.last_metric, False
+
+    def get_min_replicas(self, now: float) -> int:
+        if self.schedule is not None and self.schedule.is_warm(now):
+            return max(self.min_replicas, min(self.max_replicas, self.prewarm_replicas))
+        return self.min_replicas
+
+    def clamp(self, replicas: float, min_replicas: int) -> float:
+        return min(self.max_replicas, max(min_replicas, replicas))
+
+    def fit_capacity(self, current_replicas: int, desired_replicas: int) -> int:
+        unschedulable = 0
+        # Nodes are only inspected while some of the desired replicas are not
+        # running yet
+        if desired_replicas > self.service_monitor.get_running_tasks():
+            placeable = self.capacity.placeable_replicas(self.service_monitor.service)
+            if placeable is not None:
+                unschedulable = max(0, desired_replicas - placeable)
+                if desired_replicas > current_replicas:
+                    desired_replicas = max(
+                        current_replicas, min(desired_replicas, placeable)
+                    )
+        UNSCHEDULABLE_REPLICAS.labels(**self.labels).set(unschedulable)
+        return desired_replicas
+
+    def reap(
+        self,
+        now: float,
+        queue: QueueSnapshot,
+        current_replicas: int,
+        desired_replicas: int,
+        min_replicas: int,
+    ) -> int:
+        # A judge working on a submission keeps the service busy, even when
+        # nothing is waiting in the queue
+        if queue.messages > 0 or queue.messages_unacknowledged > 0:
+            self.idle_since = None
+            return max(desired_replicas, min(1, current_replicas))
+        if self.idle_since is None:
+            self.idle_since = now
+        # The last replica is only reaped once the queue stayed empty for the
+        # whole idle timeout
+        if now - self.idle_since < self.idle_timeout:
+            if desired_replicas == 0 and current_replicas > 0:
+                return 1
+            return desired_replicas
+        # An idle judge still holds its heap and burns some CPU, which would
+        # keep a utilisation target above zero forever. Once the queue stayed
+        # empty for the whole idle timeout it overrides the policy.
+        if self.idle_timeout > 0:
+            return min_replicas
+        return desired_replicas
+
+    def track_first_verdict(self, sample: Sample) -> None:
+        if self.woken_at is None:
+            if sample.replicas == 0 and sample.messages > 0:
+                self.woken_at = (sample.timestamp, sample.queue.acks)
+            return
+        started_at, acks = self.woken_at
+        # A delivery only moves the submission to unacked, its verdict acks
+        # it. Observed at the resolution of the scaling ticks.
+        if sample.queue.acks > acks or sample.queue.ack_rate > 0:
+            FIRST_VERDICT_AFTER_IDLE.labels(**self.labels).observe(
+                sample.timestamp - started_at
+            )
+            self.woken_at = None
+
+    def start_action(self, now: float, direction: str, replicas: int) -> None:
+        self.last_scale_time = now
+        self.last_direction = direction
+        self.pending_action = ScaleAction(
+            direction=direction,
+            replicas=replicas,
+            started_at=now,
+            deadline=now + self.convergence_timeout,
+        )
+        if self.state_store is not None:
+            self.state_store.record_action(
+                self.service_monitor.service_name,
+                dataclasses.asdict(self.pending_action),
+            )
+
+    def is_converging(self, now: float) -> bool:
+        action = self.pending_action
+        if action is None:
+            return False
+
+        running_tasks = self.service_monitor.get_running_tasks()
+        if running_tasks == action.replicas:
+            SCALE_LATENCY.labels(**self.labels, direction=action.direction).observe(
+                now - action.started_at
+            )
+            self.pending_action = None
+            return False
+        if now >= action.deadline:
+            logging.warning(
+                f"Service {self.service_monitor.service_name} did not converge to "
+                f"{action.replicas} replicas, {running_tasks} tasks are running"
+            )
+            CONVERGENCE_TIMEOUT_COUNT.labels(
+                **self.labels, direction=action.direction
+            ).inc()
+            self.pending_action = None
+            return False
+        return True
+
+    def is_cooling_down(self, now: float, direction: str) -> bool:
+        # Cooldown only protects against flapping, moving further in the
+        # same direction is allowed as soon as the last action converged
+        return (
+            self.last_scale_time is not None
+            and self.last_direction != direction
+            and now - self.last_scale_time < self.cooldown
+        )
+
+    def apply(self, current_replicas: int, desired_replicas: int) -> int:
+        if desired_replicas < current_replicas and self.drainer is not None:
+            return self.drainer.scale_in(
+                self.service_monitor,
+                self.queue_name,
+                current_replicas,
+                desired_replicas,
+            )
+        self.service_monitor.scale(desired_replicas)
+        return desired_replicas
+
+    def reclaim(self, replicas: int) -> int:
+        # Called by the replica budget from the tick of another pool
+        current_replicas = self.service_monitor.get_current_replicas()
+        if replicas >= current_replicas:
+            return current_replicas
+        logging.info(
+            f"Scaling down service {self.service_monitor.service_name} "
+            f"from {current_replicas} to {replicas} replicas to return borrowed "
+            f"replicas"
+        )
+        replicas = self.apply(current_replicas, replicas)
+        if replicas != current_replicas:
+            SCALING_COUNT.labels(**self.labels, direction="reclaim").inc()
+            self.start_action(self.clock(), "down", replicas)
+            self.last_replicas = replicas
+        return replicas
+
+    def scale(
+        self,
+        queue: QueueSnapshot | None = None,
+        dry_run: bool = False,
+        latest: QueueSnapshot | None = None,
+    ):
         try:
-            messages = self.queue_monitor.get_number_of_messages()
+            if queue is None and self.queue_name:
+                queue = self.queue_monitor.get_snapshot(self.queue_name)
+            elif queue is None:
+                # Services scaled on a metric source only have no queue
+                queue = QueueSnapshot(messages=0)
+            messages = queue.messages
             current_replicas = self.service_monitor.get_current_replicas()
+            now = self.clock()
 
-            desired_replicas = (
-                math.ceil(messages / self.messages_per_replica)
-                if self.messages_per_replica > 0
-                else 0
+            # Followers take the actions of the leader from the replicas it
+            # set, so a failover keeps its cooldown and convergence tracking
+            if (
+                dry_run
+                and self.last_replicas is not None
+                and current_replicas != self.last_replicas
+            ):
+                direction = "up" if current_replicas > self.last_replicas else "down"
+                self.start_action(now, direction, current_replicas)
+            self.last_replicas = current_replicas
+
+            # Missing signals are never read as a reason to scale down
+            is_degraded = False
+            utilisation = None
+            if self.utilisation_monitor is not None:
+                utilisation = self.utilisation_monitor.get_utilisation()
+                is_degraded = utilisation is None
+            if utilisation is not None:
+                UTILISATION.labels(**self.labels, resource="cpu").set(utilisation.cpu)
+                UTILISATION.labels(**self.labels, resource="memory").set(
+                    utilisation.memory
+                )
+
+            # A held metric value is too old to act on in either direction
+            metric = None
+            is_stale = False
+            if self.metric_source is not None:
+                metric, is_stale = self.read_metric()
+
+            sample = Sample(
+                timestamp=now,
+                replicas=current_replicas,
+                queue=queue,
+                utilisation=utilisation,
+                metric=metric,
             )
-            desired_replicas = max(self.min_replicas, desired_replicas)
-            desired_replicas = min(self.max_replicas, desired_replicas)
+            min_replicas = self.get_min_replicas(now)
+            self.policy.observe(sample)
+            for shadow in self.shadows:
+                shadow.evaluate(sample, min_replicas)
+            desired_replicas = self.clamp(
+                self.behavior.apply(
+                    now,
+                    current_replicas,
+                    self.clamp(self.policy.desired(sample), min_replicas),
+                ),
+                min_replicas,
+            )
+            # A burst skips the stabilization and step limits of the behavior
+            is_burst = False
+            if self.burst is not None:
+                burst_target = self.burst.target(
+                    self.service_monitor.service_name, sample, latest
+                )
+                if burst_target is not None:
+                    burst_replicas = self.clamp(burst_target, min_replicas)
+                    if burst_replicas > desired_replicas:
+                        desired_replicas = burst_replicas
+                        is_burst = True
+            # The first message at zero replicas wakes the service right away
+            is_wake = current_replicas == 0 and messages > 0
+            if is_wake and self.wake_replicas > 0:
+                desired_replicas = max(
+                    desired_replicas, self.clamp(self.wake_replicas, min_replicas)
+                )
+            desired_replicas = self.reap(
+                now, queue, current_replicas, desired_replicas, min_replicas
+            )
+            self.track_first_verdict(sample)
+            if self.budget is not None:
+                desired_replicas = self.budget.fit(
+                    self.service_monitor.service_name,
+                    current_replicas,
+                    desired_replicas,
+                    reclaim=not dry_run,
+                )
+            if self.capacity is not None:
+                desired_replicas = self.fit_capacity(current_replicas, desired_replicas)
+            if self.state_store is not None:
+                self.state_store.record_sample(
+                    self.service_monitor.service_name,
+                    sample,
+                    self.behavior.recommendations[-1][1],
+                )
 
             CURRENT_REPLICAS.labels(**self.labels).set(current_replicas)
+            HEAD_MESSAGE_AGE.labels(**self.labels).set(sample.head_message_age)
+            MIN_REPLICAS.labels(**self.labels).set(min_replicas)
             DESIRED_REPLICAS.labels(**self.labels).set(desired_replicas)
 
-            is_cooling_down = self.last_scale_time is not None and (
-                time.time() - self.last_scale_time < self.cooldown
+            direction = "up" if desired_replicas > current_replicas else "down"
+            is_burst = is_burst and direction == "up"
+            is_wake = is_wake and direction == "up"
+            is_converging = self.is_converging(now)
+            is_cooling_down = self.is_cooling_down(now, direction)
+            is_held = desired_replicas != current_replicas and (
+                is_stale or (is_degraded and desired_replicas < current_replicas)
             )
             logging.info(
                 f"Messages: {messages}, "
                 f"Current replicas: {current_replicas}, "
                 f"Desired replicas: {desired_replicas}, "
-                f"Cooling down: {is_cooling_down}"
+                f"Converging: {is_converging}, "
+                f"Cooling down: {is_cooling_down}, "
+                f"Held: {is_held}, "
+                f"Burst: {is_burst}, "
+                f"Wake: {is_wake}"
             )
-            if desired_replicas != current_replicas and not is_cooling_down:
-                direction = "up" if desired_replicas > current_replicas else "down"
+            if is_held:
+                HELD_COUNT.labels(**self.labels).inc()
+            action = None
+            # Followers only observe, to keep their history warm for a failover.
+            # A burst or a wake scales out right away, even against the
+            # cooldown of a recent scale-in or while it is still converging.
+            if (
+                desired_replicas != current_replicas
+                and (is_burst or is_wake or (not is_converging and not is_cooling_down))
+                and not is_held
+                and not dry_run
+            ):
                 logging.info(
                     f"Scaling {direction} service {self.service_monitor.service_name} "
                     f"from {current_replicas} to {desired_replicas} replicas"
                 )
-                self.service_monitor.scale(desired_replicas)
-                SCALING_COUNT.labels(**self.labels, direction=direction).inc()
-                self.last_scale_time = time.time()
+                replicas = self.apply(current_replicas, desired_replicas)
+                if replicas != current_replicas:
+                    action = direction
+                    if is_wake:
+                        action = "wake"
+                    elif is_burst:
+                        action = "burst"
+                    SCALING_COUNT.labels(**self.labels, direction=action).inc()
+                    self.start_action(now, direction, replicas)
+                    self.last_replicas = replicas
+
+            self.status = {
+                **self.status,
+                "timestamp": now,
+                "messages": messages,
+                "head_message_age": sample.head_message_age,
+                "current_replicas": current_replicas,
+                "desired_replicas": desired_replicas,
+                "min_replicas": min_replicas,
+                "max_replicas": self.max_replicas,
+                "converging": is_converging,
+                "cooling_down": is_cooling_down,
+                "held": is_held,
+                "burst": is_burst,
+                "wake": is_wake,
+                "action": action,
+                "last_scale_time": self.last_scale_time,
+            }
+            if self.recorder is not None:
+                self.recorder.record(
+                    self.service_monitor.service_name, sample, desired_replicas, action
+                )
+        except CircuitOpenError as e:
+            logging.warning(f"Holding service {self.service_monitor.service_name}: {e}")
+            HELD_COUNT.labels(**self.labels).inc()
+        except LeaseLostError as e:
+            logging.warning(
+                f"Not scaling service {self.service_monitor.service_name}: {e}"
+            )
         except Exception as e:
             logging.error(f"Error scaling: {e}")
             FAIL_COUNT.labels(**self.labels).inc()
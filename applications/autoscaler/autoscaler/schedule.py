@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from prometheus_client import Gauge
+
+from autoscaler.api_client import ApiClient
+
+PREWARM_WINDOWS = Gauge(
+    "autoscaler_prewarm_windows", "Number of upcoming or active pre-warm windows"
+)
+
+
+@dataclass(frozen=True)
+class PrewarmWindow:
+    contest_id: str
+    start: float
+    end: float
+
+    def contains(self, now: float) -> bool:
+        return self.start <= now < self.end
+
+
+def parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+class ContestSchedule:
+    def __init__(
+        self,
+        api_client: ApiClient,
+        lead_time: float = 300,
+        start_duration: float = 600,
+        end_rush: float = 1800,
+        refresh_interval: float = 60,
+    ):
+        self.api_client = api_client
+        self.lead_time = lead_time
+        self.start_duration = start_duration
+        self.end_rush = end_rush
+        self.refresh_interval = refresh_interval
+        self.windows: list[PrewarmWindow] = []
+        self.last_refresh: float | None = None
+        self.lock = threading.Lock()
+
+    def windows_for(self, contest: dict) -> list[PrewarmWindow]:
+        start = parse_timestamp(contest["startAt"])
+        end = parse_timestamp(contest["endAt"])
+        # Judges are started ahead of the opening burst and of the end rush,
+        # and released once the contest is over
+        return [
+            PrewarmWindow(
+                contest_id=contest["id"],
+                start=start - self.lead_time,
+                end=min(end, start + self.start_duration),
+            ),
+            PrewarmWindow(
+                contest_id=contest["id"],
+                start=max(start, end - self.end_rush) - self.lead_time,
+                end=end,
+            ),
+        ]
+
+    def is_stale(self) -> bool:
+        return (
+            self.last_refresh is None
+            or time.monotonic() - self.last_refresh >= self.refresh_interval
+        )
+
+    def refresh(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        windows = [
+            window
+            for contest in self.api_client.find_contest_schedule()
+            for window in self.windows_for(contest)
+            if window.end > now
+        ]
+        with self.lock:
+            self.windows = windows
+            self.last_refresh = time.monotonic()
+        PREWARM_WINDOWS.set(len(windows))
+        logging.info(f"Loaded {len(windows)} pre-warm window(s)")
+
+    def is_warm(self, now: float) -> bool:
+        with self.lock:
+            return any(window.contains(now) for window in self.windows)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from prometheus_client import Counter, Histogram
+
+TICK_DURATION = Histogram(
+    "autoscaler_tick_duration_seconds", "Duration of the scaling ticks"
+)
+SKIPPED_TICKS = Counter(
+    "autoscaler_skipped_ticks",
+    "Number of ticks skipped because the previous one was still running",
+)
+OVERRUN_TICKS = Counter(
+    "autoscaler_overrun_ticks", "Number of ticks that exceeded their timeout"
+)
+SAMPLING_TICK_DURATION = Histogram(
+    "autoscaler_sampling_tick_duration_seconds", "Duration of the sampling ticks"
+)
+SAMPLING_SKIPPED_TICKS = Counter(
+    "autoscaler_sampling_skipped_ticks",
+    "Number of sampling ticks skipped because the previous one was still running",
+)
+SAMPLING_OVERRUN_TICKS = Counter(
+    "autoscaler_sampling_overrun_ticks",
+    "Number of sampling ticks that exceeded their timeout",
+)
+
+
+@dataclass(frozen=True)
+class LoopMetrics:
+    duration: Histogram
+    skipped: Counter
+    overrun: Counter
+
+
+# The scaling loop keeps the series it had before the sampling loop existed
+LOOP_METRICS = {
+    "scaling": LoopMetrics(TICK_DURATION, SKIPPED_TICKS, OVERRUN_TICKS),
+    "sampling": LoopMetrics(
+        SAMPLING_TICK_DURATION, SAMPLING_SKIPPED_TICKS, SAMPLING_OVERRUN_TICKS
+    ),
+}
+
+
+class Scheduler:
+    def __init__(
+        self,
+        tick: Callable[[], None],
+        interval: float,
+        timeout: float,
+        jitter: float = 0,
+        name: str = "scaling",
+    ):
+        self.tick = tick
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.name = name
+        self.metrics = LOOP_METRICS[name]
+        # A single worker guarantees that two ticks never scale concurrently,
+        # even when a timed out tick is still blocked on a dependency.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.in_flight: asyncio.Future | None = None
+        # The event loop only keeps weak references to its tasks
+        self.watchers: set[asyncio.Task] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def wake(self) -> None:
+        # Runs a tick right away, safe to call from the other loops' threads
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.trigger)
+
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        while not self.stopping.is_set():
+            self.trigger()
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=self.delay())
+            except asyncio.TimeoutError:
+                pass
+        if self.in_flight is not None:
+            await asyncio.wait([self.in_flight], timeout=self.timeout)
+        self.executor.shutdown(wait=False)
+
+    def delay(self) -> float:
+        return max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def trigger(self) -> asyncio.Task | None:
+        if self.in_flight is not None and not self.in_flight.done():
+            logging.warning(
+                f"Previous {self.name} tick is still running, skipping this one"
+            )
+            self.metrics.skipped.inc()
+            return None
+        loop = asyncio.get_running_loop()
+        self.in_flight = loop.run_in_executor(self.executor, self.tick)
+        task = asyncio.create_task(self.watch(self.in_flight))
+        self.watchers.add(task)
+        task.add_done_callback(self.watchers.discard)
+        return task
+
+    async def watch(self, future: asyncio.Future) -> None:
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"{self.name.capitalize()} tick exceeded its timeout of {self.timeout}s"
+            )
+            self.metrics.overrun.inc()
+            await asyncio.wait([future])
+        except Exception as e:
+            logging.error(f"{self.name.capitalize()} tick failed: {e}")
+        self.metrics.duration.observe(time.monotonic() - start)
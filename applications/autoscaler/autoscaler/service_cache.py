@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from docker import DockerClient
+from docker.errors import NotFound
+from docker.models.services import Service
+from prometheus_client import Counter
+
+from autoscaler.breaker import CircuitBreaker
+
+SERVICE_EVENTS = Counter(
+    "autoscaler_service_events", "Number of Docker events received", ["type"]
+)
+SERVICE_RESYNCS = Counter(
+    "autoscaler_service_resyncs", "Number of full service state resyncs"
+)
+
+NAMESPACE_LABEL = "com.docker.stack.namespace"
+SERVICE_NAME_LABEL = "com.docker.swarm.service.name"
+TASK_EVENTS = {"start", "die", "stop", "kill", "destroy", "oom"}
+
+
+def docker_breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker("docker", ignored=(NotFound,), **kwargs)
+
+
+@dataclass(frozen=True)
+class ServiceState:
+    service: Service
+    replicas: int
+    running_tasks: int
+    version: int
+
+    @classmethod
+    def from_service(cls, service: Service, running_tasks: int) -> "ServiceState":
+        return cls(
+            service=service,
+            replicas=service.attrs["Spec"]["Mode"]["Replicated"]["Replicas"],
+            running_tasks=running_tasks,
+            version=service.attrs["Version"]["Index"],
+        )
+
+
+class ServiceStateCache:
+    def __init__(
+        self,
+        docker_client: DockerClient,
+        namespace: str,
+        resync_interval: float = 60,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.docker_client = docker_client
+        self.namespace = namespace
+        self.resync_interval = resync_interval
+        self.breaker = breaker or docker_breaker()
+        self.states: dict[str, ServiceState] = {}
+        self.last_resync: float | None = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.stream = None
+
+    def get(self, service_name: str) -> ServiceState | None:
+        with self.lock:
+            return self.states.get(service_name)
+
+    def is_stale(self) -> bool:
+        return (
+            self.last_resync is None
+            or time.monotonic() - self.last_resync >= self.resync_interval
+        )
+
+    def count_running_tasks(self, service_id: str | None = None) -> dict[str, int]:
+        filters = {"desired-state": "running"}
+        if service_id is not None:
+            filters["service"] = service_id
+        counts: dict[str, int] = {}
+        for task in self.breaker.call(self.docker_client.api.tasks, filters=filters):
+            if task["Status"]["State"] == "running":
+                counts[task["ServiceID"]] = counts.get(task["ServiceID"], 0) + 1
+        return counts
+
+    def resync(self) -> None:
+        services = self.breaker.call(
+            self.docker_client.services.list,
+            filters={"label": f"{NAMESPACE_LABEL}={self.namespace}"},
+        )
+        counts = self.count_running_tasks()
+        states = {
+            service.name: ServiceState.from_service(service, counts.get(service.id, 0))
+            for service in services
+        }
+        with self.lock:
+            self.states = states
+            self.last_resync = time.monotonic()
+        SERVICE_RESYNCS.inc()
+
+    def refresh(self, service_name: str) -> None:
+        service = self.breaker.call(self.docker_client.services.get, service_name)
+        labels = service.attrs["Spec"].get("Labels") or {}
+        if labels.get(NAMESPACE_LABEL) != self.namespace:
+            return
+        counts = self.count_running_tasks(service.id)
+        state = ServiceState.from_service(service, counts.get(service.id, 0))
+        with self.lock:
+            self.states[service_name] = state
+
+    def handle_event(self, event: dict) -> None:
+        event_type = event.get("Type")
+        action = event.get("Action")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        SERVICE_EVENTS.labels(type=event_type).inc()
+
+        if event_type == "service":
+            service_name = attributes.get("name")
+        elif event_type == "container" and action in TASK_EVENTS:
+            service_name = attributes.get(SERVICE_NAME_LABEL)
+        else:
+            return
+        if service_name is None:
+            return
+
+        if action == "remove":
+            with self.lock:
+                self.states.pop(service_name, None)
+            return
+        with self.lock:
+            is_tracked = service_name in self.states
+        if is_tracked or event_type == "service":
+            self.refresh(service_name)
+
+    def watch(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                # Events received while disconnected are lost, so start over
+                # from a full picture of the stack
+                self.resync()
+                self.stream = self.docker_client.events(
+                    decode=True, filters={"type": ["service", "container"]}
+                )
+                for event in self.stream:
+                    try:
+                        self.handle_event(event)
+                    except Exception as e:
+                        logging.error(f"Error handling Docker event: {e}")
+            except Exception as e:
+                logging.error(f"Docker event stream failed: {e}")
+            self.stopping.wait(self.resync_interval / 10)
+
+    def start(self) -> None:
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        if self.stream is not None:
+            self.stream.close()
@@ -1,17 +1,70 @@
+from typing import Callable
+
 from docker import DockerClient
+from docker.models.services import Service
+
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.leader import LeaseLostError
+from autoscaler.service_cache import ServiceState, docker_breaker
 
 
 class ServiceMonitor:
-    def __init__(self, docker_client: DockerClient, service_name: str):
+    def __init__(
+        self,
+        docker_client: DockerClient,
+        service_name: str,
+        breaker: CircuitBreaker | None = None,
+        lease: Callable[[], bool] | None = None,
+    ):
         self.docker_client = docker_client
         self.service_name = service_name
+        self.breaker = breaker or docker_breaker()
+        self.lease = lease
+        self.state: ServiceState | None = None
+        # Spec version the service was last scaled from, the cached states up
+        # to it do not include that scaling yet
+        self.scaled_version: int | None = None
 
     @property
-    def service(self):
-        return self.docker_client.services.get(self.service_name)
+    def service(self) -> Service:
+        if self.state is not None:
+            return self.state.service
+        return self.breaker.call(self.docker_client.services.get, self.service_name)
+
+    def update(self, state: ServiceState) -> None:
+        # A pool reclaimed by the replica budget is scaled in the middle of the
+        # tick, after the cache was read, so it is inspected until the cache
+        # catches up
+        if self.scaled_version is not None and state.version <= self.scaled_version:
+            self.state = None
+            return
+        self.state = state
+        self.scaled_version = None
 
     def get_current_replicas(self) -> int:
+        if self.state is not None:
+            return self.state.replicas
         return self.service.attrs["Spec"]["Mode"]["Replicated"]["Replicas"]
 
+    def get_tasks(self) -> list[dict]:
+        tasks = self.breaker.call(
+            self.service.tasks, filters={"desired-state": "running"}
+        )
+        return [task for task in tasks if task["Status"]["State"] == "running"]
+
+    def get_running_tasks(self) -> int:
+        if self.state is not None:
+            return self.state.running_tasks
+        return len(self.get_tasks())
+
     def scale(self, replicas) -> None:
-        self.service.scale(replicas)
+        if self.lease is not None and not self.lease():
+            raise LeaseLostError("The scaling lease expired during the tick")
+        service = self.service
+        self.breaker.call(service.scale, replicas)
+        # The cached spec version is stale once the service is updated
+        if self.state is not None:
+            self.scaled_version = self.state.version
+        else:
+            self.scaled_version = service.attrs["Version"]["Index"]
+        self.state = None
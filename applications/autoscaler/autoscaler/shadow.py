@@ -0,0 +1,98 @@
+import logging
+
+from prometheus_client import Gauge
+
+from autoscaler.policy import Policy, Sample
+
+SHADOW_DESIRED_REPLICAS = Gauge(
+    "autoscaler_shadow_desired_replicas",
+    "Replicas a shadow policy would have asked for",
+    ["service_name", "policy"],
+)
+SHADOW_QUEUE_WAIT = Gauge(
+    "autoscaler_shadow_queue_wait_seconds",
+    "Queue wait simulated for the replicas of a shadow policy",
+    ["service_name", "policy"],
+)
+
+
+class ShadowPolicy:
+    # Evaluated on the same samples as the active policy, it only ever
+    # reports what it would have done and has no way to scale the service
+    def __init__(
+        self,
+        service_name: str,
+        policy: Policy,
+        min_replicas: int,
+        max_replicas: int,
+        per_replica_ack_rate: float,
+        cold_start: float,
+    ):
+        self.policy = policy
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.per_replica_ack_rate = per_replica_ack_rate
+        self.cold_start = cold_start
+        self.labels = {"service_name": service_name, "policy": policy.name}
+        self.previous: Sample | None = None
+        self.backlog = 0.0
+        # Time at which each of the simulated replicas is ready
+        self.replicas: list[float] = []
+
+    def scale_to(self, now: float, replicas: int) -> None:
+        if replicas < len(self.replicas):
+            # Starting replicas are removed first
+            self.replicas = sorted(self.replicas)[:replicas]
+        while len(self.replicas) < replicas:
+            self.replicas.append(now + self.cold_start)
+
+    def simulate(self, sample: Sample) -> float:
+        previous, self.previous = self.previous, sample
+        if previous is None:
+            self.backlog = float(sample.messages)
+            self.replicas = [sample.timestamp] * sample.replicas
+            return 0.0
+        elapsed = max(0.0, sample.timestamp - previous.timestamp)
+        # Arrivals are what was published, or what the real replicas drained
+        # plus the growth of the real queue when rates are not available
+        if sample.queue.publish_rate > 0:
+            arrivals = sample.queue.publish_rate * elapsed
+        else:
+            drained = previous.replicas * self.per_replica_ack_rate * elapsed
+            arrivals = max(0.0, sample.messages - previous.messages + drained)
+        ready = sum(1 for ready_at in self.replicas if ready_at <= sample.timestamp)
+        capacity = ready * self.per_replica_ack_rate
+        self.backlog = max(0.0, self.backlog + arrivals - capacity * elapsed)
+        if self.backlog == 0:
+            return 0.0
+        if capacity > 0:
+            return self.backlog / capacity
+        if self.per_replica_ack_rate <= 0:
+            return 0.0
+        # Nothing is drained until the first simulated replica is ready
+        first_ready = min(self.replicas, default=sample.timestamp + self.cold_start)
+        return (
+            max(0.0, first_ready - sample.timestamp)
+            + self.backlog / self.per_replica_ack_rate
+        )
+
+    def evaluate(self, sample: Sample, min_replicas: int | None = None) -> int | None:
+        # The scaler passes its current floor, raised while a contest is
+        # pre-warmed
+        if min_replicas is None:
+            min_replicas = self.min_replicas
+        try:
+            self.policy.observe(sample)
+            desired_replicas = min(
+                self.max_replicas,
+                max(min_replicas, self.policy.recommend(sample)),
+            )
+            queue_wait = self.simulate(sample)
+            self.scale_to(sample.timestamp, desired_replicas)
+        except Exception as e:
+            # A broken shadow never gets in the way of the active policy
+            logging.warning(f"Error evaluating shadow policy {self.policy.name}: {e}")
+            return None
+        SHADOW_DESIRED_REPLICAS.labels(**self.labels).set(desired_replicas)
+        SHADOW_QUEUE_WAIT.labels(**self.labels).set(queue_wait)
+        return desired_replicas
@@ -0,0 +1,294 @@
+import argparse
+import dataclasses
+import logging
+import math
+import random
+from collections import deque
+from dataclasses import dataclass
+
+from autoscaler.config import ScalerConfig, build_scaler, load_configs
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.trace import read_trace
+
+
+@dataclass
+class Replica:
+    ready_at: float
+    busy_until: float = 0.0
+
+
+@dataclass(frozen=True)
+class Report:
+    name: str
+    p50_wait: float
+    p95_wait: float
+    p99_wait: float
+    max_wait: float
+    replica_seconds: float
+    scale_actions: int
+    messages: int
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(len(ordered) * percent / 100) - 1)
+    return ordered[index]
+
+
+def trace_arrivals(path: str, service_name: str | None = None) -> list[float]:
+    # The trace only holds the publish rate at every tick, arrivals are spread
+    # evenly between ticks
+    arrivals: list[float] = []
+    entries = list(read_trace(path, service_name))
+    if not entries:
+        return arrivals
+    start = entries[0]["t"]
+    carry = 0.0
+    for previous, entry in zip(entries, entries[1:]):
+        dt = entry["t"] - previous["t"]
+        expected = entry["p"] * dt + carry
+        count = int(expected)
+        carry = expected - count
+        for i in range(count):
+            arrivals.append(previous["t"] - start + dt * (i + 1) / (count + 1))
+    return arrivals
+
+
+def contest_arrivals(
+    duration: float,
+    base_rate: float,
+    peak_rate: float,
+    burst: float,
+    rng: random.Random,
+) -> list[float]:
+    # Poisson arrivals by thinning, with a burst right after the start and a
+    # rush ramping up over the last minutes of the contest
+    def rate(t: float) -> float:
+        if t < burst:
+            return base_rate + (peak_rate - base_rate) * (1 - t / burst)
+        if t > duration - burst:
+            return base_rate + (peak_rate - base_rate) * (t - duration + burst) / burst
+        return base_rate
+
+    arrivals = []
+    t = 0.0
+    max_rate = max(base_rate, peak_rate)
+    if max_rate <= 0:
+        return arrivals
+    while True:
+        t += rng.expovariate(max_rate)
+        if t >= duration:
+            return arrivals
+        if rng.random() * max_rate <= rate(t):
+            arrivals.append(t)
+
+
+class SimulatedService:
+    def __init__(self, name: str, replicas: int, cold_start: float):
+        self.service_name = name
+        self.cold_start = cold_start
+        self.now = 0.0
+        self.replicas = [Replica(ready_at=0.0) for _ in range(replicas)]
+        self.scale_actions = 0
+
+    def get_current_replicas(self) -> int:
+        return len(self.replicas)
+
+    def get_running_tasks(self) -> int:
+        return sum(1 for replica in self.replicas if replica.ready_at <= self.now)
+
+    def scale(self, replicas: int) -> None:
+        self.scale_actions += 1
+        while len(self.replicas) < replicas:
+            self.replicas.append(Replica(ready_at=self.now + self.cold_start))
+        # Starting and idle replicas go first, a removed busy replica still
+        # finishes its submission
+        self.replicas.sort(key=lambda r: (r.ready_at <= self.now, r.busy_until))
+        del self.replicas[: len(self.replicas) - replicas]
+
+
+def simulated_config(config: ScalerConfig) -> ScalerConfig:
+    # Removed replicas always finish their submission in the simulation
+    config = dataclasses.replace(config, graceful_scale_in=False)
+    # Neither the CPU of the sandboxes nor the metric are in the trace
+    if config.target_utilisation > 0:
+        logging.warning(
+            f"Policy {config.name} scales on utilisation, which is not simulated"
+        )
+        config = dataclasses.replace(config, target_utilisation=0)
+    if config.metric_query:
+        logging.warning(
+            f"Policy {config.name} scales on a metric, which is not simulated"
+        )
+        config = dataclasses.replace(config, metric_query="")
+    if config.policy == "metric":
+        config = dataclasses.replace(config, policy="depth")
+    return config
+
+
+class Simulator:
+    def __init__(
+        self,
+        config: ScalerConfig,
+        arrivals: list[float],
+        service_time: float,
+        cold_start: float,
+        interval: float,
+        step: float = 0.5,
+        seed: int = 0,
+    ):
+        self.config = config
+        self.arrivals = arrivals
+        self.service_time = service_time
+        self.interval = interval
+        self.step = step
+        self.rng = random.Random(seed)
+        self.service = SimulatedService(config.name, config.min_replicas, cold_start)
+        self.scaler = build_scaler(
+            simulated_config(config),
+            queue_monitor=None,
+            service_monitor=self.service,
+            clock=lambda: self.service.now,
+        )
+
+    def run(self) -> Report:
+        pending = deque(sorted(self.arrivals))
+        queue: deque[float] = deque()
+        waits: list[float] = []
+        in_flight: list[float] = []
+        published: deque[float] = deque()
+        acked: deque[float] = deque()
+        replica_seconds = 0.0
+        next_tick = 0.0
+        end = (pending[-1] if pending else 0.0) + self.interval
+
+        t = 0.0
+        while t <= end or queue or in_flight:
+            self.service.now = t
+            while pending and pending[0] <= t:
+                arrival = pending.popleft()
+                queue.append(arrival)
+                published.append(arrival)
+
+            in_flight = [done for done in in_flight if done > t]
+            for replica in self.service.replicas:
+                if replica.busy_until and replica.busy_until <= t:
+                    acked.append(replica.busy_until)
+                    replica.busy_until = 0.0
+                if replica.ready_at <= t and not replica.busy_until and queue:
+                    arrival = queue.popleft()
+                    waits.append(t - arrival)
+                    duration = self.service_time * self.rng.uniform(0.5, 1.5)
+                    replica.busy_until = t + duration
+                    in_flight.append(replica.busy_until)
+
+            if t >= next_tick:
+                self.scaler.scale(queue=self.snapshot(t, queue, published, acked))
+                next_tick += self.interval
+
+            replica_seconds += len(self.service.replicas) * self.step
+            t += self.step
+
+        return Report(
+            name=self.config.name,
+            p50_wait=percentile(waits, 50),
+            p95_wait=percentile(waits, 95),
+            p99_wait=percentile(waits, 99),
+            max_wait=max(waits, default=0.0),
+            replica_seconds=replica_seconds,
+            scale_actions=self.service.scale_actions,
+            messages=len(waits),
+        )
+
+    def snapshot(
+        self,
+        t: float,
+        queue: deque[float],
+        published: deque[float],
+        acked: deque[float],
+    ) -> QueueSnapshot:
+        for window in (published, acked):
+            while window and window[0] <= t - self.interval:
+                window.popleft()
+        busy = sum(1 for replica in self.service.replicas if replica.busy_until > t)
+        return QueueSnapshot(
+            messages=len(queue) + busy,
+            messages_ready=len(queue),
+            messages_unacknowledged=busy,
+            consumers=self.service.get_running_tasks(),
+            publish_rate=len(published) / self.interval,
+            ack_rate=len(acked) / self.interval,
+            head_message_timestamp=queue[0] if queue else None,
+        )
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m autoscaler.simulate",
+        description="Replay a trace or a synthetic contest against scaling policies",
+    )
+    parser.add_argument("--policy-file", help="INI file with one policy per section")
+    parser.add_argument("--trace", help="Trace recorded with TRACE_FILE")
+    parser.add_argument("--service", help="Service to replay from the trace")
+    parser.add_argument("--duration", type=float, default=5 * 3600)
+    parser.add_argument("--base-rate", type=float, default=0.05)
+    parser.add_argument("--peak-rate", type=float, default=1.0)
+    parser.add_argument("--burst", type=float, default=1800)
+    parser.add_argument("--service-time", type=float, default=10)
+    parser.add_argument("--cold-start", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(args)
+
+
+def main(args: list[str] | None = None) -> list[Report]:
+    options = parse_args(args)
+    logging.basicConfig(level=logging.WARNING)
+
+    defaults = ScalerConfig.from_env()
+    if options.policy_file:
+        # Queue and service names are irrelevant when simulating
+        configs = load_configs(options.policy_file, defaults, validate=False)
+    else:
+        configs = [defaults]
+
+    if options.trace:
+        arrivals = trace_arrivals(options.trace, options.service)
+    else:
+        arrivals = contest_arrivals(
+            duration=options.duration,
+            base_rate=options.base_rate,
+            peak_rate=options.peak_rate,
+            burst=options.burst,
+            rng=random.Random(options.seed),
+        )
+
+    reports = [
+        Simulator(
+            config,
+            arrivals=arrivals,
+            service_time=options.service_time,
+            cold_start=options.cold_start,
+            interval=options.interval,
+            seed=options.seed,
+        ).run()
+        for config in configs
+    ]
+
+    print(
+        f"{'policy':<20} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+        f"{'replica-s':>10} {'actions':>8}"
+    )
+    for report in reports:
+        print(
+            f"{report.name:<20} {report.p50_wait:>8.1f} {report.p95_wait:>8.1f} "
+            f"{report.p99_wait:>8.1f} {report.max_wait:>8.1f} "
+            f"{report.replica_seconds:>10.0f} {report.scale_actions:>8}"
+        )
+    return reports
+
+
+if __name__ == "__main__":
+    main()
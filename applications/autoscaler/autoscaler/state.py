@@ -0,0 +1,131 @@
+import dataclasses
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from autoscaler.policy import Sample
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.utilisation import Utilisation
+
+
+def dump_sample(sample: Sample) -> dict:
+    return {
+        "t": sample.timestamp,
+        "r": sample.replicas,
+        "q": dataclasses.asdict(sample.queue),
+        "u": dataclasses.asdict(sample.utilisation) if sample.utilisation else None,
+        "m": sample.metric,
+    }
+
+
+def load_sample(entry: dict) -> Sample:
+    return Sample(
+        timestamp=entry["t"],
+        replicas=entry["r"],
+        queue=QueueSnapshot(**entry["q"]),
+        utilisation=Utilisation(**entry["u"]) if entry.get("u") else None,
+        metric=entry.get("m"),
+    )
+
+
+class StateStore:
+    def __init__(
+        self,
+        path: str,
+        max_age: float = 900,
+        compact_after: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.compact_after = compact_after
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.appended = 0
+        self.file = None
+
+    def read(self) -> list[dict]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        oldest = self.clock() - self.max_age
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written
+                    continue
+                if entry["kind"] == "action" or entry["t"] >= oldest:
+                    entries.append(entry)
+        return entries
+
+    def load(self) -> dict[str, list[dict]]:
+        with self.lock:
+            entries = self.compact()
+        state: dict[str, list[dict]] = {}
+        for entry in entries:
+            state.setdefault(entry["s"], []).append(entry)
+        logging.info(f"Loaded {len(entries)} state entries from {self.path}")
+        return state
+
+    def compact(self) -> list[dict]:
+        # Samples past the window are dropped, only the last action of each
+        # service is kept
+        entries = self.read()
+        last_actions = {
+            entry["s"]: entry for entry in entries if entry["kind"] == "action"
+        }
+        entries = [
+            entry
+            for entry in entries
+            if entry["kind"] != "action" or last_actions[entry["s"]] is entry
+        ]
+        if self.file is not None:
+            self.file.close()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(temporary, self.path)
+        self.file = open(self.path, "a", buffering=1)
+        self.appended = 0
+        return entries
+
+    def append(self, entry: dict) -> None:
+        with self.lock:
+            if self.file is None or self.appended >= self.compact_after:
+                self.compact()
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.appended += 1
+
+    def record_sample(
+        self, service_name: str, sample: Sample, recommendation: int
+    ) -> None:
+        self.append(
+            {
+                "kind": "sample",
+                "s": service_name,
+                **dump_sample(sample),
+                "rec": recommendation,
+            }
+        )
+
+    def record_action(self, service_name: str, action: dict) -> None:
+        self.append(
+            {
+                "kind": "action",
+                "s": service_name,
+                "t": action["started_at"],
+                "action": action,
+            }
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,51 @@
+import json
+import threading
+from typing import Iterator
+
+from autoscaler.policy import Sample
+
+
+class TraceRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", buffering=1)
+
+    def record(
+        self,
+        service_name: str,
+        sample: Sample,
+        desired_replicas: int,
+        action: str | None,
+    ) -> None:
+        queue = sample.queue
+        entry = {
+            "t": round(sample.timestamp, 3),
+            "s": service_name,
+            "m": queue.messages,
+            "r": queue.messages_ready,
+            "u": queue.messages_unacknowledged,
+            "c": queue.consumers,
+            "p": round(queue.publish_rate, 3),
+            "a": round(queue.ack_rate, 3),
+            "h": round(sample.head_message_age, 3),
+            "cr": sample.replicas,
+            "dr": desired_replicas,
+            "x": action,
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read_trace(path: str, service_name: str | None = None) -> Iterator[dict]:
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if service_name is None or entry["s"] == service_name:
+                yield entry
@@ -0,0 +1,65 @@
+import logging
+import math
+from dataclasses import dataclass
+
+from autoscaler.metric_source import PrometheusMetricSource
+
+SERVICE_NAME_LABEL = "container_label_com_docker_swarm_service_name"
+# Set by the autojudge on the sandbox containers it runs the submissions in
+SANDBOX_SERVICE_LABEL = "container_label_com_forsetijudge_sandbox_service"
+
+
+@dataclass(frozen=True)
+class Utilisation:
+    cpu: float
+    memory: float
+
+
+class UtilisationMonitor:
+    # Reads the cAdvisor metrics of the service from Prometheus, whichever
+    # node its tasks run on. The submissions are judged in sibling sandbox
+    # containers of one CPU each, so the CPU is the usage of the sandboxes
+    # over the judging slots of the tasks. The memory is the working set of
+    # the tasks over their limits, mostly the heap of the JVM, and is only
+    # reported.
+    def __init__(
+        self,
+        url: str,
+        service_name: str,
+        max_concurrent_submissions: int = 1,
+        window: str = "1m",
+        timeout: float = 5,
+    ):
+        selector = f'{{{SERVICE_NAME_LABEL}="{service_name}"}}'
+        sandboxes = f'{{{SANDBOX_SERVICE_LABEL}="{service_name}"}}'
+        self.cpu = PrometheusMetricSource(
+            url=url,
+            query=(
+                # No sandbox runs while the judges are idle
+                f"(sum(rate(container_cpu_usage_seconds_total{sandboxes}[{window}]))"
+                f" or vector(0))"
+                f" / (count(container_spec_cpu_quota{selector})"
+                f" * {max(1, max_concurrent_submissions)})"
+            ),
+            timeout=timeout,
+        )
+        self.memory = PrometheusMetricSource(
+            url=url,
+            query=(
+                f"sum(container_memory_working_set_bytes{selector})"
+                f" / sum(container_spec_memory_limit_bytes{selector})"
+            ),
+            timeout=timeout,
+        )
+
+    def get_utilisation(self) -> Utilisation | None:
+        try:
+            cpu = self.cpu.get_values()
+            memory = self.memory.get_values()
+        except Exception as e:
+            logging.warning(f"Could not read the utilisation from Prometheus: {e}")
+            return None
+        # No series until the tasks have been scraped once
+        if not cpu or not memory or not all(map(math.isfinite, cpu + memory)):
+            return None
+        return Utilisation(cpu=cpu[0], memory=memory[0])
@@ -1,8 +1,67 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 
 import docker
 
 
+class FakePrometheus(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakePrometheusHandler)
+        self.results: dict[str, dict] = {}
+        self.queries: list[str] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+class FakePrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query).get("query", [""])[0]
+        self.server.queries.append(query)
+        if url.path == "/-/ready":
+            self.reply(200, {})
+            return
+        if url.path != "/api/v1/query":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if query not in self.server.results:
+            self.reply(400, {"status": "error", "errorType": "bad_data", "error": "parse error"})
+            return
+        result = self.server.results[query]
+        if result is None:
+            self.reply(200, {"status": "error", "error": "query timed out"})
+            return
+        self.reply(200, {"status": "success", "data": result})
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
 @pytest.fixture
 def docker_client():
     yield docker.from_env()
+
+
+@pytest.fixture
+def prometheus():
+    server = FakePrometheus()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,189 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pika.exceptions import AMQPConnectionError, ChannelClosedByBroker
+
+from autoscaler.amqp_monitor import AmqpQueueMonitor
+from autoscaler.breaker import CircuitBreaker, CircuitOpenError
+from autoscaler.queue_monitor import QueueSnapshot
+
+BASE_PATH = "autoscaler.amqp_monitor"
+
+
+def declare_ok(message_count: int, consumer_count: int):
+    return MagicMock(method=MagicMock(message_count=message_count, consumer_count=consumer_count))
+
+
+class TestAmqpQueueMonitor:
+    @pytest.fixture(autouse=True)
+    def requests(self):
+        with patch("autoscaler.queue_monitor.requests") as mock_requests:
+            yield mock_requests
+
+    @pytest.fixture
+    def blocking_connection(self):
+        with patch(f"{BASE_PATH}.pika.BlockingConnection") as mock_connection:
+            mock_connection.return_value.is_closed = False
+            mock_connection.return_value.channel.return_value.is_closed = False
+            yield mock_connection
+
+    @pytest.fixture
+    def channel(self, blocking_connection):
+        yield blocking_connection.return_value.channel.return_value
+
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 1000.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, clock):
+        yield AmqpQueueMonitor(
+            host="rabbitmq",
+            port=15672,
+            vhost="/",
+            username="forseti",
+            password="password",
+            queue_names=["submission-queue"],
+            stats_interval=0,
+            clock=clock,
+        )
+
+    def test_get_snapshots(self, sut, blocking_connection, channel, requests):
+        channel.queue_declare.return_value = declare_ok(7, 2)
+
+        assert sut.get_snapshots() == {"submission-queue": QueueSnapshot(messages=7, messages_ready=7, consumers=2)}
+        parameters = blocking_connection.call_args.args[0]
+        assert parameters.host == "rabbitmq"
+        assert parameters.port == 5672
+        assert parameters.virtual_host == "/"
+        channel.queue_declare.assert_called_once_with(queue="submission-queue", passive=True)
+        requests.Session.return_value.get.assert_not_called()
+
+    def test_reuses_channel(self, sut, blocking_connection, channel):
+        channel.queue_declare.return_value = declare_ok(1, 1)
+
+        sut.get_snapshots()
+        sut.get_snapshots()
+
+        blocking_connection.assert_called_once()
+        blocking_connection.return_value.channel.assert_called_once()
+        assert channel.queue_declare.call_count == 2
+
+    def test_get_snapshot(self, sut, channel):
+        channel.queue_declare.return_value = declare_ok(3, 1)
+
+        assert sut.get_snapshot("submission-queue").messages == 3
+
+    def test_missing_queue(self, sut, blocking_connection, channel):
+        channel.queue_declare.side_effect = ChannelClosedByBroker(404, "NOT_FOUND")
+
+        assert sut.get_snapshots() == {}
+        with pytest.raises(ValueError):
+            sut.get_snapshot("submission-queue")
+        assert sut.probe_breaker.state == "closed"
+        blocking_connection.assert_called_once()
+        assert blocking_connection.return_value.channel.call_count == 2
+
+    def test_channel_closed_by_broker(self, sut, blocking_connection, channel):
+        channel.queue_declare.side_effect = ChannelClosedByBroker(403, "ACCESS_REFUSED")
+
+        with pytest.raises(ChannelClosedByBroker):
+            sut.get_snapshots()
+        assert sut.channel is None
+        assert sut.connection is blocking_connection.return_value
+
+    def test_reconnects_after_connection_error(self, sut, blocking_connection, channel):
+        channel.queue_declare.side_effect = [AMQPConnectionError(), declare_ok(2, 1)]
+
+        with pytest.raises(AMQPConnectionError):
+            sut.get_snapshots()
+        assert sut.connection is None
+        blocking_connection.return_value.close.assert_called_once()
+
+        assert sut.get_snapshots()["submission-queue"].messages == 2
+        assert blocking_connection.call_count == 2
+
+    def test_opens_probe_breaker(self, sut, channel):
+        sut.probe_breaker = CircuitBreaker("amqp", failure_threshold=1)
+        channel.queue_declare.side_effect = AMQPConnectionError()
+
+        with pytest.raises(AMQPConnectionError):
+            sut.get_snapshots()
+        with pytest.raises(CircuitOpenError):
+            sut.get_snapshots()
+
+    def test_merges_management_stats(self, sut, channel, requests, clock):
+        sut.stats_interval = 30
+        requests.Session.return_value.get.return_value.json.return_value = [
+            {
+                "name": "submission-queue",
+                "messages": 4,
+                "messages_ready": 3,
+                "messages_unacknowledged": 1,
+                "consumers": 1,
+                "message_stats": {"publish_details": {"rate": 0.5}},
+                "head_message_timestamp": 990,
+            }
+        ]
+        channel.queue_declare.return_value = declare_ok(6, 2)
+
+        snapshot = sut.get_snapshots()["submission-queue"]
+
+        assert snapshot == QueueSnapshot(
+            messages=7,
+            messages_ready=6,
+            messages_unacknowledged=1,
+            consumers=2,
+            publish_rate=0.5,
+            head_message_timestamp=990,
+        )
+
+    def test_fetches_stats_every_interval(self, sut, channel, requests, clock):
+        sut.stats_interval = 30
+        requests.Session.return_value.get.return_value.json.return_value = []
+        channel.queue_declare.return_value = declare_ok(0, 1)
+
+        sut.get_snapshots()
+        clock.return_value = 1029.0
+        sut.get_snapshots()
+        clock.return_value = 1030.0
+        sut.get_snapshots()
+
+        assert requests.Session.return_value.get.call_count == 2
+
+    def test_keeps_stats_on_management_error(self, sut, channel, requests):
+        sut.stats_interval = 30
+        sut.stats = {"submission-queue": QueueSnapshot(messages=1, messages_unacknowledged=1, publish_rate=0.2)}
+        requests.Session.return_value.get.side_effect = Exception("Management API unavailable")
+        channel.queue_declare.return_value = declare_ok(2, 1)
+
+        snapshot = sut.get_snapshots()["submission-queue"]
+
+        assert snapshot.messages == 3
+        assert snapshot.publish_rate == 0.2
+        assert sut.stats_at == 1000.0
+
+    def test_close(self, sut, blocking_connection, channel):
+        channel.queue_declare.return_value = declare_ok(0, 0)
+        sut.get_snapshots()
+        blocking_connection.return_value.is_open = True
+
+        sut.close()
+
+        blocking_connection.return_value.close.assert_called_once()
+        assert sut.connection is None
+        assert sut.channel is None
+
+    def test_close_error(self, sut, blocking_connection, channel):
+        channel.queue_declare.return_value = declare_ok(0, 0)
+        sut.get_snapshots()
+        blocking_connection.return_value.close.side_effect = Exception("already closed")
+
+        sut.close()
+
+        assert sut.connection is None
+
+    def test_close_without_connection(self, sut):
+        sut.close()
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from autoscaler.api import ApiServer
+from autoscaler.health import HealthCheck
+
+
+class TestApiServer:
+    @pytest.fixture
+    def health(self):
+        health = MagicMock(spec=HealthCheck)
+        health.health.return_value = (True, {"status": "healthy"})
+        health.ready.return_value = (True, {"status": "ready"})
+        health.status.return_value = {"services": []}
+        yield health
+
+    @pytest.fixture
+    def sut(self, health):
+        sut = ApiServer(health=health, port=0, host="127.0.0.1")
+        sut.start()
+        yield sut
+        sut.stop()
+
+    def url(self, sut, path):
+        return f"http://127.0.0.1:{sut.port}{path}"
+
+    def test_health(self, sut):
+        response = requests.get(self.url(sut, "/health"))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"status": "healthy"}
+
+    def test_unhealthy(self, sut, health):
+        health.health.return_value = (False, {"status": "unhealthy"})
+
+        response = requests.get(self.url(sut, "/health"))
+
+        assert response.status_code == 503
+        assert response.json() == {"status": "unhealthy"}
+
+    def test_ready(self, sut, health):
+        assert requests.get(self.url(sut, "/ready")).status_code == 200
+        health.ready.return_value = (False, {"status": "not ready"})
+        assert requests.get(self.url(sut, "/ready")).status_code == 503
+
+    def test_status(self, sut):
+        response = requests.get(self.url(sut, "/status"))
+
+        assert response.status_code == 200
+        assert response.json() == {"services": []}
+
+    def test_metrics(self, sut):
+        response = requests.get(self.url(sut, "/metrics"), headers={"Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "content-encoding" not in response.headers
+        assert "autoscaler_convergence_timeout_count" in response.text
+
+    def test_metrics_with_gzip(self, sut):
+        response = requests.get(self.url(sut, "/metrics"), headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "autoscaler_convergence_timeout_count" in response.text
+
+    def test_head(self, sut):
+        response = requests.head(self.url(sut, "/health"))
+
+        assert response.status_code == 200
+        assert response.content == b""
+
+    def test_not_found(self, sut):
+        assert requests.get(self.url(sut, "/unknown")).status_code == 404
+
+    def test_method_not_allowed(self, sut):
+        assert requests.post(self.url(sut, "/health"), json={}).status_code == 405
+        assert requests.post(self.url(sut, "/metrics"), json={}).status_code == 405
+
+    def test_internal_error(self, sut, health):
+        health.status.side_effect = Exception("boom")
+
+        assert requests.get(self.url(sut, "/status")).status_code == 500
+
+    def test_concurrent_scrapes(self, sut):
+        paths = ["/metrics", "/health"] * 50
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            responses = list(executor.map(lambda path: requests.get(self.url(sut, path)), paths))
+
+        assert all(response.status_code == 200 for response in responses)
+
+    def test_stop_without_start(self, health):
+        ApiServer(health=health, port=0).stop()
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+import pytest
+
+from autoscaler.api_client import ApiClient
+
+BASE_PATH = "autoscaler.api_client"
+
+
+class TestApiClient:
+    @pytest.fixture(autouse=True)
+    def requests(self):
+        with patch(f"{BASE_PATH}.requests") as mock_requests:
+            yield mock_requests
+
+    @pytest.fixture
+    def http(self, requests):
+        http = requests.Session.return_value
+        http.get.return_value.json.return_value = [{"id": "contest"}]
+        yield http
+
+    @pytest.fixture
+    def sut(self):
+        yield ApiClient(api_url="http://api:8080/", timeout=3)
+
+    def test_find_contest_schedule(self, sut, http):
+        assert sut.find_contest_schedule() == [{"id": "contest"}]
+
+        http.get.assert_called_once_with("http://api:8080/v1/public/contests/schedule", timeout=3)
+        http.post.assert_not_called()
+
+    def test_find_contest_schedule_failure(self, sut, http):
+        http.get.return_value.raise_for_status.side_effect = Exception("Service Unavailable")
+
+        with pytest.raises(Exception):
+            sut.find_contest_schedule()
@@ -0,0 +1,75 @@
+import pytest
+
+from autoscaler.behavior import Behavior, ScalingRules
+
+
+class TestScalingRules:
+    def test_unlimited(self):
+        assert ScalingRules().max_change(4) is None
+
+    def test_absolute_and_percent(self):
+        rules = ScalingRules(max_step=2, max_percent=100)
+
+        assert rules.max_change(1) == 2
+        assert rules.max_change(4) == 4
+
+    def test_percent_from_zero_replicas(self):
+        assert ScalingRules(max_percent=50).max_change(0) == 1
+
+
+class TestBehavior:
+    def test_default_is_transparent(self):
+        sut = Behavior()
+
+        assert sut.apply(0, 1, 5) == 5
+        assert sut.apply(10, 5, 1) == 1
+
+    def test_scale_down_uses_max_over_window(self):
+        sut = Behavior(scale_down=ScalingRules(stabilization_window=60))
+
+        assert sut.apply(0, 4, 4) == 4
+        assert sut.apply(10, 4, 1) == 4
+        assert sut.apply(30, 4, 2) == 4
+        assert sut.apply(70, 4, 1) == 2
+        assert sut.apply(100, 2, 1) == 1
+
+    def test_scale_up_uses_min_over_window(self):
+        sut = Behavior(scale_up=ScalingRules(stabilization_window=20))
+
+        assert sut.apply(0, 1, 1) == 1
+        assert sut.apply(10, 1, 5) == 1
+        assert sut.apply(25, 1, 4) == 4
+
+    def test_step_limits(self):
+        sut = Behavior(
+            scale_up=ScalingRules(max_step=2),
+            scale_down=ScalingRules(max_step=1),
+        )
+
+        assert sut.apply(0, 1, 10) == 3
+        assert sut.apply(10, 3, 0) == 2
+
+    def test_dead_band(self):
+        sut = Behavior(tolerance=0.1)
+
+        assert sut.apply(0, 10, 11) == 10
+        assert sut.apply(10, 10, 12) == 12
+        assert sut.apply(20, 0, 1) == 1
+
+    def test_dead_band_applies_to_unrounded_ratio(self):
+        sut = Behavior(tolerance=0.1)
+
+        assert sut.apply(0, 3, 3.2) == 3
+        assert sut.apply(10, 3, 2.8) == 3
+        assert sut.apply(20, 3, 3.4) == 4
+        assert sut.apply(30, 3, 2.6) == 3
+        assert sut.apply(40, 3, 1.9) == 2
+
+    @pytest.mark.parametrize("window", [0, 30])
+    def test_recommendations_are_pruned(self, window):
+        sut = Behavior(scale_down=ScalingRules(stabilization_window=window))
+
+        for now in range(0, 100, 10):
+            sut.apply(now, 1, 1)
+
+        assert len(sut.recommendations) == window // 10 + 1
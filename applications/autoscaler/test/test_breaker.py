@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 100.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, clock):
+        yield CircuitBreaker("test", failure_threshold=2, reset_timeout=10, max_reset_timeout=30, ignored=(KeyError,), clock=clock)
+
+    def failing(self):
+        raise ConnectionError("unreachable")
+
+    def state(self):
+        return REGISTRY.get_sample_value("autoscaler_breaker_state", {"dependency": "test"})
+
+    def test_passes_calls_through(self, sut):
+        assert sut.call(lambda a, b=0: a + b, 1, b=2) == 3
+        assert sut.state == CLOSED
+
+    def test_opens_after_threshold(self, sut):
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                sut.call(self.failing)
+
+        assert sut.state == OPEN
+        assert self.state() == 2
+        function = MagicMock()
+        with pytest.raises(CircuitOpenError):
+            sut.call(function)
+        function.assert_not_called()
+
+    def test_success_resets_failures(self, sut):
+        with pytest.raises(ConnectionError):
+            sut.call(self.failing)
+        sut.call(lambda: None)
+        with pytest.raises(ConnectionError):
+            sut.call(self.failing)
+
+        assert sut.state == CLOSED
+
+    def test_ignored_errors_do_not_count(self, sut):
+        def missing():
+            raise KeyError("missing")
+
+        for _ in range(3):
+            with pytest.raises(KeyError):
+                sut.call(missing)
+
+        assert sut.state == CLOSED
+
+    def test_half_open_trial_closes(self, sut, clock):
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                sut.call(self.failing)
+
+        clock.return_value = 110.0
+
+        def trial():
+            assert sut.state == HALF_OPEN
+            assert self.state() == 1
+            return "ok"
+
+        assert sut.call(trial) == "ok"
+        assert sut.state == CLOSED
+        assert self.state() == 0
+
+    def test_rejects_calls_during_trial(self, sut, clock):
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                sut.call(self.failing)
+        clock.return_value = 110.0
+
+        def trial():
+            with pytest.raises(CircuitOpenError):
+                sut.call(lambda: None)
+
+        sut.call(trial)
+
+    def test_backs_off_exponentially(self, sut, clock):
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                sut.call(self.failing)
+        assert sut.retry_at == 110.0
+
+        clock.return_value = 110.0
+        with pytest.raises(ConnectionError):
+            sut.call(self.failing)
+        assert sut.retry_at == 130.0
+
+        clock.return_value = 130.0
+        with pytest.raises(ConnectionError):
+            sut.call(self.failing)
+        assert sut.retry_at == 160.0
+
+        clock.return_value = 160.0
+        sut.call(lambda: None)
+        assert sut.openings == 0
+
+    def test_observes_latency(self, sut):
+        before = REGISTRY.get_sample_value("autoscaler_dependency_latency_seconds_count", {"dependency": "test", "outcome": "success"}) or 0
+
+        sut.call(lambda: None)
+
+        assert REGISTRY.get_sample_value("autoscaler_dependency_latency_seconds_count", {"dependency": "test", "outcome": "success"}) == before + 1
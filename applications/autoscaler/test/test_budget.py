@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.budget import ReplicaBudget
+
+
+class TestReplicaBudget:
+    @pytest.fixture
+    def sut(self):
+        budget = ReplicaBudget(total=10)
+        budget.register("forseti_autojudge_cpp_17", 2, reclaim=MagicMock(side_effect=lambda replicas: replicas))
+        budget.register("forseti_autojudge_java_21", 4, reclaim=MagicMock(side_effect=lambda replicas: replicas))
+        budget.register("forseti_autojudge_python_312", 2, reclaim=MagicMock(side_effect=lambda replicas: replicas))
+        yield budget
+
+    def test_register_beyond_budget(self, sut):
+        with pytest.raises(ValueError):
+            sut.register("forseti_autojudge_node_22", 3)
+
+    def test_pools_without_demand_hold_their_share(self, sut):
+        assert sut.allocate() == {
+            "forseti_autojudge_cpp_17": 2,
+            "forseti_autojudge_java_21": 4,
+            "forseti_autojudge_python_312": 2,
+        }
+
+    def test_within_share(self, sut):
+        assert sut.fit("forseti_autojudge_java_21", 0, 3) == 3
+
+    def test_borrows_unreserved_replicas(self, sut):
+        assert sut.fit("forseti_autojudge_java_21", 4, 8) == 6
+        assert REGISTRY.get_sample_value("autoscaler_borrowed_replicas", {"service_name": "forseti_autojudge_java_21"}) == 2
+
+    def test_borrows_from_idle_pools(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 0, 0)
+
+        assert sut.fit("forseti_autojudge_java_21", 4, 12) == 9
+        assert REGISTRY.get_sample_value("autoscaler_budget_replicas", {"service_name": "forseti_autojudge_java_21"}) == 9
+
+    def test_reclaims_share_when_pool_is_busy_again(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 0, 0)
+        sut.fit("forseti_autojudge_java_21", 4, 12)
+
+        assert sut.fit("forseti_autojudge_python_312", 0, 5) == 2
+        sut.reclaimers["forseti_autojudge_java_21"].assert_called_once_with(7)
+        sut.reclaimers["forseti_autojudge_cpp_17"].assert_not_called()
+        assert sut.held["forseti_autojudge_java_21"] == 7
+        assert sut.fit("forseti_autojudge_java_21", 7, 12) == 7
+
+    def test_holds_share_a_borrower_could_not_give_back(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 0, 0)
+        sut.fit("forseti_autojudge_java_21", 4, 12)
+        sut.reclaimers["forseti_autojudge_java_21"].side_effect = Exception("boom")
+
+        assert sut.fit("forseti_autojudge_python_312", 0, 5) == 0
+        assert sut.held["forseti_autojudge_java_21"] == 9
+
+    def test_borrower_keeps_idle_tasks_it_could_not_drain(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 0, 0)
+        sut.fit("forseti_autojudge_java_21", 4, 12)
+        sut.reclaimers["forseti_autojudge_java_21"].side_effect = lambda replicas: 8
+
+        assert sut.fit("forseti_autojudge_python_312", 0, 5) == 1
+
+    def test_followers_do_not_reclaim(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 0, 0)
+        sut.fit("forseti_autojudge_java_21", 4, 12)
+
+        assert sut.fit("forseti_autojudge_python_312", 0, 5, reclaim=False) == 0
+        sut.reclaimers["forseti_autojudge_java_21"].assert_not_called()
+
+    def test_does_not_reclaim_within_reserved_share(self, sut):
+        sut.fit("forseti_autojudge_java_21", 4, 4)
+
+        assert sut.fit("forseti_autojudge_python_312", 0, 5) == 4
+        sut.reclaimers["forseti_autojudge_java_21"].assert_not_called()
+
+    def test_never_scales_a_pool_below_its_running_share(self, sut):
+        sut.fit("forseti_autojudge_java_21", 9, 9)
+        sut.reclaimers["forseti_autojudge_java_21"].side_effect = Exception("boom")
+
+        assert sut.fit("forseti_autojudge_cpp_17", 2, 2) == 2
+
+    def test_shares_spare_replicas_by_unmet_demand(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 0, 4)
+        sut.fit("forseti_autojudge_java_21", 0, 7)
+
+        assert sut.allocate() == {
+            "forseti_autojudge_cpp_17": 3,
+            "forseti_autojudge_java_21": 5,
+            "forseti_autojudge_python_312": 2,
+        }
+
+    def test_leaves_spare_replicas_unallocated(self, sut):
+        sut.fit("forseti_autojudge_cpp_17", 1, 1)
+        sut.fit("forseti_autojudge_java_21", 1, 1)
+        sut.fit("forseti_autojudge_python_312", 1, 1)
+
+        assert sum(sut.allocate().values()) == 3
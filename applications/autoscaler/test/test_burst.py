@@ -0,0 +1,73 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.burst import BurstDetector
+from autoscaler.policy import Sample
+from autoscaler.queue_monitor import QueueSnapshot
+
+
+def sample(timestamp: float, messages: int, replicas: int = 1, ack_rate: float = 0.0) -> Sample:
+    return Sample(timestamp=timestamp, replicas=replicas, queue=QueueSnapshot(messages=messages, ack_rate=ack_rate))
+
+
+class TestBurstDetector:
+    @pytest.fixture
+    def sut(self):
+        yield BurstDetector(factor=3, per_replica_ack_rate=0.5, drain_time=60)
+
+    def test_first_sample(self, sut):
+        assert sut.target("forseti_autojudge", sample(1000, 300)) is None
+
+    def test_steady_growth(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 5, replicas=2))
+
+        assert sut.target("forseti_autojudge", sample(1010, 35, replicas=2)) is None
+        assert REGISTRY.get_sample_value("autoscaler_depth_growth", {"service_name": "forseti_autojudge"}) == 3
+
+    def test_burst(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 5, replicas=2))
+
+        # 29.5 msg/s growth against 1 msg/s of drain: (30.5 + 300 / 60) / 0.5
+        assert sut.target("forseti_autojudge", sample(1010, 300, replicas=2)) == 71
+
+    def test_burst_without_drain_time(self):
+        sut = BurstDetector(factor=3, per_replica_ack_rate=0.5, drain_time=0)
+        sut.target("forseti_autojudge", sample(1000, 5, replicas=2))
+
+        # Keeps up with the 30.5 msg/s of arrivals only
+        assert sut.target("forseti_autojudge", sample(1010, 300, replicas=2)) == 61
+
+    def test_growth_of_latest_raw_depth(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 5, replicas=2), QueueSnapshot(messages=5))
+
+        assert sut.target("forseti_autojudge", sample(1010, 5, replicas=2), QueueSnapshot(messages=300)) == 71
+
+    def test_measured_drain_rate(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 5, replicas=2))
+
+        # 29.5 msg/s growth is under 3 times the 10 msg/s measured drain
+        assert sut.target("forseti_autojudge", sample(1010, 300, replicas=2, ack_rate=10)) is None
+
+        # 20 msg/s growth against 2 msg/s of measured drain: (22 + 500 / 60) / 0.5
+        assert sut.target("forseti_autojudge", sample(1020, 500, replicas=2, ack_rate=2)) == 61
+
+    def test_burst_without_replicas(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 0, replicas=0))
+
+        assert sut.target("forseti_autojudge", sample(1010, 1, replicas=0)) == 1
+
+    def test_shrinking_queue(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 300))
+
+        assert sut.target("forseti_autojudge", sample(1010, 5)) is None
+
+    def test_same_timestamp(self, sut):
+        sut.target("forseti_autojudge", sample(1000, 5))
+
+        assert sut.target("forseti_autojudge", sample(1000, 300)) is None
+
+    def test_unknown_drain_rate(self):
+        sut = BurstDetector(factor=3, per_replica_ack_rate=0, drain_time=60)
+        sut.target("forseti_autojudge", sample(1000, 5))
+
+        assert sut.target("forseti_autojudge", sample(1010, 300)) is None
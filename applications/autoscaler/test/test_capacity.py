@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from autoscaler.breaker import CircuitBreaker, CircuitOpenError
+from autoscaler.capacity import CapacityModel, Resources, matches_constraint
+
+CPU = 1_000_000_000
+GB = 1024**3
+
+
+def node(node_id, cpus, memory, role="worker", labels=None, state="ready", availability="active"):
+    return {
+        "ID": node_id,
+        "Spec": {"Role": role, "Labels": labels or {}, "Availability": availability},
+        "Description": {"Hostname": f"host-{node_id}", "Resources": {"NanoCPUs": cpus * CPU, "MemoryBytes": memory * GB}},
+        "Status": {"State": state},
+    }
+
+
+def task(service_id, node_id, cpus, memory):
+    return {
+        "ServiceID": service_id,
+        "NodeID": node_id,
+        "Spec": {"Resources": {"Reservations": {"NanoCPUs": int(cpus * CPU), "MemoryBytes": int(memory * GB)}}},
+    }
+
+
+class TestResources:
+    def test_fits(self):
+        assert Resources(nano_cpus=4 * CPU, memory_bytes=2 * GB).fits(Resources(nano_cpus=CPU, memory_bytes=GB)) == 2
+        assert Resources(nano_cpus=4 * CPU).fits(Resources(nano_cpus=CPU)) == 4
+        assert Resources(nano_cpus=-CPU, memory_bytes=GB).fits(Resources(nano_cpus=CPU)) == 0
+
+
+class TestMatchesConstraint:
+    def test_node_constraints(self):
+        manager = node("a", 1, 1, role="manager", labels={"judge": "true"})
+
+        assert matches_constraint(manager, "node.role == manager")
+        assert not matches_constraint(manager, "node.role != manager")
+        assert matches_constraint(manager, "node.id==a")
+        assert matches_constraint(manager, "node.hostname==host-a")
+        assert matches_constraint(manager, "node.labels.judge==true")
+        assert not matches_constraint(manager, "node.labels.other==true")
+        assert matches_constraint(manager, "engine.labels.os==linux")
+
+
+class TestCapacityModel:
+    @pytest.fixture
+    def docker_client(self):
+        yield MagicMock()
+
+    @pytest.fixture
+    def sut(self, docker_client):
+        yield CapacityModel(docker_client=docker_client)
+
+    def service(self, cpus=1, memory=1, constraints=None):
+        service = MagicMock(id="judge")
+        service.attrs = {
+            "Spec": {
+                "TaskTemplate": {
+                    "Resources": {"Reservations": {"NanoCPUs": int(cpus * CPU), "MemoryBytes": int(memory * GB)}},
+                    "Placement": {"Constraints": constraints or []},
+                }
+            }
+        }
+        return service
+
+    def test_without_reservation(self, sut, docker_client):
+        service = self.service(cpus=0, memory=0)
+
+        assert sut.placeable_replicas(service) is None
+        docker_client.api.nodes.assert_not_called()
+
+    def test_placeable_replicas(self, sut, docker_client):
+        docker_client.api.nodes.return_value = [
+            node("a", 4, 8),
+            node("b", 2, 8),
+            node("c", 8, 8, state="down"),
+            node("d", 8, 8, availability="drain"),
+        ]
+        docker_client.api.tasks.return_value = [
+            task("judge", "a", 1, 1),
+            task("judge", "a", 1, 1),
+            task("api", "b", 1.5, 1),
+            task("judge", None, 1, 1),
+        ]
+
+        assert sut.placeable_replicas(self.service()) == 4
+        docker_client.api.tasks.assert_called_once_with(filters={"desired-state": "running"})
+
+    def test_memory_bound(self, sut, docker_client):
+        docker_client.api.nodes.return_value = [node("a", 8, 2)]
+        docker_client.api.tasks.return_value = []
+
+        assert sut.placeable_replicas(self.service(cpus=0.5, memory=1)) == 2
+
+    def test_placement_constraints(self, sut, docker_client):
+        docker_client.api.nodes.return_value = [node("a", 4, 8, role="manager"), node("b", 4, 8)]
+        docker_client.api.tasks.return_value = []
+
+        assert sut.placeable_replicas(self.service(constraints=["node.role==worker"])) == 4
+
+    def test_docker_calls_go_through_the_breaker(self, docker_client):
+        sut = CapacityModel(docker_client=docker_client, breaker=CircuitBreaker("docker", failure_threshold=1))
+        docker_client.api.tasks.side_effect = Exception("Docker unavailable")
+
+        with pytest.raises(Exception):
+            sut.placeable_replicas(self.service())
+        with pytest.raises(CircuitOpenError):
+            sut.placeable_replicas(self.service())
+
+        assert docker_client.api.tasks.call_count == 1
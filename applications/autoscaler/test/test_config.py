@@ -0,0 +1,287 @@
+import dataclasses
+from unittest.mock import MagicMock
+
+import pytest
+
+from autoscaler.behavior import ScalingRules
+from autoscaler.budget import ReplicaBudget
+from autoscaler.config import ScalerConfig, build_behavior, build_policy, build_scaler, load_configs, validate_config
+from autoscaler.policy import CompositePolicy, DepthPolicy, MetricPolicy, PredictivePolicy, QueueWaitPolicy, RatePolicy
+
+
+class TestScalerConfig:
+    def test_from_env(self):
+        config = ScalerConfig.from_env(
+            {
+                "QUEUE_NAME": "submission-queue",
+                "SERVICE_NAME": "forseti_autojudge",
+                "MESSAGES_PER_REPLICA": "5",
+                "PER_REPLICA_ACK_RATE": "0.5",
+                "POLICY": "rate",
+                "GRACEFUL_SCALE_IN": "true",
+                "NAME": "ignored",
+            }
+        )
+
+        assert config == ScalerConfig(
+            name="forseti_autojudge",
+            queue_name="submission-queue",
+            service_name="forseti_autojudge",
+            policy="rate",
+            messages_per_replica=5,
+            per_replica_ack_rate=0.5,
+            graceful_scale_in=True,
+        )
+
+    def test_from_env_without_values(self):
+        config = ScalerConfig.from_env({})
+
+        assert config == ScalerConfig(name="default", queue_name="", service_name="")
+
+    def test_validate_env_config(self):
+        validate_config(ScalerConfig.from_env({"QUEUE_NAME": "submission-queue", "SERVICE_NAME": "forseti_autojudge"}))
+
+        with pytest.raises(ValueError):
+            validate_config(ScalerConfig.from_env({"SERVICE_NAME": "forseti_autojudge"}))
+
+
+class TestLoadConfigs:
+    @pytest.fixture
+    def defaults(self):
+        yield ScalerConfig(name="default", queue_name="", service_name="", cooldown=30)
+
+    def test_load_configs(self, tmp_path, defaults):
+        path = tmp_path / "policies.conf"
+        path.write_text(
+            "[DEFAULT]\n"
+            "max_replicas=10\n"
+            "\n"
+            "[autojudge]\n"
+            "queue_name=submission-queue\n"
+            "service_name=forseti_autojudge\n"
+            "messages_per_replica=5\n"
+            "\n"
+            "[api]\n"
+            "queue_name=outbox-event-queue\n"
+            "service_name=forseti_api\n"
+            "policy=queue_wait\n"
+            "max_queue_wait_seconds=5\n"
+        )
+
+        configs = load_configs(str(path), defaults)
+
+        assert configs == [
+            ScalerConfig(
+                name="autojudge",
+                queue_name="submission-queue",
+                service_name="forseti_autojudge",
+                messages_per_replica=5,
+                max_replicas=10,
+                cooldown=30,
+            ),
+            ScalerConfig(
+                name="api",
+                queue_name="outbox-event-queue",
+                service_name="forseti_api",
+                policy="queue_wait",
+                max_queue_wait_seconds=5,
+                max_replicas=10,
+                cooldown=30,
+            ),
+        ]
+
+    def test_load_configs_without_service(self, tmp_path, defaults):
+        path = tmp_path / "policies.conf"
+        path.write_text("[autojudge]\nqueue_name=submission-queue\n")
+
+        with pytest.raises(ValueError):
+            load_configs(str(path), defaults)
+        assert load_configs(str(path), defaults, validate=False)[0].name == "autojudge"
+
+
+class TestBuildPolicy:
+    @pytest.mark.parametrize(
+        "name, policy_class",
+        [
+            ("depth", DepthPolicy),
+            ("predictive", PredictivePolicy),
+            ("rate", RatePolicy),
+            ("queue_wait", QueueWaitPolicy),
+        ],
+    )
+    def test_build_policy(self, name, policy_class):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", policy=name)
+
+        assert isinstance(build_policy(config), policy_class)
+
+    def test_build_rate_policy_with_concurrency(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", policy="rate", max_concurrent_submissions=2)
+
+        assert build_policy(config).max_concurrent_submissions == 2
+
+    def test_build_unknown_policy(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", policy="x")
+
+        with pytest.raises(ValueError):
+            build_policy(config)
+
+
+class TestBuildBehavior:
+    def test_build_behavior(self):
+        config = ScalerConfig(
+            name="a",
+            queue_name="q",
+            service_name="s",
+            scale_up_max_step=4,
+            scale_up_max_percent=100,
+            scale_down_stabilization_window=120,
+            scale_down_max_step=1,
+            tolerance=0.1,
+        )
+
+        behavior = build_behavior(config)
+
+        assert behavior.scale_up == ScalingRules(max_step=4, max_percent=100)
+        assert behavior.scale_down == ScalingRules(stabilization_window=120, max_step=1)
+        assert behavior.tolerance == 0.1
+
+
+class TestBuildScaler:
+    def test_build_scaler(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", policy="rate", graceful_scale_in=True, capacity_aware=True)
+        queue_monitor, service_monitor, docker_client = MagicMock(), MagicMock(service_name="s"), MagicMock()
+
+        scaler = build_scaler(config, queue_monitor, service_monitor, docker_client=docker_client)
+
+        assert scaler.queue_name == "q"
+        assert isinstance(scaler.policy, RatePolicy)
+        assert scaler.drainer.queue_monitor is queue_monitor
+        assert scaler.capacity.docker_client is docker_client
+        assert scaler.capacity.breaker is service_monitor.breaker
+        assert scaler.utilisation_monitor is None
+
+    def test_build_scaler_with_target_utilisation(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", target_utilisation=0.8)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="s"), prometheus_url="http://prometheus:9090")
+
+        assert isinstance(scaler.policy, CompositePolicy)
+        assert scaler.policy.name == "depth+utilisation"
+        assert scaler.utilisation_monitor.cpu.url == "http://prometheus:9090"
+
+    def test_build_scaler_with_target_utilisation_without_prometheus(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", target_utilisation=0.8)
+
+        with pytest.raises(ValueError):
+            build_scaler(config, MagicMock(), MagicMock(service_name="s"), docker_client=MagicMock())
+
+    def test_build_scaler_without_docker_client(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", graceful_scale_in=True, capacity_aware=True)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="s"))
+
+        # The drainer only talks to RabbitMQ and the Swarm service API
+        assert scaler.drainer is not None
+        assert scaler.capacity is None
+
+
+class TestMetricConfig:
+    def test_build_policy(self):
+        config = ScalerConfig(name="api", queue_name="", service_name="forseti_api", policy="metric", target_value=50)
+
+        policy = build_policy(config)
+
+        assert isinstance(policy, MetricPolicy)
+        assert policy.target_value == 50
+
+    def test_build_scaler(self):
+        config = ScalerConfig(name="api", queue_name="", service_name="forseti_api", policy="metric", metric_query="sum(rate(x[1m]))")
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="forseti_api"), prometheus_url="http://prometheus:9090")
+
+        assert scaler.metric_source.url == "http://prometheus:9090"
+        assert scaler.metric_source.query == "sum(rate(x[1m]))"
+
+    def test_build_scaler_with_budget(self):
+        budget = ReplicaBudget(total=10)
+        config = ScalerConfig(name="java", queue_name="submission-queue-java-21", service_name="forseti_autojudge_java_21", min_replicas=1, reserved_replicas=4)
+        small = ScalerConfig(name="cpp", queue_name="submission-queue-cpp-17", service_name="forseti_autojudge_cpp_17", min_replicas=2)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="forseti_autojudge_java_21"), budget=budget)
+        build_scaler(small, MagicMock(), MagicMock(service_name="forseti_autojudge_cpp_17"), budget=budget)
+
+        assert scaler.budget is budget
+        assert budget.reserved == {"forseti_autojudge_java_21": 4, "forseti_autojudge_cpp_17": 2}
+        assert budget.reclaimers["forseti_autojudge_java_21"] == scaler.reclaim
+
+    def test_build_scaler_with_burst(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", burst_factor=4, per_replica_ack_rate=0.2, backlog_drain_time=30)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="s"))
+
+        assert scaler.burst.factor == 4
+        assert scaler.burst.per_replica_ack_rate == 0.2
+        assert scaler.burst.drain_time == 30
+        assert build_scaler(dataclasses.replace(config, burst_factor=0), MagicMock(), MagicMock(service_name="s")).burst is None
+
+    def test_build_scaler_scaled_to_zero(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", min_replicas=0, wake_replicas=2, idle_timeout=900)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="s"))
+
+        assert scaler.min_replicas == 0
+        assert scaler.wake_replicas == 2
+        assert scaler.idle_timeout == 900
+
+    def test_build_scaler_with_shadows(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", min_replicas=0, max_replicas=5, shadow_policies="predictive, rate,", cold_start=45)
+
+        scaler = build_scaler(config, MagicMock(), MagicMock(service_name="s"))
+
+        assert [type(shadow.policy) for shadow in scaler.shadows] == [PredictivePolicy, RatePolicy]
+        assert scaler.shadows[0].labels == {"service_name": "s", "policy": "predictive"}
+        assert scaler.shadows[0].max_replicas == 5
+        assert scaler.shadows[0].cold_start == 45
+        assert isinstance(scaler.policy, DepthPolicy)
+
+    def test_build_scaler_with_unknown_shadow(self):
+        config = ScalerConfig(name="a", queue_name="q", service_name="s", shadow_policies="unknown")
+
+        with pytest.raises(ValueError):
+            build_scaler(config, MagicMock(), MagicMock(service_name="s"))
+
+    def test_build_scaler_without_prometheus_url(self):
+        config = ScalerConfig(name="api", queue_name="", service_name="forseti_api", policy="metric", metric_query="up")
+
+        with pytest.raises(ValueError):
+            build_scaler(config, MagicMock(), MagicMock(service_name="forseti_api"))
+
+    def test_load_configs(self, tmp_path):
+        path = tmp_path / "policies.conf"
+        path.write_text('[api]\nservice_name=forseti_api\npolicy=metric\nmetric_query=sum(rate(traefik_service_requests_total{service="api@swarm"}[1m])) * 100 % 7\ntarget_value=20\n')
+
+        config = load_configs(str(path), ScalerConfig(name="default", queue_name="", service_name=""))[0]
+
+        assert config.metric_query == 'sum(rate(traefik_service_requests_total{service="api@swarm"}[1m])) * 100 % 7'
+        assert config.target_value == 20
+
+    def test_load_configs_without_queue_or_metric(self, tmp_path):
+        path = tmp_path / "policies.conf"
+        path.write_text("[api]\nservice_name=forseti_api\n")
+
+        with pytest.raises(ValueError):
+            load_configs(str(path), ScalerConfig(name="default", queue_name="", service_name=""))
+
+    def test_load_configs_metric_query_without_queue_or_metric_policy(self, tmp_path):
+        path = tmp_path / "policies.conf"
+        path.write_text("[api]\nservice_name=forseti_api\npolicy=depth\nmetric_query=up\n")
+
+        with pytest.raises(ValueError):
+            load_configs(str(path), ScalerConfig(name="default", queue_name="", service_name=""))
+
+    def test_load_configs_metric_policy_without_query(self, tmp_path):
+        path = tmp_path / "policies.conf"
+        path.write_text("[api]\nservice_name=forseti_api\nqueue_name=q\npolicy=metric\n")
+
+        with pytest.raises(ValueError):
+            load_configs(str(path), ScalerConfig(name="default", queue_name="", service_name=""))
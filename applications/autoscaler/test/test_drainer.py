@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.drainer import IdleDrainer, task_addresses
+from autoscaler.queue_monitor import ConsumerSnapshot, QueueMonitor
+from autoscaler.service_monitor import ServiceMonitor
+
+
+def task(container_id, address):
+    return {
+        "Status": {"State": "running", "ContainerStatus": {"ContainerID": container_id}},
+        "NetworksAttachments": [{"Addresses": [f"{address}/24"]}],
+    }
+
+
+def consumer(peer_host, unacked):
+    return ConsumerSnapshot(peer_host=peer_host, channel=f"{peer_host} (1)", messages_unacknowledged=unacked)
+
+
+class TestIdleDrainer:
+    @pytest.fixture
+    def queue_monitor(self):
+        yield MagicMock(spec=QueueMonitor)
+
+    @pytest.fixture
+    def service_monitor(self):
+        yield MagicMock(spec=ServiceMonitor, service_name="service_name")
+
+    @pytest.fixture
+    def sut(self, queue_monitor):
+        yield IdleDrainer(queue_monitor=queue_monitor)
+
+    def test_task_addresses(self):
+        assert task_addresses(task("a", "10.0.0.2")) == {"10.0.0.2"}
+        assert task_addresses({"Status": {}}) == set()
+
+    def test_all_tasks_idle(self, sut, queue_monitor, service_monitor):
+        service_monitor.get_tasks.return_value = [task("a", "10.0.0.2"), task("b", "10.0.0.3")]
+        queue_monitor.get_consumers.return_value = [consumer("10.0.0.2", 0), consumer("10.0.0.3", 0)]
+
+        assert sut.scale_in(service_monitor, "queue", 2, 1) == 1
+
+        queue_monitor.get_consumers.assert_called_once_with("queue")
+        service_monitor.scale.assert_called_once_with(1)
+
+    def test_scales_in_by_idle_tasks_only(self, sut, queue_monitor, service_monitor):
+        service_monitor.get_tasks.return_value = [
+            task("a", "10.0.0.2"),
+            task("b", "10.0.0.3"),
+            task("c", "10.0.0.4"),
+        ]
+        queue_monitor.get_consumers.return_value = [
+            consumer("10.0.0.2", 1),
+            consumer("10.0.0.3", 1),
+            consumer("10.0.0.4", 0),
+        ]
+
+        assert sut.scale_in(service_monitor, "queue", 3, 1) == 2
+
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_removes_only_what_is_needed(self, sut, queue_monitor, service_monitor):
+        service_monitor.get_tasks.return_value = [task("a", "10.0.0.2"), task("b", "10.0.0.3"), task("c", "10.0.0.4")]
+        queue_monitor.get_consumers.return_value = [consumer("10.0.0.2", 1)]
+
+        assert sut.scale_in(service_monitor, "queue", 3, 2) == 2
+
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_postpones_while_every_task_is_busy(self, sut, queue_monitor, service_monitor):
+        service_monitor.get_tasks.return_value = [task("a", "10.0.0.2"), task("b", "10.0.0.3")]
+        queue_monitor.get_consumers.return_value = [consumer("10.0.0.2", 1), consumer("10.0.0.3", 2)]
+
+        assert sut.scale_in(service_monitor, "queue", 2, 1) == 2
+
+        service_monitor.scale.assert_not_called()
+
+    def test_counts_drained_tasks(self, sut, queue_monitor, service_monitor):
+        labels = {"service_name": "service_name"}
+        before = REGISTRY.get_sample_value("autoscaler_drained_tasks_total", labels) or 0
+        service_monitor.get_tasks.return_value = [task("a", "10.0.0.2"), task("b", "10.0.0.3"), task("c", "10.0.0.4")]
+        queue_monitor.get_consumers.return_value = []
+
+        sut.scale_in(service_monitor, "queue", 3, 1)
+
+        assert REGISTRY.get_sample_value("autoscaler_drained_tasks_total", labels) == before + 2
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from autoscaler.health import HealthCheck
+from autoscaler.manager import ScalerManager
+
+
+class TestHealthCheck:
+    @pytest.fixture
+    def manager(self):
+        yield MagicMock(spec=ScalerManager, started_at=1000.0, last_tick_at=None, last_fresh_at=None, last_error=None)
+
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 1010.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, manager, clock):
+        yield HealthCheck(manager=manager, max_staleness=30, clock=clock)
+
+    def test_healthy_while_starting(self, sut):
+        assert sut.health() == (True, {"status": "healthy", "last_tick_age": None})
+
+    def test_unhealthy_without_first_tick(self, sut, clock):
+        clock.return_value = 1030.0
+
+        assert sut.health()[0] is False
+
+    def test_healthy_with_recent_tick(self, sut, manager, clock):
+        manager.last_tick_at = 1050.0
+        clock.return_value = 1060.0
+
+        assert sut.health() == (True, {"status": "healthy", "last_tick_age": 10.0})
+
+    def test_unhealthy_with_stale_tick(self, sut, manager, clock):
+        manager.last_tick_at = 1050.0
+        clock.return_value = 1080.0
+
+        assert sut.health() == (False, {"status": "unhealthy", "last_tick_age": 30.0})
+
+    def test_not_ready_before_fresh_data(self, sut, manager):
+        manager.last_tick_at = 1005.0
+        manager.last_error = "RabbitMQ unavailable"
+
+        assert sut.ready() == (False, {"status": "not ready", "last_fresh_age": None, "last_error": "RabbitMQ unavailable"})
+
+    def test_ready_with_fresh_data(self, sut, manager):
+        manager.last_fresh_at = 1005.0
+
+        assert sut.ready() == (True, {"status": "ready", "last_fresh_age": 5.0, "last_error": None})
+
+    def test_not_ready_with_stale_data(self, sut, manager, clock):
+        manager.last_fresh_at = 1005.0
+        clock.return_value = 1040.0
+
+        assert sut.ready()[0] is False
+
+    def test_status(self, sut, manager):
+        manager.status.return_value = {"services": []}
+
+        assert sut.status() == {"services": []}
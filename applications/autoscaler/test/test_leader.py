@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from autoscaler.breaker import CircuitBreaker
+from autoscaler.leader import HOLDER_LABEL, RENEWED_LABEL, LeaderElector
+
+BASE_PATH = "autoscaler.leader"
+
+
+class TestLeaderElector:
+    @pytest.fixture
+    def docker_client(self):
+        docker_client = MagicMock()
+        docker_client.api.inspect_service.return_value = self.service({})
+        yield docker_client
+
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 100.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, docker_client, clock):
+        with patch(f"{BASE_PATH}.time") as time:
+            time.time.return_value = 1700000000.0
+            yield LeaderElector(docker_client=docker_client, service_name="forseti_autojudge-autoscaler", identity="a", lease_duration=20, clock=clock)
+
+    def service(self, labels, version=7):
+        return {"ID": "service_id", "Version": {"Index": version}, "Spec": {"Labels": {"com.docker.stack.namespace": "forseti", **labels}}}
+
+    def test_acquires_free_lease(self, sut, docker_client):
+        assert sut.is_leader()
+
+        docker_client.api.update_service.assert_called_once_with(
+            "service_id",
+            7,
+            labels={"com.docker.stack.namespace": "forseti", HOLDER_LABEL: "a", RENEWED_LABEL: "1700000000.0"},
+            fetch_current_spec=True,
+        )
+
+    def test_acquires_released_lease(self, sut, docker_client):
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "", RENEWED_LABEL: "1"})
+
+        assert sut.is_leader()
+        docker_client.api.update_service.assert_called_once()
+
+    def test_follows_active_lease(self, sut, docker_client, clock):
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "b", RENEWED_LABEL: "1"})
+        assert not sut.is_leader()
+
+        clock.return_value = 115.0
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "b", RENEWED_LABEL: "2"})
+        assert not sut.is_leader()
+
+        clock.return_value = 130.0
+        assert not sut.is_leader()
+        docker_client.api.update_service.assert_not_called()
+
+    def test_takes_over_expired_lease(self, sut, docker_client, clock):
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "b", RENEWED_LABEL: "1"})
+        assert not sut.is_leader()
+
+        clock.return_value = 120.0
+
+        assert sut.is_leader()
+        assert docker_client.api.update_service.call_args.kwargs["labels"][HOLDER_LABEL] == "a"
+
+    def test_renews_at_half_lease(self, sut, docker_client, clock):
+        sut.is_leader()
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "a", RENEWED_LABEL: "1700000000.0"}, version=8)
+
+        clock.return_value = 105.0
+        assert sut.is_leader()
+        assert docker_client.api.update_service.call_count == 1
+
+        clock.return_value = 110.0
+        assert sut.is_leader()
+        assert docker_client.api.update_service.call_count == 2
+        assert docker_client.api.update_service.call_args.args == ("service_id", 8)
+
+    def test_loses_race(self, sut, docker_client):
+        docker_client.api.update_service.side_effect = Exception("update out of sequence")
+
+        assert not sut.is_leader()
+
+    def test_keeps_leading_until_lease_expires_on_errors(self, sut, docker_client, clock):
+        sut.is_leader()
+        docker_client.api.inspect_service.side_effect = Exception("Docker unavailable")
+
+        clock.return_value = 119.0
+        assert sut.is_leader()
+
+        clock.return_value = 120.0
+        assert not sut.is_leader()
+
+    def test_open_breaker_keeps_leading_until_lease_expires(self, sut, docker_client, clock):
+        sut.is_leader()
+        sut.breaker = CircuitBreaker("docker", failure_threshold=1, reset_timeout=60)
+        docker_client.api.inspect_service.side_effect = Exception("Docker unavailable")
+
+        clock.return_value = 110.0
+        assert sut.is_leader()
+        clock.return_value = 119.0
+        assert sut.is_leader()
+        clock.return_value = 120.0
+        assert not sut.is_leader()
+
+        assert docker_client.api.inspect_service.call_count == 2
+
+    def test_holds_lease_until_it_expires_locally(self, sut, clock):
+        assert not sut.holds_lease()
+        sut.is_leader()
+
+        clock.return_value = 119.0
+        assert sut.holds_lease()
+
+        clock.return_value = 120.0
+        assert not sut.holds_lease()
+
+    def test_release(self, sut, docker_client):
+        sut.is_leader()
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "a", RENEWED_LABEL: "1"}, version=8)
+
+        sut.release()
+
+        assert not sut.leader
+        docker_client.api.update_service.assert_called_with(
+            "service_id",
+            8,
+            labels={"com.docker.stack.namespace": "forseti", HOLDER_LABEL: "", RENEWED_LABEL: "1"},
+            fetch_current_spec=True,
+        )
+
+    def test_release_lease_held_by_another_replica(self, sut, docker_client):
+        sut.is_leader()
+        docker_client.api.inspect_service.return_value = self.service({HOLDER_LABEL: "b", RENEWED_LABEL: "1"})
+
+        sut.release()
+
+        assert docker_client.api.update_service.call_count == 1
+
+    def test_release_as_follower(self, sut, docker_client):
+        sut.release()
+
+        docker_client.api.inspect_service.assert_not_called()
+
+    def test_release_error(self, sut, docker_client):
+        sut.is_leader()
+        docker_client.api.inspect_service.side_effect = Exception("Docker unavailable")
+
+        sut.release()
+
+        assert not sut.leader
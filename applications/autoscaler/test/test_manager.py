@@ -0,0 +1,309 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.budget import ReplicaBudget
+from autoscaler.leader import LeaderElector
+from autoscaler.manager import ScalerManager
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+from autoscaler.sampler import QueueSampler, QueueStats
+from autoscaler.scaler import Scaler
+from autoscaler.schedule import ContestSchedule
+from autoscaler.service_cache import ServiceState, ServiceStateCache
+from autoscaler.service_monitor import ServiceMonitor
+
+
+class TestScalerManager:
+    @pytest.fixture
+    def queue_monitor(self):
+        yield MagicMock(spec=QueueMonitor)
+
+    @pytest.fixture
+    def service_cache(self):
+        cache = MagicMock(spec=ServiceStateCache)
+        cache.is_stale.return_value = False
+        yield cache
+
+    def _scaler(self, queue_name, service_name):
+        scaler = MagicMock(spec=Scaler, queue_name=queue_name, labels={"service_name": service_name})
+        scaler.service_monitor = MagicMock(spec=ServiceMonitor, service_name=service_name)
+        return scaler
+
+    @pytest.fixture
+    def scalers(self):
+        yield [
+            self._scaler("queue_a", "forseti_a"),
+            self._scaler("queue_b", "forseti_b"),
+        ]
+
+    @pytest.fixture
+    def sut(self, queue_monitor, service_cache, scalers):
+        yield ScalerManager(
+            queue_monitor=queue_monitor,
+            service_cache=service_cache,
+            scalers=scalers,
+        )
+
+    def test_scale_with_bulk_state(self, sut, queue_monitor, service_cache, scalers):
+        service_a, service_b = MagicMock(), MagicMock()
+        queue_monitor.get_snapshots.return_value = {
+            "queue_a": QueueSnapshot(messages=1),
+            "queue_b": QueueSnapshot(messages=2),
+        }
+        service_cache.get.side_effect = {"forseti_a": service_a, "forseti_b": service_b}.get
+
+        sut.scale()
+
+        queue_monitor.get_snapshots.assert_called_once()
+        service_cache.resync.assert_not_called()
+        scalers[0].service_monitor.update.assert_called_once_with(service_a)
+        scalers[0].scale.assert_called_once_with(queue=QueueSnapshot(messages=1), dry_run=False, latest=None)
+        scalers[1].service_monitor.update.assert_called_once_with(service_b)
+        scalers[1].scale.assert_called_once_with(queue=QueueSnapshot(messages=2), dry_run=False, latest=None)
+
+    def test_scale_with_sampler(self, sut, queue_monitor, service_cache, scalers):
+        sut.sampler = MagicMock(spec=QueueSampler)
+        sut.sampler.get_snapshots.return_value = {
+            "queue_a": QueueSnapshot(messages=3),
+            "queue_b": QueueSnapshot(messages=4),
+        }
+        service_cache.get.return_value = MagicMock()
+
+        sut.scale()
+
+        queue_monitor.get_snapshots.assert_not_called()
+        sut.sampler.latest.assert_any_call("queue_a")
+        scalers[0].scale.assert_called_once_with(queue=QueueSnapshot(messages=3), dry_run=False, latest=sut.sampler.latest.return_value)
+        scalers[1].scale.assert_called_once_with(queue=QueueSnapshot(messages=4), dry_run=False, latest=sut.sampler.latest.return_value)
+
+    def test_sample_wakes_service_at_zero_replicas(self, sut, service_cache, scalers):
+        sut.sampler = MagicMock(spec=QueueSampler)
+        sut.sampler.stats.side_effect = {"queue_a": QueueStats(last=1, median=0, max=1, ewma=0.3, samples=3)}.get
+        service_cache.get.side_effect = {
+            "forseti_a": MagicMock(spec=ServiceState, replicas=0),
+            "forseti_b": MagicMock(spec=ServiceState, replicas=0),
+        }.get
+        sut.on_wake = MagicMock()
+
+        sut.sample()
+        sut.sample()
+
+        sut.sampler.sample.assert_called()
+        sut.on_wake.assert_called_once()
+        assert sut.waking == {"forseti_a"}
+
+    def test_sample_wakes_again_after_scaling_to_zero(self, sut, service_cache, scalers):
+        sut.sampler = MagicMock(spec=QueueSampler)
+        sut.sampler.stats.side_effect = {"queue_a": QueueStats(last=1, median=1, max=1, ewma=1, samples=3)}.get
+        state = MagicMock(spec=ServiceState, replicas=0)
+        service_cache.get.side_effect = {"forseti_a": state}.get
+        sut.on_wake = MagicMock()
+
+        sut.sample()
+        state.replicas = 2
+        sut.sample()
+        assert sut.waking == set()
+        state.replicas = 0
+        sut.sample()
+
+        assert sut.on_wake.call_count == 2
+
+    def test_sample_without_wake_handler(self, sut, service_cache, scalers):
+        sut.sampler = MagicMock(spec=QueueSampler)
+        sut.sampler.stats.return_value = QueueStats(last=1, median=1, max=1, ewma=1, samples=1)
+        service_cache.get.return_value = MagicMock(spec=ServiceState, replicas=0)
+
+        sut.sample()
+
+        assert sut.waking == {"forseti_a", "forseti_b"}
+
+    def _service(self, replicas):
+        service = MagicMock()
+        service.attrs = {"Spec": {"Mode": {"Replicated": {"Replicas": replicas}}}, "Version": {"Index": 7}}
+        service.tasks.return_value = []
+
+        def scale(replicas):
+            service.attrs = {"Spec": {"Mode": {"Replicated": {"Replicas": replicas}}}, "Version": {"Index": 8}}
+
+        service.scale.side_effect = scale
+        return service
+
+    def test_reclaimed_pool_ticks_on_its_new_replicas(self, queue_monitor, service_cache):
+        budget = ReplicaBudget(total=6)
+        services = {"forseti_a": self._service(1), "forseti_b": self._service(5)}
+        scalers = []
+        for service_name, queue_name in (("forseti_a", "queue_a"), ("forseti_b", "queue_b")):
+            docker_client = MagicMock()
+            docker_client.services.get.return_value = services[service_name]
+            scaler = Scaler(
+                queue_monitor=queue_monitor,
+                service_monitor=ServiceMonitor(docker_client=docker_client, service_name=service_name),
+                queue_name=queue_name,
+                cooldown=60,
+                messages_per_replica=1,
+                min_replicas=0,
+                max_replicas=6,
+                budget=budget,
+            )
+            budget.register(service_name, 3, reclaim=scaler.reclaim)
+            scalers.append(scaler)
+        # The cache has not seen the reclaim of forseti_b by the time it ticks
+        states = {
+            "forseti_a": ServiceState(service=services["forseti_a"], replicas=1, running_tasks=1, version=7),
+            "forseti_b": ServiceState(service=services["forseti_b"], replicas=5, running_tasks=5, version=7),
+        }
+        service_cache.get.side_effect = states.get
+        budget.held["forseti_b"] = 5
+        queue_monitor.get_snapshots.return_value = {
+            "queue_a": QueueSnapshot(messages=3),
+            "queue_b": QueueSnapshot(messages=5),
+        }
+        sut = ScalerManager(queue_monitor=queue_monitor, service_cache=service_cache, scalers=scalers)
+
+        sut.scale()
+
+        services["forseti_a"].scale.assert_called_once_with(3)
+        services["forseti_b"].scale.assert_called_once_with(3)
+        assert budget.held == {"forseti_a": 3, "forseti_b": 3}
+
+    def test_resyncs_stale_cache(self, sut, queue_monitor, service_cache):
+        service_cache.is_stale.return_value = True
+        queue_monitor.get_snapshots.return_value = {}
+
+        sut.scale()
+
+        service_cache.resync.assert_called_once()
+
+    def test_skips_missing_pairs(self, sut, queue_monitor, service_cache, scalers):
+        queue_monitor.get_snapshots.return_value = {"queue_a": QueueSnapshot(messages=1)}
+        service_cache.get.side_effect = {"forseti_a": MagicMock()}.get
+
+        sut.scale()
+
+        scalers[0].scale.assert_called_once()
+        scalers[1].scale.assert_not_called()
+
+    def test_fetch_failure(self, sut, queue_monitor, scalers):
+        queue_monitor.get_snapshots.side_effect = Exception("unreachable")
+
+        sut.scale()
+
+        for scaler in scalers:
+            scaler.scale.assert_not_called()
+
+    def test_refreshes_stale_schedule(self, sut, queue_monitor):
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_stale.return_value = True
+        queue_monitor.get_snapshots.return_value = {}
+
+        sut.scale()
+
+        sut.schedule.refresh.assert_called_once()
+
+    def test_keeps_fresh_schedule(self, sut, queue_monitor):
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_stale.return_value = False
+        queue_monitor.get_snapshots.return_value = {}
+
+        sut.scale()
+
+        sut.schedule.refresh.assert_not_called()
+
+    def test_scales_when_schedule_refresh_fails(self, sut, queue_monitor, service_cache, scalers):
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_stale.return_value = True
+        sut.schedule.refresh.side_effect = Exception("API down")
+        queue_monitor.get_snapshots.return_value = {"queue_a": QueueSnapshot(messages=1)}
+        service_cache.get.return_value = MagicMock()
+
+        sut.scale()
+
+        scalers[0].scale.assert_called_once_with(queue=QueueSnapshot(messages=1), dry_run=False, latest=None)
+
+    def test_scales_service_without_queue(self, sut, queue_monitor, service_cache, scalers):
+        scalers[0].queue_name = ""
+        queue_monitor.get_snapshots.return_value = {"queue_b": QueueSnapshot(messages=2)}
+        service_cache.get.return_value = MagicMock()
+
+        sut.scale()
+
+        scalers[0].scale.assert_called_once_with(queue=None, dry_run=False, latest=None)
+        scalers[1].scale.assert_called_once_with(queue=QueueSnapshot(messages=2), dry_run=False, latest=None)
+
+    def test_follower_only_observes(self, sut, queue_monitor, service_cache, scalers):
+        sut.elector = MagicMock(spec=LeaderElector)
+        sut.elector.is_leader.return_value = False
+        queue_monitor.get_snapshots.return_value = {"queue_a": QueueSnapshot(messages=1), "queue_b": QueueSnapshot(messages=2)}
+        service_cache.get.return_value = MagicMock()
+
+        sut.scale()
+
+        scalers[0].scale.assert_called_once_with(queue=QueueSnapshot(messages=1), dry_run=True, latest=None)
+        scalers[1].scale.assert_called_once_with(queue=QueueSnapshot(messages=2), dry_run=True, latest=None)
+
+    def test_leader_scales(self, sut, queue_monitor, service_cache, scalers):
+        sut.elector = MagicMock(spec=LeaderElector)
+        sut.elector.is_leader.return_value = True
+        queue_monitor.get_snapshots.return_value = {"queue_a": QueueSnapshot(messages=1), "queue_b": QueueSnapshot(messages=2)}
+        service_cache.get.return_value = MagicMock()
+
+        sut.scale()
+
+        scalers[0].scale.assert_called_once_with(queue=QueueSnapshot(messages=1), dry_run=False, latest=None)
+
+    def test_holds_while_breaker_is_open(self, sut, queue_monitor, scalers):
+        queue_monitor.get_snapshots.side_effect = CircuitOpenError("open")
+        held = REGISTRY.get_sample_value("autoscaler_held_count_total", {"service_name": "forseti_a"}) or 0
+
+        sut.scale()
+
+        for scaler in scalers:
+            scaler.scale.assert_not_called()
+        assert REGISTRY.get_sample_value("autoscaler_held_count_total", {"service_name": "forseti_a"}) == held + 1
+
+    def test_tracks_tick_and_fresh_data(self, sut, queue_monitor, service_cache, scalers):
+        sut.clock = MagicMock(return_value=1000.0)
+        queue_monitor.get_snapshots.return_value = {}
+
+        sut.scale()
+
+        assert sut.last_tick_at == 1000.0
+        assert sut.last_fresh_at == 1000.0
+        assert sut.last_error is None
+
+    def test_tracks_fetch_errors(self, sut, queue_monitor):
+        sut.clock = MagicMock(return_value=1000.0)
+        sut.last_fresh_at = 900.0
+        queue_monitor.get_snapshots.side_effect = Exception("RabbitMQ unavailable")
+
+        sut.scale()
+
+        assert sut.last_tick_at == 1000.0
+        assert sut.last_fresh_at == 900.0
+        assert sut.last_error == "RabbitMQ unavailable"
+
+    def test_tracks_tick_that_raised(self, sut, queue_monitor):
+        sut.clock = MagicMock(return_value=1000.0)
+        sut.elector = MagicMock(spec=LeaderElector)
+        sut.elector.is_leader.side_effect = Exception("unexpected")
+
+        with pytest.raises(Exception):
+            sut.scale()
+        assert sut.last_tick_at == 1000.0
+
+    def test_status(self, sut, scalers):
+        scalers[0].status = {"service_name": "forseti_a"}
+        scalers[1].status = {"service_name": "forseti_b"}
+
+        status = sut.status()
+
+        assert status["leader"] is True
+        assert status["services"] == [{"service_name": "forseti_a"}, {"service_name": "forseti_b"}]
+
+    def test_status_as_follower(self, sut, scalers):
+        sut.elector = MagicMock(spec=LeaderElector, leader=False)
+        scalers[0].status = scalers[1].status = {}
+
+        assert sut.status()["leader"] is False
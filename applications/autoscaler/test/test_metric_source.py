@@ -0,0 +1,79 @@
+import pytest
+
+from autoscaler.metric_source import MetricSource, PrometheusMetricSource, check_prometheus
+
+
+class TestMetricSource:
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            MetricSource()
+
+
+class TestPrometheusMetricSource:
+    def test_vector(self, prometheus):
+        query = 'sum by (service) (rate(traefik_service_requests_total{service="api@swarm"}[1m]))'
+        prometheus.results[query] = {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"code": "200"}, "value": [1700000000, "12.5"]},
+                {"metric": {"code": "500"}, "value": [1700000000, "0.5"]},
+            ],
+        }
+        sut = PrometheusMetricSource(url=prometheus.url, query=query)
+
+        assert sut.get_value() == 13.0
+        assert prometheus.queries == [query]
+
+    def test_get_values(self, prometheus):
+        prometheus.results["up"] = {
+            "resultType": "vector",
+            "result": [{"metric": {"job": "a"}, "value": [1700000000, "1"]}, {"metric": {"job": "b"}, "value": [1700000000, "0"]}],
+        }
+        sut = PrometheusMetricSource(url=prometheus.url, query="up")
+
+        assert sut.get_values() == [1.0, 0.0]
+
+    def test_empty_vector(self, prometheus):
+        prometheus.results["socketio_connected"] = {"resultType": "vector", "result": []}
+        sut = PrometheusMetricSource(url=prometheus.url, query="socketio_connected")
+
+        assert sut.get_value() == 0
+
+    def test_scalar(self, prometheus):
+        prometheus.results["scalar(vector(42))"] = {"resultType": "scalar", "result": [1700000000, "42"]}
+        sut = PrometheusMetricSource(url=prometheus.url, query="scalar(vector(42))")
+
+        assert sut.get_value() == 42
+
+    def test_matrix(self, prometheus):
+        prometheus.results["up[1m]"] = {"resultType": "matrix", "result": []}
+        sut = PrometheusMetricSource(url=prometheus.url, query="up[1m]")
+
+        with pytest.raises(ValueError):
+            sut.get_value()
+
+    def test_query_error(self, prometheus):
+        sut = PrometheusMetricSource(url=prometheus.url, query="rate(")
+
+        with pytest.raises(Exception):
+            sut.get_value()
+
+    def test_error_status(self, prometheus):
+        prometheus.results["up"] = None
+        sut = PrometheusMetricSource(url=prometheus.url, query="up")
+
+        with pytest.raises(ValueError):
+            sut.get_value()
+
+
+class TestCheckPrometheus:
+    def test_ready(self, prometheus):
+        check_prometheus(prometheus.url)
+
+    def test_unreachable(self, prometheus):
+        url = prometheus.url
+        prometheus.shutdown()
+        prometheus.server_close()
+
+        with pytest.raises(ValueError):
+            check_prometheus(url, timeout=1)
@@ -0,0 +1,211 @@
+import pytest
+
+from autoscaler.policy import (
+    CompositePolicy,
+    DepthPolicy,
+    MetricPolicy,
+    Policy,
+    PredictivePolicy,
+    QueueWaitPolicy,
+    RatePolicy,
+    Sample,
+    UtilisationPolicy,
+)
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.utilisation import Utilisation
+
+
+def sample(timestamp, messages, replicas, **queue):
+    return Sample(timestamp=timestamp, replicas=replicas, queue=QueueSnapshot(messages=messages, **queue))
+
+
+class TestSample:
+    def test_head_message_age(self):
+        assert sample(100, 1, 1, head_message_timestamp=90).head_message_age == 10
+        assert sample(100, 1, 1, head_message_timestamp=110).head_message_age == 0
+        assert sample(100, 0, 1).head_message_age == 0
+
+
+class TestPolicy:
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            Policy()
+
+
+class TestDepthPolicy:
+    @pytest.fixture
+    def sut(self):
+        yield DepthPolicy(messages_per_replica=5)
+
+    def test_recommend(self, sut: DepthPolicy):
+        assert sut.recommend(sample(0, 0, 1)) == 0
+        assert sut.recommend(sample(0, 5, 1)) == 1
+        assert sut.recommend(sample(0, 6, 1)) == 2
+
+    def test_desired_is_unrounded(self, sut: DepthPolicy):
+        assert sut.desired(sample(0, 16, 3)) == 3.2
+
+    def test_recommend_without_messages_per_replica(self):
+        sut = DepthPolicy(messages_per_replica=0)
+
+        assert sut.recommend(sample(0, 10, 1)) == 0
+
+
+class TestPredictivePolicy:
+    @pytest.fixture
+    def sut(self):
+        yield PredictivePolicy(messages_per_replica=5, cold_start=30, window=60)
+
+    def test_single_sample_behaves_as_depth(self, sut: PredictivePolicy):
+        current = sample(0, 12, 1)
+        sut.observe(current)
+
+        assert sut.recommend(current) == 3
+
+    def test_growing_queue_is_projected_ahead(self, sut: PredictivePolicy):
+        for i in range(6):
+            current = sample(i * 10, i * 10, 1)
+            sut.observe(current)
+
+        level, trend = sut.forecast()
+        assert trend > 0
+        assert sut.projected_messages() > 50
+        assert sut.recommend(current) > DepthPolicy(5).recommend(current)
+
+    def test_draining_queue_is_never_projected_below_zero(self, sut: PredictivePolicy):
+        for i in range(6):
+            current = sample(i * 10, 50 - i * 10, 3)
+            sut.observe(current)
+
+        assert sut.forecast()[1] < 0
+        assert sut.projected_messages() == 0
+        assert sut.recommend(current) == 0
+
+    def test_window_discards_old_samples(self, sut: PredictivePolicy):
+        sut.observe(sample(0, 100, 1))
+        sut.observe(sample(50, 0, 1))
+        sut.observe(sample(100, 0, 1))
+
+        assert [s.timestamp for s in sut.samples] == [50, 100]
+        assert sut.forecast() == (0.0, 0.0)
+
+    def test_forecast_without_samples(self, sut: PredictivePolicy):
+        assert sut.forecast() == (0.0, 0.0)
+
+    def test_forecast_ignores_duplicated_timestamps(self, sut: PredictivePolicy):
+        sut.observe(sample(0, 10, 1))
+        sut.observe(sample(0, 20, 1))
+
+        assert sut.forecast() == (10.0, 0.0)
+
+
+class TestRatePolicy:
+    @pytest.fixture
+    def sut(self):
+        yield RatePolicy(per_replica_ack_rate=0.1, backlog_drain_time=60)
+
+    def test_recommend_from_publish_rate(self, sut: RatePolicy):
+        assert sut.recommend(sample(0, 0, 1, publish_rate=0.3)) == 3
+
+    def test_recommend_includes_backlog(self, sut: RatePolicy):
+        assert sut.recommend(sample(0, 12, 1, messages_ready=12, publish_rate=0.1)) == 3
+
+    def test_drained_burst_does_not_overscale(self, sut: RatePolicy):
+        assert sut.recommend(sample(0, 0, 3, publish_rate=0.0)) == 0
+
+    def test_keeps_judges_with_messages_in_flight(self, sut: RatePolicy):
+        assert sut.recommend(sample(0, 2, 3, messages_unacknowledged=2, publish_rate=0.0)) == 2
+
+    def test_in_flight_floor_uses_concurrency(self):
+        sut = RatePolicy(per_replica_ack_rate=0.1, max_concurrent_submissions=2)
+
+        assert sut.recommend(sample(0, 3, 3, messages_unacknowledged=3, publish_rate=0.0)) == 2
+
+    def test_learns_per_replica_rate_while_saturated(self, sut: RatePolicy):
+        sut.observe(sample(0, 10, 2, messages_ready=8, consumers=2, ack_rate=1.0))
+
+        assert sut.per_replica_ack_rate == pytest.approx(0.3 * 0.5 + 0.7 * 0.1)
+
+    def test_does_not_learn_while_idle(self, sut: RatePolicy):
+        sut.observe(sample(0, 0, 2, consumers=2, ack_rate=0.05))
+
+        assert sut.per_replica_ack_rate == 0.1
+
+    def test_recommend_without_rate(self):
+        sut = RatePolicy(per_replica_ack_rate=0)
+
+        assert sut.recommend(sample(0, 10, 1, publish_rate=1.0)) == 0
+        assert sut.recommend(sample(0, 1, 1, messages_unacknowledged=1)) == 1
+
+
+class TestQueueWaitPolicy:
+    @pytest.fixture
+    def sut(self):
+        yield QueueWaitPolicy(max_queue_wait=15)
+
+    def test_scales_out_proportionally(self, sut: QueueWaitPolicy):
+        assert sut.recommend(sample(100, 20, 2, head_message_timestamp=55)) == 6
+
+    def test_scales_out_at_least_one_replica(self, sut: QueueWaitPolicy):
+        assert sut.recommend(sample(100, 20, 2, head_message_timestamp=84)) == 3
+
+    def test_holds_near_target(self, sut: QueueWaitPolicy):
+        assert sut.recommend(sample(100, 5, 2, head_message_timestamp=90)) == 2
+
+    def test_scales_in_far_below_target(self, sut: QueueWaitPolicy):
+        assert sut.recommend(sample(100, 0, 2)) == 1
+
+    def test_wakes_up_from_zero_replicas(self, sut: QueueWaitPolicy):
+        assert sut.recommend(sample(100, 1, 0, head_message_timestamp=100)) == 1
+        assert sut.recommend(sample(100, 0, 0)) == 0
+
+
+class TestUtilisationPolicy:
+    @pytest.fixture
+    def sut(self):
+        yield UtilisationPolicy(target_utilisation=0.8)
+
+    def test_recommend(self, sut: UtilisationPolicy):
+        assert sut.recommend(Sample(timestamp=0, replicas=2, queue=QueueSnapshot(messages=0), utilisation=Utilisation(cpu=0.8, memory=0.1))) == 2
+        assert sut.recommend(Sample(timestamp=0, replicas=2, queue=QueueSnapshot(messages=0), utilisation=Utilisation(cpu=1.0, memory=0.1))) == 3
+        assert sut.recommend(Sample(timestamp=0, replicas=4, queue=QueueSnapshot(messages=0), utilisation=Utilisation(cpu=0.1, memory=0.3))) == 1
+
+    def test_memory_does_not_scale(self, sut: UtilisationPolicy):
+        assert sut.recommend(Sample(timestamp=0, replicas=2, queue=QueueSnapshot(messages=0), utilisation=Utilisation(cpu=0.4, memory=0.95))) == 1
+
+    def test_recommend_without_utilisation(self, sut: UtilisationPolicy):
+        assert sut.recommend(sample(0, 0, 2)) == 0
+
+
+class TestCompositePolicy:
+    @pytest.fixture
+    def sut(self):
+        yield CompositePolicy([DepthPolicy(messages_per_replica=5), UtilisationPolicy(target_utilisation=0.5)])
+
+    def test_name(self, sut: CompositePolicy):
+        assert sut.name == "depth+utilisation"
+
+    def test_recommend_max(self, sut: CompositePolicy):
+        saturated = Sample(timestamp=0, replicas=2, queue=QueueSnapshot(messages=1), utilisation=Utilisation(cpu=1.0, memory=0.2))
+        backlog = Sample(timestamp=0, replicas=2, queue=QueueSnapshot(messages=20), utilisation=Utilisation(cpu=0.5, memory=0.2))
+
+        assert sut.recommend(saturated) == 4
+        assert sut.recommend(backlog) == 4
+
+    def test_observe_all(self):
+        predictive = PredictivePolicy(messages_per_replica=5, cold_start=30)
+        sut = CompositePolicy([predictive, UtilisationPolicy(target_utilisation=0.5)])
+
+        sut.observe(sample(0, 10, 1))
+
+        assert len(predictive.samples) == 1
+
+
+class TestMetricPolicy:
+    def test_recommend(self):
+        sut = MetricPolicy(target_value=50)
+
+        assert sut.recommend(Sample(timestamp=0, replicas=1, queue=QueueSnapshot(messages=0), metric=120)) == 3
+        assert sut.recommend(Sample(timestamp=0, replicas=1, queue=QueueSnapshot(messages=0), metric=100)) == 2
+        assert sut.recommend(Sample(timestamp=0, replicas=1, queue=QueueSnapshot(messages=0), metric=-1)) == 0
+        assert sut.recommend(sample(0, 0, 1)) == 0
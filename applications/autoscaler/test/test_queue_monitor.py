@@ -2,7 +2,8 @@ from unittest.mock import patch
 import urllib
 import pytest
 
-from autoscaler.queue_monitor import QueueMonitor
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.queue_monitor import ConsumerSnapshot, QueueMonitor, QueueSnapshot
 
 BASE_PATH = "autoscaler.queue_monitor"
 
@@ -22,17 +23,109 @@ class TestQueueMonitor:
 
     @pytest.fixture
     def sut(self):
-        yield QueueMonitor(queue_name=self.queue_name, host=self.host, port=self.port, vhost=self.vhost, username=self.username, password=self.password)
+        yield QueueMonitor(host=self.host, port=self.port, vhost=self.vhost, username=self.username, password=self.password)
+
+    def test_session(self, sut: QueueMonitor, requests):
+        assert sut.session is requests.Session.return_value
+        assert sut.session.auth == (self.username, self.password)
 
     def test_get_number_of_messages(self, sut: QueueMonitor, requests):
-        requests.get.return_value.status_code = 200
-        requests.get.return_value.json.return_value = {
+        requests.Session.return_value.get.return_value.status_code = 200
+        requests.Session.return_value.get.return_value.json.return_value = {
             "messages": 5,
         }
 
-        assert sut.get_number_of_messages() == 5
-        assert requests.get.call_count == 1
-        requests.get.assert_called_with(
+        assert sut.get_number_of_messages(self.queue_name) == 5
+        assert requests.Session.return_value.get.call_count == 1
+        requests.Session.return_value.get.assert_called_with(
             f"http://{self.host}:{self.port}/api/queues/{urllib.parse.quote(self.vhost, safe='')}/{self.queue_name}",
-            auth=(self.username, self.password),
+            timeout=5,
+        )
+
+    def test_get_snapshot(self, sut: QueueMonitor, requests):
+        requests.Session.return_value.get.return_value.json.return_value = {
+            "messages": 7,
+            "messages_ready": 5,
+            "messages_unacknowledged": 2,
+            "consumers": 2,
+            "consumer_utilisation": 0.75,
+            "head_message_timestamp": 1700000000,
+            "message_stats": {
+                "publish_details": {"rate": 1.5},
+                "ack": 42,
+                "ack_details": {"rate": 0.5},
+                "deliver_get_details": {"rate": 0.6},
+            },
+        }
+
+        snapshot = sut.get_snapshot(self.queue_name)
+
+        assert snapshot == QueueSnapshot(
+            messages=7,
+            messages_ready=5,
+            messages_unacknowledged=2,
+            consumers=2,
+            consumer_utilisation=0.75,
+            publish_rate=1.5,
+            ack_rate=0.5,
+            deliver_get_rate=0.6,
+            head_message_timestamp=1700000000,
+            acks=42,
         )
+
+    def test_get_snapshot_without_message_stats(self, sut: QueueMonitor, requests):
+        requests.Session.return_value.get.return_value.json.return_value = {"messages": 0}
+
+        snapshot = sut.get_snapshot(self.queue_name)
+
+        assert snapshot == QueueSnapshot(messages=0)
+
+    def test_get_snapshots(self, sut: QueueMonitor, requests):
+        requests.Session.return_value.get.return_value.json.return_value = [
+            {"name": "queue_a", "messages": 3},
+            {"name": "queue_b", "messages": 0},
+        ]
+
+        snapshots = sut.get_snapshots()
+
+        assert snapshots == {
+            "queue_a": QueueSnapshot(messages=3),
+            "queue_b": QueueSnapshot(messages=0),
+        }
+        requests.Session.return_value.get.assert_called_once_with(
+            f"http://{self.host}:{self.port}/api/queues/{urllib.parse.quote(self.vhost, safe='')}",
+            timeout=5,
+        )
+
+    def test_get_consumers(self, sut: QueueMonitor, requests):
+        channels = [
+            {"name": "10.0.0.2:1 -> 10.0.0.9:5672 (1)", "messages_unacknowledged": 1},
+            {"name": "10.0.0.3:1 -> 10.0.0.9:5672 (1)", "messages_unacknowledged": 0},
+        ]
+        consumers = [
+            {"queue": {"name": self.queue_name}, "channel_details": {"name": "10.0.0.2:1 -> 10.0.0.9:5672 (1)", "peer_host": "10.0.0.2"}},
+            {"queue": {"name": self.queue_name}, "channel_details": {"name": "10.0.0.3:1 -> 10.0.0.9:5672 (1)", "peer_host": "10.0.0.3"}},
+            {"queue": {"name": "other"}, "channel_details": {"name": "other (1)", "peer_host": "10.0.0.4"}},
+        ]
+        requests.Session.return_value.get.return_value.json.side_effect = [channels, consumers]
+
+        assert sut.get_consumers(self.queue_name) == [
+            ConsumerSnapshot(peer_host="10.0.0.2", channel="10.0.0.2:1 -> 10.0.0.9:5672 (1)", messages_unacknowledged=1),
+            ConsumerSnapshot(peer_host="10.0.0.3", channel="10.0.0.3:1 -> 10.0.0.9:5672 (1)", messages_unacknowledged=0),
+        ]
+        vhost = urllib.parse.quote(self.vhost, safe="")
+        assert [c.args[0] for c in requests.Session.return_value.get.call_args_list] == [
+            f"http://{self.host}:{self.port}/api/vhosts/{vhost}/channels",
+            f"http://{self.host}:{self.port}/api/consumers/{vhost}",
+        ]
+
+    def test_breaker_opens_on_failures(self, sut: QueueMonitor, requests):
+        requests.Session.return_value.get.side_effect = Exception("timeout")
+
+        for _ in range(3):
+            with pytest.raises(Exception):
+                sut.get_snapshots()
+
+        with pytest.raises(CircuitOpenError):
+            sut.get_snapshots()
+        assert requests.Session.return_value.get.call_count == 3
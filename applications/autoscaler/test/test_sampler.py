@@ -0,0 +1,137 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+from autoscaler.sampler import QueueSampler, QueueStats, ewma, window_stats
+
+
+class TestWindowStats:
+    def test_ewma(self):
+        assert ewma([10], 0.5) == 10
+        assert ewma([0, 10, 10], 0.5) == 7.5
+
+    def test_window_stats(self):
+        assert window_stats([1, 9, 2, 3], 0.5) == QueueStats(last=3, median=2.5, max=9, ewma=3.25, samples=4)
+
+
+class TestQueueSampler:
+    @pytest.fixture
+    def queue_monitor(self):
+        yield MagicMock(spec=QueueMonitor)
+
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 1000.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, queue_monitor, clock):
+        yield QueueSampler(queue_monitor=queue_monitor, window=3, statistic="median", alpha=0.5, max_age=3, clock=clock)
+
+    def feed(self, sut, queue_monitor, *depths):
+        for depth in depths:
+            queue_monitor.get_snapshots.return_value = {
+                "submission-queue": QueueSnapshot(messages=depth, messages_ready=depth, consumers=2),
+            }
+            sut.sample()
+
+    def test_unknown_statistic(self, queue_monitor):
+        with pytest.raises(ValueError):
+            QueueSampler(queue_monitor=queue_monitor, statistic="mean")
+
+    def test_ignores_single_noisy_read(self, sut, queue_monitor):
+        self.feed(sut, queue_monitor, 5, 300, 5)
+
+        assert sut.get_snapshots() == {"submission-queue": QueueSnapshot(messages=5, messages_ready=5, consumers=2)}
+
+    def test_keeps_fixed_size_window(self, sut, queue_monitor):
+        self.feed(sut, queue_monitor, 100, 1, 2, 3)
+
+        assert len(sut.buffers["submission-queue"]) == 3
+        assert sut.stats("submission-queue") == QueueStats(last=3, median=2, max=3, ewma=2.25, samples=3)
+
+    @pytest.mark.parametrize("statistic, expected", [("last", 5), ("median", 10), ("max", 40), ("ewma", 15)])
+    def test_statistics(self, sut, queue_monitor, statistic, expected):
+        sut.statistic = statistic
+        self.feed(sut, queue_monitor, 10, 40, 5)
+
+        assert sut.get_snapshots()["submission-queue"].messages == expected
+
+    def test_exports_statistics(self, sut, queue_monitor):
+        self.feed(sut, queue_monitor, 10, 40, 5)
+
+        sut.get_snapshots()
+
+        assert REGISTRY.get_sample_value("autoscaler_smoothed_messages", {"queue_name": "submission-queue", "statistic": "max"}) == 40
+        assert REGISTRY.get_sample_value("autoscaler_smoothed_messages", {"queue_name": "submission-queue", "statistic": "median"}) == 10
+
+    def test_latest(self, sut, queue_monitor):
+        assert sut.latest("submission-queue") is None
+
+        self.feed(sut, queue_monitor, 5, 300)
+
+        assert sut.latest("submission-queue") == QueueSnapshot(messages=300, messages_ready=300, consumers=2)
+
+    def test_stats_without_samples(self, sut):
+        assert sut.stats("submission-queue") is None
+
+    def test_samples_before_first_tick(self, sut, queue_monitor):
+        queue_monitor.get_snapshots.return_value = {"submission-queue": QueueSnapshot(messages=2)}
+
+        assert sut.get_snapshots()["submission-queue"].messages == 2
+        queue_monitor.get_snapshots.assert_called_once()
+
+    def test_first_tick_waits_for_running_sample(self, sut, queue_monitor):
+        started, release = threading.Event(), threading.Event()
+
+        def get_snapshots():
+            started.set()
+            release.wait(1)
+            return {"submission-queue": QueueSnapshot(messages=2)}
+
+        queue_monitor.get_snapshots.side_effect = get_snapshots
+        sampling = threading.Thread(target=sut.sample)
+        sampling.start()
+        started.wait(1)
+        threading.Timer(0.05, release.set).start()
+
+        assert sut.get_snapshots()["submission-queue"].messages == 2
+        sampling.join()
+        queue_monitor.get_snapshots.assert_called_once()
+
+    def test_stale_samples(self, sut, queue_monitor, clock):
+        self.feed(sut, queue_monitor, 1)
+        clock.return_value = 1004.0
+
+        with pytest.raises(RuntimeError):
+            sut.get_snapshots()
+
+    def test_raises_last_sampling_error(self, sut, queue_monitor, clock):
+        self.feed(sut, queue_monitor, 1)
+        queue_monitor.get_snapshots.side_effect = CircuitOpenError("Circuit breaker for rabbitmq is open")
+        with pytest.raises(CircuitOpenError):
+            sut.sample()
+        clock.return_value = 1004.0
+
+        with pytest.raises(CircuitOpenError):
+            sut.get_snapshots()
+
+    def test_recent_samples_survive_failed_read(self, sut, queue_monitor, clock):
+        self.feed(sut, queue_monitor, 4)
+        queue_monitor.get_snapshots.side_effect = Exception("timeout")
+        with pytest.raises(Exception):
+            sut.sample()
+        clock.return_value = 1002.0
+
+        assert sut.get_snapshots()["submission-queue"].messages == 4
+
+    def test_never_smooths_waiting_message_to_empty(self, sut, queue_monitor):
+        self.feed(sut, queue_monitor, 0, 0, 1)
+
+        assert sut.get_snapshots()["submission-queue"].messages == 1
+        assert sut.get_snapshots()["submission-queue"].messages_ready == 1
@@ -1,10 +1,25 @@
 from unittest.mock import MagicMock
 
 import pytest
-
-from autoscaler.queue_monitor import QueueMonitor
-from autoscaler.scaler import Scaler
+from prometheus_client import REGISTRY
+
+from autoscaler.behavior import Behavior, ScalingRules
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.budget import ReplicaBudget
+from autoscaler.burst import BurstDetector
+from autoscaler.capacity import CapacityModel
+from autoscaler.drainer import IdleDrainer
+from autoscaler.leader import LeaseLostError
+from autoscaler.metric_source import MetricSource
+from autoscaler.policy import CompositePolicy, DepthPolicy, MetricPolicy, Policy, Sample, UtilisationPolicy
+from autoscaler.queue_monitor import QueueMonitor, QueueSnapshot
+from autoscaler.scaler import ScaleAction, Scaler
+from autoscaler.schedule import ContestSchedule
 from autoscaler.service_monitor import ServiceMonitor
+from autoscaler.shadow import ShadowPolicy
+from autoscaler.state import StateStore, dump_sample
+from autoscaler.trace import TraceRecorder
+from autoscaler.utilisation import Utilisation, UtilisationMonitor
 
 BASE_PATH = "autoscaler.scaler"
 
@@ -19,18 +34,27 @@ class TestScaler:
         yield MagicMock(spec=ServiceMonitor, service_name="service_name")
 
     @pytest.fixture
-    def sut(self, queue_monitor, service_monitor):
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 1000.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, queue_monitor, service_monitor, clock):
         return Scaler(
             queue_monitor=queue_monitor,
             service_monitor=service_monitor,
+            queue_name="queue_name",
             cooldown=60,
             messages_per_replica=1,
             min_replicas=1,
-            max_replicas=2
+            max_replicas=2,
+            convergence_timeout=120,
+            clock=clock,
         )
 
     def test_less_than_min_replica(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
         service_monitor.get_current_replicas.return_value = 0
 
         sut.scale()
@@ -38,7 +62,7 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(1)
 
     def test_less_than_desired_replicas_within_quota(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
         service_monitor.get_current_replicas.return_value = 1
 
         sut.scale()
@@ -46,7 +70,7 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(2)
 
     def test_less_than_desired_replicas_exceeding_quota(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 3
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=3)
         service_monitor.get_current_replicas.return_value = 1
 
         sut.scale()
@@ -54,7 +78,7 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(2)
 
     def test_equal_as_desired_replicas(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
         service_monitor.get_current_replicas.return_value = 2
 
         sut.scale()
@@ -62,7 +86,7 @@ class TestScaler:
         service_monitor.scale.assert_not_called()
 
     def test_more_than_max_replicas(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 3
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=3)
         service_monitor.get_current_replicas.return_value = 3
 
         sut.scale()
@@ -70,7 +94,7 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(2)
 
     def test_more_than_desired_replicas_within_quota(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
         service_monitor.get_current_replicas.return_value = 2
 
         sut.scale()
@@ -78,7 +102,7 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(1)
 
     def test_more_than_desired_replicas_exceeding_quota(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
         service_monitor.get_current_replicas.return_value = 2
 
         sut.scale()
@@ -86,14 +110,755 @@ class TestScaler:
         service_monitor.scale.assert_called_once_with(1)
 
     def test_cooling_down(self, sut, queue_monitor, service_monitor):
-        queue_monitor.get_number_of_messages.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
         service_monitor.get_current_replicas.return_value = 1
 
         sut.scale()
         assert service_monitor.scale.call_count == 1
 
-        queue_monitor.get_number_of_messages.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
         service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 2
 
         sut.scale()
         assert service_monitor.scale.call_count == 1
+        assert sut.pending_action is None
+
+    def test_burst_ignores_cooldown(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 10
+        sut.behavior = Behavior(scale_up=ScalingRules(stabilization_window=60))
+        sut.burst = BurstDetector(factor=3, per_replica_ack_rate=0.5, drain_time=60)
+        sut.last_scale_time = 990.0
+        sut.last_direction = "down"
+        sut.pending_action = ScaleAction(direction="down", replicas=1, started_at=990.0, deadline=1110.0)
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.get_running_tasks.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        sut.scale()
+        before = REGISTRY.get_sample_value("autoscaler_scaling_count_total", {"service_name": "service_name", "direction": "burst"}) or 0
+
+        clock.return_value = 1010.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=300)
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(10)
+        assert sut.status["action"] == "burst"
+        assert sut.status["burst"] is True
+        assert sut.last_direction == "up"
+        assert sut.pending_action.direction == "up"
+        assert REGISTRY.get_sample_value("autoscaler_scaling_count_total", {"service_name": "service_name", "direction": "burst"}) == before + 1
+
+    def test_burst_on_latest_raw_depth(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 10
+        sut.burst = BurstDetector(factor=3, per_replica_ack_rate=0.5, drain_time=60)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale(queue=QueueSnapshot(messages=0), latest=QueueSnapshot(messages=0))
+
+        clock.return_value = 1010.0
+        # The smoothed depth has not caught up with the burst yet
+        sut.scale(queue=QueueSnapshot(messages=1), latest=QueueSnapshot(messages=300))
+
+        service_monitor.scale.assert_called_once_with(10)
+        assert sut.status["burst"] is True
+
+    def test_burst_below_desired_replicas(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 10
+        sut.burst = BurstDetector(factor=0, per_replica_ack_rate=10, drain_time=60)
+        service_monitor.get_current_replicas.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        sut.scale()
+
+        clock.return_value = 1010.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=8)
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(8)
+        assert sut.status["action"] == "up"
+
+    def test_burst_is_held_on_stale_metric(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 10
+        sut.burst = BurstDetector(factor=3, per_replica_ack_rate=0.5, drain_time=60)
+        sut.metric_source = MagicMock(spec=MetricSource)
+        sut.metric_source.get_value.return_value = 0
+        service_monitor.get_current_replicas.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        sut.scale()
+
+        clock.return_value = 1010.0
+        sut.metric_source.get_value.side_effect = Exception("Prometheus unavailable")
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=300)
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+
+    def test_wakes_from_zero(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.max_replicas = 10
+        sut.wake_replicas = 3
+        sut.last_scale_time = 990.0
+        sut.last_direction = "down"
+        service_monitor.get_current_replicas.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        before = REGISTRY.get_sample_value("autoscaler_scaling_count_total", {"service_name": "service_name", "direction": "wake"}) or 0
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(3)
+        assert sut.status["action"] == "wake"
+        assert sut.last_direction == "up"
+        assert REGISTRY.get_sample_value("autoscaler_scaling_count_total", {"service_name": "service_name", "direction": "wake"}) == before + 1
+
+    def test_wakes_within_max_replicas(self, sut, queue_monitor, service_monitor):
+        sut.min_replicas = 0
+        sut.wake_replicas = 5
+        service_monitor.get_current_replicas.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_stays_at_zero_without_messages(self, sut, queue_monitor, service_monitor):
+        sut.min_replicas = 0
+        sut.wake_replicas = 3
+        service_monitor.get_current_replicas.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+        assert sut.status["wake"] is False
+
+    def test_reaps_idle_replicas_after_idle_timeout(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.idle_timeout = 300
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.get_running_tasks.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+
+        sut.scale()
+        clock.return_value = 1299.0
+        sut.scale()
+        service_monitor.scale.assert_not_called()
+
+        clock.return_value = 1300.0
+        sut.scale()
+        service_monitor.scale.assert_called_once_with(0)
+
+    def test_idle_queue_overrides_utilisation_after_idle_timeout(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.idle_timeout = 300
+        sut.policy = CompositePolicy([DepthPolicy(messages_per_replica=1), UtilisationPolicy(target_utilisation=0.8)])
+        sut.utilisation_monitor = MagicMock(spec=UtilisationMonitor)
+        sut.utilisation_monitor.get_utilisation.return_value = Utilisation(cpu=0.5, memory=0.5)
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.get_running_tasks.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+
+        sut.scale()
+        clock.return_value = 1299.0
+        sut.scale()
+        service_monitor.scale.assert_not_called()
+        assert sut.status["desired_replicas"] == 1
+
+        clock.return_value = 1300.0
+        sut.scale()
+        service_monitor.scale.assert_called_once_with(0)
+
+    def test_idle_queue_keeps_prewarm_floor(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.idle_timeout = 300
+        sut.get_min_replicas = MagicMock(return_value=2)
+        service_monitor.get_current_replicas.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+
+        sut.scale()
+        clock.return_value = 1300.0
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+        assert sut.status["desired_replicas"] == 2
+
+    def test_message_resets_idle_period(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.idle_timeout = 300
+        service_monitor.get_current_replicas.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        sut.scale()
+        clock.return_value = 1200.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        sut.scale()
+
+        clock.return_value = 1300.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+        assert sut.idle_since == 1300.0
+
+    def test_busy_judge_resets_idle_period(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        sut.idle_timeout = 300
+        service_monitor.get_current_replicas.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0, messages_unacknowledged=1)
+        sut.scale()
+
+        clock.return_value = 1300.0
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+        assert sut.idle_since is None
+
+    def test_first_verdict_after_idle(self, sut, queue_monitor, service_monitor, clock):
+        sut.min_replicas = 0
+        before = REGISTRY.get_sample_value("autoscaler_first_verdict_after_idle_seconds_count", {"service_name": "service_name"}) or 0
+        service_monitor.get_current_replicas.return_value = 0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2, messages_ready=2, acks=40)
+        sut.scale()
+
+        clock.return_value = 1030.0
+        service_monitor.get_current_replicas.return_value = 2
+        sut.scale()
+        assert sut.woken_at == (1000.0, 40)
+
+        # Delivered to a judge, not judged yet
+        clock.return_value = 1040.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2, messages_ready=1, messages_unacknowledged=1, acks=40)
+        sut.scale()
+        assert sut.woken_at == (1000.0, 40)
+
+        clock.return_value = 1045.0
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1, messages_ready=0, messages_unacknowledged=1, acks=41)
+        sut.scale()
+
+        assert sut.woken_at is None
+        assert REGISTRY.get_sample_value("autoscaler_first_verdict_after_idle_seconds_count", {"service_name": "service_name"}) == before + 1
+        assert REGISTRY.get_sample_value("autoscaler_first_verdict_after_idle_seconds_bucket", {"service_name": "service_name", "le": "45.0"}) >= 1
+
+    def test_evaluates_shadow_policies(self, sut, queue_monitor, service_monitor):
+        shadows = [MagicMock(spec=ShadowPolicy), MagicMock(spec=ShadowPolicy)]
+        shadows[0].evaluate.return_value = 4
+        sut.shadows = shadows
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        sample = shadows[0].evaluate.call_args.args[0]
+        assert sample.messages == 1
+        shadows[1].evaluate.assert_called_once_with(sample, 1)
+        service_monitor.scale.assert_not_called()
+
+    def test_shadows_share_the_prewarmed_minimum(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 5
+        sut.prewarm_replicas = 3
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_warm.return_value = True
+        sut.shadows = [MagicMock(spec=ShadowPolicy)]
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 3
+
+        sut.scale()
+
+        assert sut.shadows[0].evaluate.call_args.args[1] == 3
+
+    def test_custom_policy(self, queue_monitor, service_monitor):
+        policy = MagicMock(spec=Policy)
+        policy.name = "custom"
+        policy.desired.return_value = 2
+        sut = Scaler(
+            queue_monitor=queue_monitor,
+            service_monitor=service_monitor,
+            queue_name="queue_name",
+            cooldown=60,
+            messages_per_replica=1,
+            min_replicas=1,
+            max_replicas=2,
+            policy=policy,
+        )
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        policy.observe.assert_called_once()
+        sample = policy.observe.call_args.args[0]
+        assert sample.messages == 0
+        assert sample.replicas == 1
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_provided_snapshot(self, sut, queue_monitor, service_monitor):
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale(queue=QueueSnapshot(messages=2))
+
+        queue_monitor.get_snapshot.assert_not_called()
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_fetches_snapshot_of_own_queue(self, sut, queue_monitor, service_monitor):
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        queue_monitor.get_snapshot.assert_called_once_with("queue_name")
+
+    def test_waits_for_convergence(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 5
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale()
+
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=4)
+        service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 1
+        clock.return_value = 1010.0
+        sut.scale()
+        assert service_monitor.scale.call_count == 1
+        assert sut.pending_action.replicas == 2
+
+        service_monitor.get_running_tasks.return_value = 2
+        clock.return_value = 1020.0
+        sut.scale()
+        assert service_monitor.scale.call_count == 2
+        service_monitor.scale.assert_called_with(4)
+        assert sut.pending_action.started_at == 1020.0
+
+    def test_convergence_deadline(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 5
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale()
+
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=4)
+        service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 1
+        clock.return_value = 1120.0
+        sut.scale()
+
+        assert service_monitor.scale.call_count == 2
+        service_monitor.scale.assert_called_with(4)
+
+    def test_reverse_direction_after_cooldown(self, sut, queue_monitor, service_monitor, clock):
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale()
+
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 2
+        clock.return_value = 1060.0
+        sut.scale()
+
+        assert service_monitor.scale.call_count == 2
+        service_monitor.scale.assert_called_with(1)
+
+    def test_applies_behavior(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.behavior = Behavior(scale_up=ScalingRules(max_step=2))
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=8)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(3)
+
+    def test_scale_in_through_drainer(self, sut, queue_monitor, service_monitor):
+        sut.drainer = MagicMock(spec=IdleDrainer)
+        sut.drainer.scale_in.return_value = 1
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        sut.drainer.scale_in.assert_called_once_with(service_monitor, "queue_name", 2, 1)
+        service_monitor.scale.assert_not_called()
+        assert sut.pending_action.replicas == 1
+
+    def test_postponed_scale_in(self, sut, queue_monitor, service_monitor):
+        sut.drainer = MagicMock(spec=IdleDrainer)
+        sut.drainer.scale_in.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        assert sut.pending_action is None
+        assert sut.last_scale_time is None
+
+    def test_records_trace(self, sut, queue_monitor, service_monitor):
+        sut.recorder = MagicMock(spec=TraceRecorder)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        sample = sut.recorder.record.call_args.args[1]
+        sut.recorder.record.assert_called_once_with("service_name", sample, 2, "up")
+        assert sample.replicas == 1
+
+    def test_prewarm_raises_min_replicas(self, sut, queue_monitor, service_monitor, clock):
+        sut.max_replicas = 5
+        sut.prewarm_replicas = 3
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_warm.return_value = True
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        sut.schedule.is_warm.assert_called_once_with(1000.0)
+        service_monitor.scale.assert_called_once_with(3)
+
+    def test_prewarm_is_capped_by_max_replicas(self, sut, queue_monitor, service_monitor):
+        sut.prewarm_replicas = 3
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_warm.return_value = True
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_prewarm_released(self, sut, queue_monitor, service_monitor):
+        sut.prewarm_replicas = 2
+        sut.schedule = MagicMock(spec=ContestSchedule)
+        sut.schedule.is_warm.return_value = False
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(1)
+
+    def test_capacity_caps_scale_up(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.capacity = MagicMock(spec=CapacityModel)
+        sut.capacity.placeable_replicas.return_value = 4
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=8)
+        service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 2
+
+        sut.scale()
+
+        sut.capacity.placeable_replicas.assert_called_once_with(service_monitor.service)
+        service_monitor.scale.assert_called_once_with(4)
+
+    def test_budget_caps_scale_up(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.budget = ReplicaBudget(total=6)
+        sut.budget.register("service_name", 2)
+        sut.budget.register("other_service", 2)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=8)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(4)
+        assert sut.budget.demands == {"service_name": 8}
+
+    def test_budget_reclaims_borrowed_replicas(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.budget = ReplicaBudget(total=6)
+        sut.budget.register("service_name", 2)
+        borrower = MagicMock(return_value=3)
+        sut.budget.register("other_service", 2, reclaim=borrower)
+        sut.budget.fit("other_service", 4, 4)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=4)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        borrower.assert_called_once_with(3)
+        service_monitor.scale.assert_called_once_with(3)
+
+    def test_followers_do_not_reclaim_borrowed_replicas(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.budget = ReplicaBudget(total=6)
+        sut.budget.register("service_name", 2)
+        borrower = MagicMock(return_value=3)
+        sut.budget.register("other_service", 2, reclaim=borrower)
+        sut.budget.fit("other_service", 4, 4)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=4)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale(dry_run=True)
+
+        borrower.assert_not_called()
+        assert sut.status["desired_replicas"] == 2
+
+    def test_reclaim(self, sut, service_monitor, clock):
+        service_monitor.get_current_replicas.return_value = 4
+
+        assert sut.reclaim(2) == 2
+
+        service_monitor.scale.assert_called_once_with(2)
+        assert sut.last_direction == "down"
+        assert sut.last_scale_time == clock.return_value
+        assert sut.last_replicas == 2
+
+    def test_reclaim_through_drainer(self, sut, queue_monitor, service_monitor):
+        sut.drainer = MagicMock(spec=IdleDrainer)
+        sut.drainer.scale_in.return_value = 3
+        service_monitor.get_current_replicas.return_value = 4
+
+        assert sut.reclaim(2) == 3
+
+        sut.drainer.scale_in.assert_called_once_with(service_monitor, "queue_name", 4, 2)
+
+    def test_reclaim_within_replicas(self, sut, service_monitor):
+        service_monitor.get_current_replicas.return_value = 2
+
+        assert sut.reclaim(2) == 2
+
+        service_monitor.scale.assert_not_called()
+
+    def test_capacity_does_not_scale_in_pending_tasks(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 10
+        sut.capacity = MagicMock(spec=CapacityModel)
+        sut.capacity.placeable_replicas.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=8)
+        service_monitor.get_current_replicas.return_value = 3
+        service_monitor.get_running_tasks.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+
+    def test_capacity_unknown(self, sut, queue_monitor, service_monitor):
+        sut.capacity = MagicMock(spec=CapacityModel)
+        sut.capacity.placeable_replicas.return_value = None
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.get_running_tasks.return_value = 1
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(2)
+
+    def test_capacity_not_checked_when_replicas_are_running(self, sut, queue_monitor, service_monitor):
+        sut.capacity = MagicMock(spec=CapacityModel)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.get_running_tasks.return_value = 1
+
+        sut.scale()
+
+        sut.capacity.placeable_replicas.assert_not_called()
+
+    def test_scales_on_utilisation(self, sut, queue_monitor, service_monitor):
+        sut.max_replicas = 5
+        sut.policy = CompositePolicy([DepthPolicy(messages_per_replica=5), UtilisationPolicy(target_utilisation=0.5)])
+        sut.utilisation_monitor = MagicMock(spec=UtilisationMonitor)
+        sut.utilisation_monitor.get_utilisation.return_value = Utilisation(cpu=0.9, memory=0.2)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=1)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        sut.utilisation_monitor.get_utilisation.assert_called_once_with()
+        service_monitor.scale.assert_called_once_with(4)
+
+    def test_scales_on_metric_without_queue(self, sut, queue_monitor, service_monitor):
+        sut.queue_name = ""
+        sut.max_replicas = 5
+        sut.policy = MetricPolicy(target_value=50)
+        sut.metric_source = MagicMock(spec=MetricSource)
+        sut.metric_source.get_value.return_value = 120
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        queue_monitor.get_snapshot.assert_not_called()
+        service_monitor.scale.assert_called_once_with(3)
+
+    def test_metric_source_failure(self, sut, service_monitor):
+        sut.queue_name = ""
+        sut.policy = MetricPolicy(target_value=50)
+        sut.metric_source = MagicMock(spec=MetricSource)
+        sut.metric_source.get_value.side_effect = Exception("Prometheus down")
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+
+    def test_dry_run_observes_without_scaling(self, sut, queue_monitor, service_monitor):
+        sut.policy = MagicMock(spec=Policy)
+        sut.policy.desired.return_value = 2
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale(dry_run=True)
+
+        sut.policy.observe.assert_called_once()
+        service_monitor.scale.assert_not_called()
+        assert sut.last_scale_time is None
+
+    def test_follower_records_actions_of_the_leader(self, sut, queue_monitor, service_monitor, clock):
+        sut.state_store = MagicMock(spec=StateStore)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale(dry_run=True)
+        sut.state_store.record_action.assert_not_called()
+
+        clock.return_value = 1010.0
+        service_monitor.get_current_replicas.return_value = 2
+        sut.scale(dry_run=True)
+
+        assert sut.last_scale_time == 1010.0
+        assert sut.last_direction == "up"
+        assert sut.pending_action == ScaleAction(direction="up", replicas=2, started_at=1010.0, deadline=1130.0)
+        sut.state_store.record_action.assert_called_once_with(
+            "service_name", {"direction": "up", "replicas": 2, "started_at": 1010.0, "deadline": 1130.0}
+        )
+
+    def test_leader_does_not_record_its_own_action_twice(self, sut, queue_monitor, service_monitor, clock):
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        sut.scale()
+
+        clock.return_value = 1010.0
+        service_monitor.get_current_replicas.return_value = 2
+        sut.scale(dry_run=True)
+
+        assert sut.last_scale_time == 1000.0
+
+    def test_records_state(self, sut, queue_monitor, service_monitor):
+        sut.state_store = MagicMock(spec=StateStore)
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        sample = sut.state_store.record_sample.call_args.args[1]
+        sut.state_store.record_sample.assert_called_once_with("service_name", sample, 2)
+        sut.state_store.record_action.assert_called_once_with(
+            "service_name", {"direction": "up", "replicas": 2, "started_at": 1000.0, "deadline": 1120.0}
+        )
+
+    def test_restore(self, sut, queue_monitor, service_monitor):
+        sut.policy = MagicMock(spec=Policy)
+        sample = Sample(timestamp=950, replicas=1, queue=QueueSnapshot(messages=3))
+
+        sut.restore([
+            {"kind": "sample", "s": "service_name", **dump_sample(sample), "rec": 2},
+            {"kind": "action", "s": "service_name", "t": 960, "action": {"direction": "up", "replicas": 2, "started_at": 960, "deadline": 1080}},
+        ])
+
+        sut.policy.observe.assert_called_once_with(sample)
+        assert list(sut.behavior.recommendations) == [(950, 2)]
+        assert sut.last_scale_time == 960
+        assert sut.last_direction == "up"
+        assert sut.pending_action == ScaleAction(direction="up", replicas=2, started_at=960, deadline=1080)
+
+    def test_restore_expired_action(self, sut):
+        sut.restore([
+            {"kind": "action", "s": "service_name", "t": 800, "action": {"direction": "down", "replicas": 1, "started_at": 800, "deadline": 920}},
+        ])
+
+        assert sut.last_scale_time == 800
+        assert sut.pending_action is None
+
+    def test_restored_cooldown_blocks_flapping(self, sut, queue_monitor, service_monitor):
+        sut.restore([
+            {"kind": "action", "s": "service_name", "t": 980, "action": {"direction": "up", "replicas": 2, "started_at": 980, "deadline": 990}},
+        ])
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+        service_monitor.get_running_tasks.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+
+    def test_holds_last_metric_on_failure(self, sut, service_monitor):
+        sut.queue_name = ""
+        sut.max_replicas = 5
+        sut.policy = MetricPolicy(target_value=50)
+        sut.metric_source = MagicMock(spec=MetricSource)
+        sut.metric_source.get_value.return_value = 120
+        service_monitor.get_current_replicas.return_value = 3
+        sut.scale()
+
+        sut.metric_source.get_value.side_effect = Exception("Prometheus down")
+        sut.policy = MagicMock(spec=Policy)
+        sut.policy.desired.return_value = 1
+        sut.scale()
+
+        assert sut.policy.observe.call_args.args[0].metric == 120
+        service_monitor.scale.assert_not_called()
+
+    def test_does_not_scale_up_on_held_metric(self, sut, service_monitor):
+        sut.queue_name = ""
+        sut.max_replicas = 5
+        sut.policy = MetricPolicy(target_value=50)
+        sut.metric_source = MagicMock(spec=MetricSource)
+        sut.metric_source.get_value.side_effect = Exception("Prometheus down")
+        sut.last_metric = 120
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+
+    def test_does_not_scale_down_without_utilisation(self, sut, queue_monitor, service_monitor):
+        sut.utilisation_monitor = MagicMock(spec=UtilisationMonitor)
+        sut.utilisation_monitor.get_utilisation.return_value = None
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=0)
+        service_monitor.get_current_replicas.return_value = 2
+
+        sut.scale()
+
+        service_monitor.scale.assert_not_called()
+        assert REGISTRY.get_sample_value("autoscaler_held_count_total", {"service_name": "service_name"}) >= 1
+
+    def test_open_breaker_holds_instead_of_failing(self, sut, queue_monitor):
+        queue_monitor.get_snapshot.side_effect = CircuitOpenError("open")
+        failures = REGISTRY.get_sample_value("autoscaler_fail_count_total", {"service_name": "service_name"}) or 0
+        held = REGISTRY.get_sample_value("autoscaler_held_count_total", {"service_name": "service_name"}) or 0
+
+        sut.scale()
+
+        assert REGISTRY.get_sample_value("autoscaler_fail_count_total", {"service_name": "service_name"}) == failures
+        assert REGISTRY.get_sample_value("autoscaler_held_count_total", {"service_name": "service_name"}) == held + 1
+
+    def test_lost_lease_does_not_count_as_failure(self, sut, queue_monitor, service_monitor):
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2)
+        service_monitor.get_current_replicas.return_value = 1
+        service_monitor.scale.side_effect = LeaseLostError("expired")
+        failures = REGISTRY.get_sample_value("autoscaler_fail_count_total", {"service_name": "service_name"}) or 0
+
+        sut.scale()
+
+        service_monitor.scale.assert_called_once_with(2)
+        assert (REGISTRY.get_sample_value("autoscaler_fail_count_total", {"service_name": "service_name"}) or 0) == failures
+        assert sut.pending_action is None
+
+    def test_status(self, sut, queue_monitor, service_monitor):
+        assert sut.status == {"service_name": "service_name", "queue_name": "queue_name", "policy": "depth"}
+        queue_monitor.get_snapshot.return_value = QueueSnapshot(messages=2, head_message_timestamp=990.0)
+        service_monitor.get_current_replicas.return_value = 1
+
+        sut.scale()
+
+        assert sut.status == {
+            "service_name": "service_name",
+            "queue_name": "queue_name",
+            "policy": "depth",
+            "timestamp": 1000.0,
+            "messages": 2,
+            "head_message_age": 10.0,
+            "current_replicas": 1,
+            "desired_replicas": 2,
+            "min_replicas": 1,
+            "max_replicas": 2,
+            "converging": False,
+            "cooling_down": False,
+            "held": False,
+            "burst": False,
+            "wake": False,
+            "action": "up",
+            "last_scale_time": 1000.0,
+        }
@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from autoscaler.api_client import ApiClient
+from autoscaler.schedule import ContestSchedule, PrewarmWindow, parse_timestamp
+
+BASE_PATH = "autoscaler.schedule"
+
+START = parse_timestamp("2025-01-01T10:00:00Z")
+END = parse_timestamp("2025-01-01T15:00:00Z")
+
+
+class TestContestSchedule:
+    @pytest.fixture
+    def api_client(self):
+        api_client = MagicMock(spec=ApiClient)
+        api_client.find_contest_schedule.return_value = [
+            {"id": "contest", "startAt": "2025-01-01T10:00:00Z", "endAt": "2025-01-01T15:00:00Z"},
+        ]
+        yield api_client
+
+    @pytest.fixture
+    def sut(self, api_client):
+        yield ContestSchedule(api_client=api_client, lead_time=300, start_duration=600, end_rush=1800, refresh_interval=60)
+
+    def test_windows_for(self, sut):
+        windows = sut.windows_for({"id": "contest", "startAt": "2025-01-01T10:00:00Z", "endAt": "2025-01-01T15:00:00Z"})
+
+        assert windows == [
+            PrewarmWindow(contest_id="contest", start=START - 300, end=START + 600),
+            PrewarmWindow(contest_id="contest", start=END - 1800 - 300, end=END),
+        ]
+
+    def test_windows_for_short_contest(self, sut):
+        windows = sut.windows_for({"id": "contest", "startAt": "2025-01-01T10:00:00Z", "endAt": "2025-01-01T10:05:00Z"})
+
+        assert windows == [
+            PrewarmWindow(contest_id="contest", start=START - 300, end=START + 300),
+            PrewarmWindow(contest_id="contest", start=START - 300, end=START + 300),
+        ]
+
+    def test_is_warm(self, sut):
+        sut.refresh(now=START - 3600)
+
+        assert not sut.is_warm(START - 301)
+        assert sut.is_warm(START - 300)
+        assert sut.is_warm(START + 599)
+        assert not sut.is_warm(START + 600)
+        assert not sut.is_warm(END - 2101)
+        assert sut.is_warm(END - 2100)
+        assert sut.is_warm(END - 1)
+        assert not sut.is_warm(END)
+
+    def test_refresh_drops_past_windows(self, sut):
+        sut.refresh(now=START + 3600)
+
+        assert sut.windows == [PrewarmWindow(contest_id="contest", start=END - 2100, end=END)]
+
+    def test_is_stale(self, sut):
+        with patch(f"{BASE_PATH}.time") as time:
+            time.monotonic.return_value = 100
+            assert sut.is_stale()
+
+            sut.refresh(now=START)
+            assert not sut.is_stale()
+
+            time.monotonic.return_value = 160
+            assert sut.is_stale()
+
+    def test_refresh_failure_keeps_windows(self, sut, api_client):
+        sut.refresh(now=START)
+        api_client.find_contest_schedule.side_effect = Exception("API down")
+
+        with pytest.raises(Exception):
+            sut.refresh(now=START)
+        assert sut.is_warm(START)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.scheduler import Scheduler
+
+BASE_PATH = "autoscaler.scheduler"
+
+
+class TestScheduler:
+    def test_runs_tick_until_stopped(self):
+        calls = []
+        sut = Scheduler(tick=lambda: calls.append(1), interval=0.01, timeout=1)
+
+        async def run():
+            task = asyncio.create_task(sut.run())
+            await asyncio.sleep(0.05)
+            sut.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert len(calls) >= 2
+
+    def test_skips_tick_while_previous_is_running(self):
+        release = threading.Event()
+        tick = MagicMock(side_effect=lambda: release.wait(1))
+        sut = Scheduler(tick=tick, interval=10, timeout=1)
+
+        async def run():
+            first = sut.trigger()
+            second = sut.trigger()
+            release.set()
+            await first
+            return second
+
+        assert asyncio.run(run()) is None
+        assert tick.call_count == 1
+
+    @pytest.mark.parametrize("name, metric", [("scaling", "autoscaler_skipped_ticks_total"), ("sampling", "autoscaler_sampling_skipped_ticks_total")])
+    def test_counts_skipped_ticks_per_loop(self, name, metric):
+        release = threading.Event()
+        sut = Scheduler(tick=lambda: release.wait(1), interval=1, timeout=1, name=name)
+        before = REGISTRY.get_sample_value(metric) or 0
+
+        async def run():
+            first = sut.trigger()
+            sut.trigger()
+            release.set()
+            await first
+
+        asyncio.run(run())
+
+        assert REGISTRY.get_sample_value(metric) == before + 1
+
+    def test_wake_runs_tick_ahead_of_interval(self):
+        calls = []
+        sut = Scheduler(tick=lambda: calls.append(1), interval=10, timeout=1)
+
+        async def run():
+            task = asyncio.create_task(sut.run())
+            await asyncio.sleep(0.05)
+            threading.Thread(target=sut.wake).start()
+            await asyncio.sleep(0.05)
+            sut.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert len(calls) == 2
+
+    def test_wake_before_run(self):
+        sut = Scheduler(tick=MagicMock(), interval=10, timeout=1)
+
+        sut.wake()
+
+        sut.tick.assert_not_called()
+
+    def test_overrun_tick_is_not_duplicated(self):
+        release = threading.Event()
+        tick = MagicMock(side_effect=lambda: release.wait(1))
+        sut = Scheduler(tick=tick, interval=10, timeout=0.01)
+
+        async def run():
+            first = sut.trigger()
+            await asyncio.sleep(0.05)
+            second = sut.trigger()
+            release.set()
+            await first
+            return second
+
+        assert asyncio.run(run()) is None
+        assert tick.call_count == 1
+
+    def test_keeps_watchers_until_done(self):
+        release = threading.Event()
+        sut = Scheduler(tick=lambda: release.wait(1), interval=10, timeout=1)
+
+        async def run():
+            task = sut.trigger()
+            assert sut.watchers == {task}
+            release.set()
+            await task
+
+        asyncio.run(run())
+
+        assert sut.watchers == set()
+
+    def test_failed_tick_allows_next_one(self):
+        tick = MagicMock(side_effect=Exception("failed"))
+        sut = Scheduler(tick=tick, interval=10, timeout=1)
+
+        async def run():
+            await sut.trigger()
+            await sut.trigger()
+
+        asyncio.run(run())
+
+        assert tick.call_count == 2
+
+    @pytest.mark.parametrize("jitter", [0, 2])
+    def test_delay_with_jitter(self, jitter):
+        sut = Scheduler(tick=MagicMock(), interval=10, timeout=1, jitter=jitter)
+
+        for _ in range(20):
+            assert 10 - jitter <= sut.delay() <= 10 + jitter
@@ -0,0 +1,165 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from autoscaler.service_cache import ServiceState, ServiceStateCache
+
+
+def service(name, service_id, replicas=1, version=1, namespace="forseti"):
+    mock = MagicMock(
+        id=service_id,
+        attrs={
+            "Spec": {
+                "Mode": {"Replicated": {"Replicas": replicas}},
+                "Labels": {"com.docker.stack.namespace": namespace},
+            },
+            "Version": {"Index": version},
+        },
+    )
+    mock.name = name
+    return mock
+
+
+def task(service_id, state="running"):
+    return {"ServiceID": service_id, "Status": {"State": state}}
+
+
+class TestServiceStateCache:
+    @pytest.fixture
+    def docker_client(self):
+        yield MagicMock()
+
+    @pytest.fixture
+    def sut(self, docker_client):
+        yield ServiceStateCache(docker_client=docker_client, namespace="forseti")
+
+    def test_resync(self, sut: ServiceStateCache, docker_client):
+        autojudge = service("forseti_autojudge", "a", replicas=3, version=7)
+        api = service("forseti_api", "b", replicas=1)
+        docker_client.services.list.return_value = [autojudge, api]
+        docker_client.api.tasks.return_value = [task("a"), task("a"), task("a", "starting"), task("b")]
+
+        assert sut.is_stale()
+        sut.resync()
+
+        assert not sut.is_stale()
+        docker_client.services.list.assert_called_once_with(
+            filters={"label": "com.docker.stack.namespace=forseti"}
+        )
+        docker_client.api.tasks.assert_called_once_with(filters={"desired-state": "running"})
+        assert sut.get("forseti_autojudge") == ServiceState(
+            service=autojudge, replicas=3, running_tasks=2, version=7
+        )
+        assert sut.get("forseti_api").running_tasks == 1
+        assert sut.get("unknown") is None
+
+    def test_service_event_refreshes_service(self, sut: ServiceStateCache, docker_client):
+        autojudge = service("forseti_autojudge", "a", replicas=2, version=8)
+        docker_client.services.get.return_value = autojudge
+        docker_client.api.tasks.return_value = [task("a")]
+
+        sut.handle_event(
+            {"Type": "service", "Action": "update", "Actor": {"Attributes": {"name": "forseti_autojudge"}}}
+        )
+
+        docker_client.api.tasks.assert_called_once_with(
+            filters={"desired-state": "running", "service": "a"}
+        )
+        assert sut.get("forseti_autojudge") == ServiceState(
+            service=autojudge, replicas=2, running_tasks=1, version=8
+        )
+
+    def test_service_event_ignores_other_stacks(self, sut: ServiceStateCache, docker_client):
+        docker_client.services.get.return_value = service("other", "x", namespace="other")
+
+        sut.handle_event({"Type": "service", "Action": "create", "Actor": {"Attributes": {"name": "other"}}})
+
+        assert sut.get("other") is None
+
+    def test_service_remove_event(self, sut: ServiceStateCache, docker_client):
+        docker_client.services.list.return_value = [service("forseti_autojudge", "a")]
+        docker_client.api.tasks.return_value = []
+        sut.resync()
+
+        sut.handle_event(
+            {"Type": "service", "Action": "remove", "Actor": {"Attributes": {"name": "forseti_autojudge"}}}
+        )
+
+        assert sut.get("forseti_autojudge") is None
+
+    def test_container_event_of_tracked_service(self, sut: ServiceStateCache, docker_client):
+        autojudge = service("forseti_autojudge", "a")
+        docker_client.services.list.return_value = [autojudge]
+        docker_client.services.get.return_value = autojudge
+        docker_client.api.tasks.return_value = []
+        sut.resync()
+        docker_client.api.tasks.return_value = [task("a")]
+
+        sut.handle_event(
+            {
+                "Type": "container",
+                "Action": "start",
+                "Actor": {"Attributes": {"com.docker.swarm.service.name": "forseti_autojudge"}},
+            }
+        )
+
+        assert sut.get("forseti_autojudge").running_tasks == 1
+
+    @pytest.mark.parametrize(
+        "event",
+        [
+            {"Type": "container", "Action": "start", "Actor": {"Attributes": {"com.docker.swarm.service.name": "other"}}},
+            {"Type": "container", "Action": "start", "Actor": {"Attributes": {}}},
+            {"Type": "container", "Action": "exec_start", "Actor": {"Attributes": {"com.docker.swarm.service.name": "forseti_autojudge"}}},
+            {"Type": "network", "Action": "connect", "Actor": {"Attributes": {}}},
+        ],
+    )
+    def test_ignored_events(self, sut: ServiceStateCache, docker_client, event):
+        sut.handle_event(event)
+
+        docker_client.services.get.assert_not_called()
+
+    def test_watch(self, sut: ServiceStateCache, docker_client):
+        autojudge = service("forseti_autojudge", "a", replicas=2)
+        docker_client.services.list.return_value = []
+        docker_client.services.get.return_value = autojudge
+        docker_client.api.tasks.return_value = []
+
+        def events(**kwargs):
+            yield {"Type": "service", "Action": "create", "Actor": {"Attributes": {"name": "forseti_autojudge"}}}
+            yield {"Type": "service", "Action": "update", "Actor": {}}
+            sut.stop()
+
+        docker_client.events.side_effect = events
+
+        sut.watch()
+
+        docker_client.events.assert_called_once_with(decode=True, filters={"type": ["service", "container"]})
+        assert sut.get("forseti_autojudge").replicas == 2
+
+    def test_watch_survives_failures(self, sut: ServiceStateCache, docker_client):
+        sut.resync_interval = 0
+        docker_client.services.list.side_effect = [Exception("unreachable"), []]
+        docker_client.api.tasks.return_value = []
+        docker_client.services.get.side_effect = Exception("unreachable")
+
+        def events(**kwargs):
+            yield {"Type": "service", "Action": "update", "Actor": {"Attributes": {"name": "forseti_autojudge"}}}
+            sut.stop()
+
+        docker_client.events.side_effect = events
+
+        sut.watch()
+
+        assert docker_client.services.list.call_count == 2
+
+    def test_start_and_stop(self, sut: ServiceStateCache, docker_client):
+        docker_client.services.list.return_value = []
+        docker_client.api.tasks.return_value = []
+        docker_client.events.return_value = iter([])
+        sut.stream = MagicMock()
+
+        sut.stop()
+        sut.start()
+
+        sut.stream.close.assert_called()
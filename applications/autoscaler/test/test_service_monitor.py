@@ -1,5 +1,11 @@
+from unittest.mock import MagicMock
+
 import docker
 import pytest
+from docker.errors import NotFound
+from autoscaler.service_cache import ServiceState
+from autoscaler.breaker import CircuitOpenError
+from autoscaler.leader import LeaseLostError
 from autoscaler.service_monitor import ServiceMonitor
 
 
@@ -33,3 +39,105 @@ class TestServiceMonitor:
         new_replicas = initial_replicas + 1
         sut.scale(new_replicas)
         assert sut.get_current_replicas() == new_replicas
+
+
+class TestCachedServiceMonitor:
+    @pytest.fixture
+    def docker_client(self):
+        yield MagicMock()
+
+    @pytest.fixture
+    def sut(self, docker_client):
+        yield ServiceMonitor(docker_client=docker_client, service_name="service_name")
+
+    def test_uses_cached_state(self, sut: ServiceMonitor, docker_client):
+        service = MagicMock()
+        sut.update(ServiceState(service=service, replicas=2, running_tasks=1, version=3))
+
+        assert sut.service is service
+        assert sut.get_current_replicas() == 2
+        assert sut.get_running_tasks() == 1
+        docker_client.services.get.assert_not_called()
+
+    def test_inspects_without_cached_state(self, sut: ServiceMonitor, docker_client):
+        service = docker_client.services.get.return_value
+        service.attrs = {"Spec": {"Mode": {"Replicated": {"Replicas": 2}}}}
+        service.tasks.return_value = [
+            {"Status": {"State": "running"}},
+            {"Status": {"State": "preparing"}},
+        ]
+
+        assert sut.get_current_replicas() == 2
+        assert sut.get_running_tasks() == 1
+        assert sut.get_tasks() == [{"Status": {"State": "running"}}]
+        service.tasks.assert_called_with(filters={"desired-state": "running"})
+
+    def test_scale_invalidates_cache(self, sut: ServiceMonitor, docker_client):
+        service = MagicMock()
+        sut.update(ServiceState(service=service, replicas=2, running_tasks=2, version=3))
+
+        sut.scale(3)
+
+        service.scale.assert_called_once_with(3)
+        assert sut.service is docker_client.services.get.return_value
+        docker_client.services.get.assert_called_once_with("service_name")
+
+    def test_ignores_state_from_before_the_scaling(self, sut: ServiceMonitor, docker_client):
+        service = MagicMock()
+        sut.update(ServiceState(service=service, replicas=5, running_tasks=5, version=3))
+        sut.scale(3)
+        live = docker_client.services.get.return_value
+        live.attrs = {"Spec": {"Mode": {"Replicated": {"Replicas": 3}}}}
+
+        sut.update(ServiceState(service=service, replicas=5, running_tasks=5, version=3))
+
+        assert sut.get_current_replicas() == 3
+
+        updated = MagicMock()
+        sut.update(ServiceState(service=updated, replicas=3, running_tasks=3, version=4))
+
+        assert sut.service is updated
+        assert sut.get_current_replicas() == 3
+
+    def test_scale_without_cached_state(self, sut: ServiceMonitor, docker_client):
+        service = docker_client.services.get.return_value
+        service.attrs = {"Spec": {"Mode": {"Replicated": {"Replicas": 2}}}, "Version": {"Index": 7}}
+
+        sut.scale(3)
+        sut.update(ServiceState(service=MagicMock(), replicas=2, running_tasks=2, version=7))
+
+        assert sut.state is None
+        service.scale.assert_called_once_with(3)
+
+    def test_scale_checks_the_lease(self, sut: ServiceMonitor, docker_client):
+        service = MagicMock()
+        sut.update(ServiceState(service=service, replicas=2, running_tasks=2, version=3))
+        sut.lease = MagicMock(return_value=False)
+
+        with pytest.raises(LeaseLostError):
+            sut.scale(3)
+
+        service.scale.assert_not_called()
+
+        sut.lease.return_value = True
+        sut.scale(3)
+
+        service.scale.assert_called_once_with(3)
+
+    def test_breaker_opens_on_docker_failures(self, sut: ServiceMonitor, docker_client):
+        docker_client.services.get.side_effect = Exception("Docker unavailable")
+
+        for _ in range(3):
+            with pytest.raises(Exception):
+                sut.get_current_replicas()
+
+        with pytest.raises(CircuitOpenError):
+            sut.get_current_replicas()
+        assert docker_client.services.get.call_count == 3
+
+    def test_breaker_ignores_missing_service(self, sut: ServiceMonitor, docker_client):
+        docker_client.services.get.side_effect = NotFound("missing")
+
+        for _ in range(4):
+            with pytest.raises(NotFound):
+                sut.get_current_replicas()
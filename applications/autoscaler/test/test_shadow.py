@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from autoscaler.policy import DepthPolicy, Policy, Sample
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.shadow import ShadowPolicy
+
+
+def sample(timestamp: float, messages: int, replicas: int = 1, publish_rate: float = 0.0) -> Sample:
+    return Sample(timestamp=timestamp, replicas=replicas, queue=QueueSnapshot(messages=messages, publish_rate=publish_rate))
+
+
+class TestShadowPolicy:
+    @pytest.fixture
+    def sut(self):
+        yield ShadowPolicy(
+            service_name="forseti_autojudge",
+            policy=DepthPolicy(messages_per_replica=5),
+            min_replicas=1,
+            max_replicas=4,
+            per_replica_ack_rate=0.5,
+            cold_start=30,
+        )
+
+    def value(self, name):
+        return REGISTRY.get_sample_value(name, {"service_name": "forseti_autojudge", "policy": "depth"})
+
+    def test_exports_desired_replicas(self, sut):
+        assert sut.evaluate(sample(1000, 12)) == 3
+        assert self.value("autoscaler_shadow_desired_replicas") == 3
+        assert self.value("autoscaler_shadow_queue_wait_seconds") == 0
+
+    def test_clamps_desired_replicas(self, sut):
+        assert sut.evaluate(sample(1000, 100)) == 4
+        assert sut.evaluate(sample(1010, 0)) == 1
+
+    def test_simulates_wait_with_its_own_replicas(self, sut):
+        sut.evaluate(sample(1000, 10, replicas=1))
+        # Two more replicas start, only the real one is ready 10 seconds later
+        assert sut.evaluate(sample(1010, 10, publish_rate=1)) == 2
+        assert sut.backlog == 15
+        assert self.value("autoscaler_shadow_queue_wait_seconds") == 30
+
+        # The started replicas are ready after their cold start
+        sut.evaluate(sample(1040, 0))
+        assert sut.backlog == 0
+        assert self.value("autoscaler_shadow_queue_wait_seconds") == 0
+
+    def test_infers_arrivals_without_rates(self, sut):
+        sut.evaluate(sample(1000, 0, replicas=2))
+        sut.evaluate(sample(1010, 4, replicas=2))
+
+        # 4 messages of growth plus the 10 drained by the real replicas
+        assert sut.backlog == 9
+
+    def test_wait_without_ready_replicas(self, sut):
+        sut.min_replicas = 0
+        sut.evaluate(sample(1000, 0, replicas=0))
+        sut.evaluate(sample(1010, 5, replicas=0))
+
+        assert sut.replicas == [1040]
+        assert self.value("autoscaler_shadow_queue_wait_seconds") == 40
+
+    def test_min_replicas_of_the_tick(self, sut):
+        assert sut.evaluate(sample(1000, 0), min_replicas=3) == 3
+
+    def test_wait_without_drain_rate(self, sut):
+        sut.per_replica_ack_rate = 0
+        sut.evaluate(sample(1000, 0, replicas=0))
+        sut.evaluate(sample(1010, 5, replicas=0))
+
+        assert self.value("autoscaler_shadow_queue_wait_seconds") == 0
+
+    def test_scales_in_starting_replicas_first(self, sut):
+        sut.replicas = [1000, 1050, 990]
+
+        sut.scale_to(1010, 2)
+
+        assert sut.replicas == [990, 1000]
+
+    def test_broken_policy(self):
+        policy = MagicMock(spec=Policy)
+        policy.name = "broken"
+        policy.recommend.side_effect = Exception("boom")
+        sut = ShadowPolicy("forseti_autojudge", policy, 1, 4, 0.5, 30)
+
+        assert sut.evaluate(sample(1000, 1)) is None
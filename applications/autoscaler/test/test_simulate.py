@@ -0,0 +1,168 @@
+import json
+import random
+
+import pytest
+
+from autoscaler.config import ScalerConfig
+from autoscaler.policy import DepthPolicy
+from autoscaler.simulate import (
+    SimulatedService,
+    Simulator,
+    contest_arrivals,
+    main,
+    percentile,
+    trace_arrivals,
+)
+
+
+class TestHelpers:
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0
+
+    def test_trace_arrivals(self, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps(entry)
+                for entry in [
+                    {"t": 100, "s": "a", "p": 0},
+                    {"t": 110, "s": "a", "p": 0.25},
+                    {"t": 120, "s": "a", "p": 0.25},
+                ]
+            )
+        )
+
+        arrivals = trace_arrivals(str(path))
+
+        assert len(arrivals) == 5
+        assert all(0 < t < 20 for t in arrivals)
+        assert trace_arrivals(str(path), "missing") == []
+
+    def test_contest_arrivals(self):
+        arrivals = contest_arrivals(
+            duration=3600, base_rate=0.01, peak_rate=1, burst=600, rng=random.Random(0)
+        )
+
+        assert arrivals == sorted(arrivals)
+        start = sum(1 for t in arrivals if t < 600)
+        middle = sum(1 for t in arrivals if 1500 <= t < 2100)
+        end = sum(1 for t in arrivals if t >= 3000)
+        assert start > 5 * middle
+        assert end > 5 * middle
+
+    def test_contest_arrivals_without_rate(self):
+        assert (
+            contest_arrivals(
+                duration=60, base_rate=0, peak_rate=0, burst=10, rng=random.Random(0)
+            )
+            == []
+        )
+
+
+class TestSimulatedService:
+    def test_scale(self):
+        sut = SimulatedService("service", replicas=1, cold_start=30)
+        sut.now = 10
+
+        sut.scale(3)
+
+        assert sut.get_current_replicas() == 3
+        assert sut.get_running_tasks() == 1
+        sut.now = 40
+        assert sut.get_running_tasks() == 3
+
+    def test_scale_in_removes_idle_replicas_first(self):
+        sut = SimulatedService("service", replicas=3, cold_start=30)
+        sut.replicas[0].busy_until = 50
+
+        sut.scale(1)
+
+        assert [r.busy_until for r in sut.replicas] == [50]
+        assert sut.scale_actions == 1
+
+
+class TestSimulator:
+    def config(self, **kwargs):
+        return ScalerConfig(name="policy", queue_name="", service_name="", **kwargs)
+
+    def test_single_replica(self):
+        sut = Simulator(
+            self.config(max_replicas=1),
+            arrivals=[0, 0, 0],
+            service_time=10,
+            cold_start=0,
+            interval=10,
+        )
+
+        report = sut.run()
+
+        assert report.messages == 3
+        assert report.p50_wait == pytest.approx(10, abs=5)
+        assert report.max_wait > report.p50_wait
+        assert report.scale_actions == 0
+
+    def test_ignores_graceful_scale_in(self):
+        sut = Simulator(self.config(graceful_scale_in=True), arrivals=[0], service_time=1, cold_start=0, interval=10)
+
+        assert sut.scaler.drainer is None
+
+    def test_ignores_utilisation_and_metric(self):
+        sut = Simulator(
+            self.config(policy="metric", metric_query="up", target_utilisation=0.8),
+            arrivals=[0],
+            service_time=1,
+            cold_start=0,
+            interval=10,
+        )
+
+        assert isinstance(sut.scaler.policy, DepthPolicy)
+        assert sut.scaler.utilisation_monitor is None
+        assert sut.scaler.metric_source is None
+        assert sut.run().messages == 1
+
+    def test_scaling_reduces_wait(self):
+        arrivals = [i * 0.5 for i in range(200)]
+
+        fixed = Simulator(
+            self.config(max_replicas=1),
+            arrivals,
+            service_time=5,
+            cold_start=10,
+            interval=10,
+        ).run()
+        scaled = Simulator(
+            self.config(max_replicas=10, messages_per_replica=2),
+            arrivals,
+            service_time=5,
+            cold_start=10,
+            interval=10,
+        ).run()
+
+        assert scaled.scale_actions > 0
+        assert scaled.p95_wait < fixed.p95_wait
+        assert scaled.replica_seconds > fixed.replica_seconds
+
+
+class TestMain:
+    def test_synthetic_contest(self, capsys):
+        reports = main(["--duration", "600", "--burst", "120", "--peak-rate", "0.5"])
+
+        assert len(reports) == 1
+        assert "p95" in capsys.readouterr().out
+
+    def test_trace_with_policy_file(self, tmp_path):
+        trace = tmp_path / "trace.jsonl"
+        trace.write_text('{"t":0,"s":"a","p":0}\n{"t":60,"s":"a","p":0.5}\n')
+        policies = tmp_path / "policies.conf"
+        policies.write_text(
+            "[depth]\nmax_replicas=5\n\n[rate]\npolicy=rate\nmax_replicas=5\n"
+        )
+
+        reports = main(["--trace", str(trace), "--policy-file", str(policies)])
+
+        assert [report.name for report in reports] == ["depth", "rate"]
+        assert all(report.messages == 30 for report in reports)
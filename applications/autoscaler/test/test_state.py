@@ -0,0 +1,99 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from autoscaler.policy import Sample
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.state import StateStore, dump_sample, load_sample
+from autoscaler.utilisation import Utilisation
+
+
+def action(started_at, direction="up", replicas=2):
+    return {"direction": direction, "replicas": replicas, "started_at": started_at, "deadline": started_at + 120}
+
+
+class TestSampleSerialisation:
+    def test_round_trip(self):
+        sample = Sample(
+            timestamp=100,
+            replicas=2,
+            queue=QueueSnapshot(messages=5, messages_ready=3, publish_rate=1.5, head_message_timestamp=90),
+            utilisation=Utilisation(cpu=0.5, memory=0.25),
+            metric=12.0,
+        )
+
+        assert load_sample(json.loads(json.dumps(dump_sample(sample)))) == sample
+
+    def test_round_trip_without_utilisation(self):
+        sample = Sample(timestamp=100, replicas=2, queue=QueueSnapshot(messages=5))
+
+        assert load_sample(dump_sample(sample)) == sample
+
+
+class TestStateStore:
+    @pytest.fixture
+    def path(self, tmp_path):
+        yield str(tmp_path / "state.jsonl")
+
+    @pytest.fixture
+    def clock(self):
+        clock = MagicMock()
+        clock.return_value = 1000.0
+        yield clock
+
+    @pytest.fixture
+    def sut(self, path, clock):
+        store = StateStore(path, max_age=300, compact_after=3, clock=clock)
+        yield store
+        store.close()
+
+    def sample(self, timestamp):
+        return Sample(timestamp=timestamp, replicas=1, queue=QueueSnapshot(messages=timestamp))
+
+    def test_load_missing_file(self, sut, path):
+        assert sut.load() == {}
+
+    def test_record_and_load(self, sut, path, clock):
+        sut.record_sample("a", self.sample(900), 2)
+        sut.record_action("a", action(900))
+        sut.record_sample("b", self.sample(950), 1)
+        sut.close()
+
+        state = StateStore(path, max_age=300, clock=clock).load()
+
+        assert [entry["kind"] for entry in state["a"]] == ["sample", "action"]
+        assert state["a"][0]["rec"] == 2
+        assert load_sample(state["a"][0]) == self.sample(900)
+        assert state["a"][1]["action"] == action(900)
+        assert [entry["t"] for entry in state["b"]] == [950]
+
+    def test_load_drops_old_samples_and_actions(self, sut, path, clock):
+        sut.record_sample("a", self.sample(100), 1)
+        sut.record_action("a", action(100))
+        sut.record_action("a", action(200, direction="down"))
+        sut.record_sample("a", self.sample(800), 1)
+        sut.close()
+
+        state = StateStore(path, max_age=300, clock=clock).load()
+
+        assert [(entry["kind"], entry["t"]) for entry in state["a"]] == [("action", 200), ("sample", 800)]
+        with open(path) as file:
+            assert len(file.readlines()) == 2
+
+    def test_compacts_after_appends(self, sut, path, clock):
+        for timestamp in (100, 200, 300):
+            sut.record_sample("a", self.sample(timestamp), 1)
+        clock.return_value = 1000.0
+        sut.record_sample("a", self.sample(900), 1)
+
+        with open(path) as file:
+            assert [json.loads(line)["t"] for line in file] == [900]
+
+    def test_skips_truncated_lines(self, sut, path, clock):
+        with open(path, "w") as file:
+            file.write('{"kind":"sample","s":"a","t":900,"r":1,"q":{"messages":1},"rec":1}\n{"kind":"sam')
+
+        state = sut.load()
+
+        assert len(state["a"]) == 1
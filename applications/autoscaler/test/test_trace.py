@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from autoscaler.policy import Sample
+from autoscaler.queue_monitor import QueueSnapshot
+from autoscaler.trace import TraceRecorder, read_trace
+
+
+class TestTraceRecorder:
+    @pytest.fixture
+    def path(self, tmp_path):
+        yield str(tmp_path / "trace.jsonl")
+
+    def test_record(self, path):
+        sut = TraceRecorder(path)
+        sample = Sample(
+            timestamp=100.12345,
+            replicas=2,
+            queue=QueueSnapshot(
+                messages=5,
+                messages_ready=3,
+                messages_unacknowledged=2,
+                consumers=2,
+                publish_rate=1.23456,
+                ack_rate=0.5,
+                head_message_timestamp=90,
+            ),
+        )
+
+        sut.record("forseti_autojudge", sample, 3, "up")
+        sut.close()
+
+        with open(path) as file:
+            assert json.loads(file.read()) == {
+                "t": 100.123,
+                "s": "forseti_autojudge",
+                "m": 5,
+                "r": 3,
+                "u": 2,
+                "c": 2,
+                "p": 1.235,
+                "a": 0.5,
+                "h": 10.123,
+                "cr": 2,
+                "dr": 3,
+                "x": "up",
+            }
+
+    def test_read_trace(self, path):
+        with open(path, "w") as file:
+            file.write('{"t":1,"s":"a"}\n\n{"t":2,"s":"b"}\n')
+
+        assert [e["t"] for e in read_trace(path)] == [1, 2]
+        assert [e["t"] for e in read_trace(path, "b")] == [2]
@@ -0,0 +1,47 @@
+import pytest
+
+from autoscaler.utilisation import Utilisation, UtilisationMonitor
+
+
+def vector(*values):
+    return {"resultType": "vector", "result": [{"metric": {}, "value": [1700000000, str(value)]} for value in values]}
+
+
+class TestUtilisationMonitor:
+    @pytest.fixture
+    def sut(self, prometheus):
+        yield UtilisationMonitor(url=prometheus.url, service_name="forseti_autojudge", max_concurrent_submissions=2)
+
+    def test_queries_every_task_of_the_service(self, sut):
+        assert sut.cpu.query == (
+            '(sum(rate(container_cpu_usage_seconds_total{container_label_com_forsetijudge_sandbox_service="forseti_autojudge"}[1m]))'
+            " or vector(0))"
+            ' / (count(container_spec_cpu_quota{container_label_com_docker_swarm_service_name="forseti_autojudge"}) * 2)'
+        )
+        assert sut.memory.query == (
+            'sum(container_memory_working_set_bytes{container_label_com_docker_swarm_service_name="forseti_autojudge"})'
+            ' / sum(container_spec_memory_limit_bytes{container_label_com_docker_swarm_service_name="forseti_autojudge"})'
+        )
+
+    def test_get_utilisation(self, sut, prometheus):
+        prometheus.results[sut.cpu.query] = vector(0.5)
+        prometheus.results[sut.memory.query] = vector(0.25)
+
+        assert sut.get_utilisation() == Utilisation(cpu=0.5, memory=0.25)
+
+    def test_without_series(self, sut, prometheus):
+        prometheus.results[sut.cpu.query] = vector()
+        prometheus.results[sut.memory.query] = vector(0.25)
+
+        assert sut.get_utilisation() is None
+
+    def test_without_limits(self, sut, prometheus):
+        prometheus.results[sut.cpu.query] = vector("+Inf")
+        prometheus.results[sut.memory.query] = vector(0.25)
+
+        assert sut.get_utilisation() is None
+
+    def test_prometheus_error(self, sut, prometheus):
+        prometheus.results[sut.memory.query] = vector(0.25)
+
+        assert sut.get_utilisation() is None
@@ -1,8 +1,10 @@
 package com.forsetijudge.api.adapter.driving.http.controller.ppublic
 
 import com.forsetijudge.core.application.util.SafeLogger
+import com.forsetijudge.core.port.driving.usecase.external.contest.FindAllContestScheduleUseCase
 import com.forsetijudge.core.port.driving.usecase.external.contest.FindContestBySlugUseCase
 import com.forsetijudge.core.port.dto.response.contest.ContestResponseBodyDTO
+import com.forsetijudge.core.port.dto.response.contest.ContestScheduleResponseBodyDTO
 import org.springframework.http.ResponseEntity
 import org.springframework.web.bind.annotation.GetMapping
 import org.springframework.web.bind.annotation.PathVariable
@@ -14,6 +16,7 @@ import org.springframework.web.bind.annotation.RestController
 @Suppress("unused")
 class PublicContestController(
     private val findContestBySlugUseCase: FindContestBySlugUseCase,
+    private val findAllContestScheduleUseCase: FindAllContestScheduleUseCase,
 ) {
     private val logger = SafeLogger(this::class)
 
@@ -28,4 +31,11 @@ class PublicContestController(
             )
         return ResponseEntity.ok(contest)
     }
+
+    @GetMapping("/public/contests/schedule")
+    fun findAllSchedule(): ResponseEntity<List<ContestScheduleResponseBodyDTO>> {
+        logger.info("[GET] /v1/public/contests/schedule")
+        val schedule = findAllContestScheduleUseCase.execute()
+        return ResponseEntity.ok(schedule)
+    }
 }
@@ -5,8 +5,10 @@ import com.forsetijudge.core.application.helper.IdGenerator
 import com.forsetijudge.core.config.JacksonConfig
 import com.forsetijudge.core.domain.entity.ContestMockBuilder
 import com.forsetijudge.core.domain.model.ExecutionContextMockBuilder
+import com.forsetijudge.core.port.driving.usecase.external.contest.FindAllContestScheduleUseCase
 import com.forsetijudge.core.port.driving.usecase.external.contest.FindContestBySlugUseCase
 import com.forsetijudge.core.port.dto.response.contest.toResponseBodyDTO
+import com.forsetijudge.core.port.dto.response.contest.toScheduleResponseBodyDTO
 import com.ninjasquad.springmockk.MockkBean
 import io.kotest.core.spec.style.FunSpec
 import io.kotest.extensions.spring.SpringExtension
@@ -26,6 +28,8 @@ import org.springframework.test.web.servlet.get
 class PublicControllerTest(
     @MockkBean(relaxed = true)
     private val findContestBySlugUseCase: FindContestBySlugUseCase,
+    @MockkBean(relaxed = true)
+    private val findAllContestScheduleUseCase: FindAllContestScheduleUseCase,
     private val webMvc: MockMvc,
 ) : FunSpec({
         extensions(SpringExtension)
@@ -53,4 +57,18 @@ class PublicControllerTest(
 
             verify { findContestBySlugUseCase.execute(command) }
         }
+
+        test("findAllSchedule") {
+            val contest = ContestMockBuilder.build()
+            every { findAllContestScheduleUseCase.execute() } returns listOf(contest.toScheduleResponseBodyDTO())
+
+            webMvc
+                .get("$basePath/schedule") {
+                    contentType = MediaType.APPLICATION_JSON
+                }.andExpect {
+                    status { isOk() }
+                }
+
+            verify { findAllContestScheduleUseCase.execute() }
+        }
     })
@@ -0,0 +1,22 @@
+package com.forsetijudge.autojudge.adapter.config
+
+import org.springframework.amqp.rabbit.config.ContainerCustomizer
+import org.springframework.amqp.rabbit.listener.SimpleMessageListenerContainer
+import org.springframework.beans.factory.annotation.Value
+import org.springframework.context.annotation.Bean
+import org.springframework.context.annotation.Configuration
+import java.time.Duration
+
+@Configuration
+class RabbitMQListenerConfig(
+    @Value("\${spring.lifecycle.timeout-per-shutdown-phase}")
+    private val shutdownTimeout: Duration,
+) {
+    /**
+     * On SIGTERM, e.g. when the autoscaler scales in, the listener containers cancel their consumers
+     * and wait for the submissions being judged to finish before closing the channel.
+     */
+    @Bean
+    fun rabbitMQListenerContainerCustomizer(): ContainerCustomizer<SimpleMessageListenerContainer> =
+        ContainerCustomizer { container -> container.setShutdownTimeout(shutdownTimeout.toMillis()) }
+}
@@ -0,0 +1,26 @@
+package com.forsetijudge.core.application.service.contest
+
+import com.forsetijudge.core.application.util.SafeLogger
+import com.forsetijudge.core.port.driven.repository.ContestRepository
+import com.forsetijudge.core.port.driving.usecase.external.contest.FindAllContestScheduleUseCase
+import com.forsetijudge.core.port.dto.response.contest.ContestScheduleResponseBodyDTO
+import com.forsetijudge.core.port.dto.response.contest.toScheduleResponseBodyDTO
+import org.springframework.stereotype.Service
+import org.springframework.transaction.annotation.Transactional
+
+@Service
+class FindAllContestScheduleService(
+    private val contestRepository: ContestRepository,
+) : FindAllContestScheduleUseCase {
+    private val logger = SafeLogger(this::class)
+
+    @Transactional(readOnly = true)
+    override fun execute(): List<ContestScheduleResponseBodyDTO> {
+        logger.info("Finding the schedule of all contests")
+
+        val contests = contestRepository.findAllOrdersByCreatedAt()
+
+        logger.info("Found ${contests.size} contests")
+        return contests.map { it.toScheduleResponseBodyDTO() }
+    }
+}
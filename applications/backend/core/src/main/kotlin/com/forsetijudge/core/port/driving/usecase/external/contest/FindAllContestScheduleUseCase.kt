@@ -0,0 +1,12 @@
+package com.forsetijudge.core.port.driving.usecase.external.contest
+
+import com.forsetijudge.core.port.dto.response.contest.ContestScheduleResponseBodyDTO
+
+interface FindAllContestScheduleUseCase {
+    /**
+     * Finds the start and end of all contests, without any other contest data.
+     *
+     * @return A list with the schedule of all contests.
+     */
+    fun execute(): List<ContestScheduleResponseBodyDTO>
+}
@@ -0,0 +1,19 @@
+package com.forsetijudge.core.port.dto.response.contest
+
+import com.forsetijudge.core.domain.entity.Contest
+import java.io.Serializable
+import java.time.OffsetDateTime
+import java.util.UUID
+
+data class ContestScheduleResponseBodyDTO(
+    val id: UUID,
+    val startAt: OffsetDateTime,
+    val endAt: OffsetDateTime,
+) : Serializable
+
+fun Contest.toScheduleResponseBodyDTO(): ContestScheduleResponseBodyDTO =
+    ContestScheduleResponseBodyDTO(
+        id = this.id,
+        startAt = this.startAt,
+        endAt = this.endAt,
+    )
@@ -0,0 +1,30 @@
+package com.forsetijudge.core.application.service.contest
+
+import com.forsetijudge.core.domain.entity.ContestMockBuilder
+import com.forsetijudge.core.port.driven.repository.ContestRepository
+import com.forsetijudge.core.port.dto.response.contest.toScheduleResponseBodyDTO
+import io.kotest.core.spec.style.FunSpec
+import io.kotest.matchers.shouldBe
+import io.mockk.clearAllMocks
+import io.mockk.every
+import io.mockk.mockk
+
+class FindAllContestScheduleServiceTest :
+    FunSpec({
+        val contestRepository = mockk<ContestRepository>(relaxed = true)
+
+        val sut = FindAllContestScheduleService(contestRepository)
+
+        beforeEach {
+            clearAllMocks()
+        }
+
+        test("should return the schedule of all contests") {
+            val contests = listOf(ContestMockBuilder.build(), ContestMockBuilder.build())
+            every { contestRepository.findAllOrdersByCreatedAt() } returns contests
+
+            val result = sut.execute()
+
+            result shouldBe contests.map { it.toScheduleResponseBodyDTO() }
+        }
+    })
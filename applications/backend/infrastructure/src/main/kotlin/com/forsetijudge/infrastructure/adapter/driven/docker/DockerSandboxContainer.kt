@@ -10,6 +10,7 @@ class DockerSandboxContainer(
     version: String,
     private val submission: Submission,
     private val codeFile: File,
+    serviceName: String = "",
 ) {
     /**
      * Represents the metadata returned by Isolate after running the program.
@@ -152,6 +153,13 @@ class DockerSandboxContainer(
 
     private val config = configs[submission.language]!!
 
+    private val labels =
+        if (serviceName.isBlank()) {
+            emptyArray<String>()
+        } else {
+            arrayOf("--label=com.forsetijudge.sandbox.service=$serviceName")
+        }
+
     private val container =
         DockerContainer.create(
             image = "${config.image}:$version",
@@ -183,6 +191,8 @@ class DockerSandboxContainer(
                     "--ulimit=core=0:0",
                     // Run in privileged mode to allow Isolate to set up namespaces and cgroups
                     "--privileged",
+                    // Lets the autoscaler measure the CPU used for judging by the autojudge service
+                    *labels,
                 ),
             cmd = arrayOf("sleep", "infinity"),
         )
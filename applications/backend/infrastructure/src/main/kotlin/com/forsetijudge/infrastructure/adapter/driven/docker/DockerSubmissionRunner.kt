@@ -22,6 +22,8 @@ class DockerSubmissionRunner(
     private val executionCreator: ExecutionCreator,
     @Value("\${spring.application.version}")
     private val version: String,
+    @Value("\${submission.service-name:}")
+    private val serviceName: String = "",
 ) : SubmissionRunner {
     private val logger = SafeLogger(this::class)
 
@@ -48,7 +50,7 @@ class DockerSubmissionRunner(
         val testCases = loadTestCases(problem)
         logger.info("Test cases loaded: ${testCases.size} test cases.")
 
-        val container = DockerSandboxContainer(version, submission, codeFile)
+        val container = DockerSandboxContainer(version, submission, codeFile, serviceName)
         container.start()
 
         try {
@@ -5,6 +5,7 @@ import com.forsetijudge.core.application.util.SafeLogger
 import com.forsetijudge.infrastructure.adapter.dto.rabbitmq.RabbitMQMessage
 import org.springframework.amqp.rabbit.core.RabbitTemplate
 import org.springframework.stereotype.Component
+import java.util.Date
 
 @Component
 class RabbitMQProducer(
@@ -32,6 +33,7 @@ class RabbitMQProducer(
             }
             it.messageProperties.headers["x-trace-id"] = message.traceId
             it.messageProperties.priority = message.priority
+            it.messageProperties.timestamp = Date()
             it
         }
     }
@@ -15,12 +15,14 @@ class SubmissionQueueRabbitMQProducer(
     private val exchange: String,
     @Value("\${spring.rabbitmq.routing-key.submission}")
     private val routingKey: String,
+    @Value("\${spring.rabbitmq.routing-key.submission-by-language:false}")
+    private val routingByLanguage: Boolean = false,
 ) : SubmissionQueueProducer {
     override fun produce(submission: Submission) {
         val message =
             RabbitMQMessage(
                 exchange = exchange,
-                routingKey = routingKey,
+                routingKey = routingKeyOf(submission),
                 body =
                     SubmissionQueueMessageBody(
                         submissionId = submission.id,
@@ -30,4 +32,15 @@ class SubmissionQueueRabbitMQProducer(
             )
         rabbitMQProducer.produce(message)
     }
+
+    /**
+     * Submissions of each language are routed to the queue of their own autojudge pool, e.g. JAVA_21 to
+     * submission-routing-key-java-21, when routing by language is enabled.
+     */
+    private fun routingKeyOf(submission: Submission): String {
+        if (!routingByLanguage) {
+            return routingKey
+        }
+        return "$routingKey-${submission.language.name.lowercase().replace('_', '-')}"
+    }
 }
@@ -2,6 +2,7 @@ package com.forsetijudge.infrastructure.adapter.driven.rabbitmq
 
 import com.forsetijudge.core.domain.entity.Member
 import com.forsetijudge.core.domain.entity.MemberMockBuilder
+import com.forsetijudge.core.domain.entity.Submission
 import com.forsetijudge.core.domain.entity.SubmissionMockBuilder
 import com.forsetijudge.infrastructure.adapter.dto.rabbitmq.RabbitMQMessage
 import com.forsetijudge.infrastructure.adapter.dto.rabbitmq.body.SubmissionQueueMessageBody
@@ -61,4 +62,25 @@ class SubmissionQueueRabbitMQProducerTest :
             messageSlot.captured.body.submissionId shouldBe submission.id
             messageSlot.captured.priority shouldBe 1
         }
+
+        test("should route message by language") {
+            val sut =
+                SubmissionQueueRabbitMQProducer(
+                    rabbitMQProducer = rabbitMQProducer,
+                    exchange = exchange,
+                    routingKey = routingKey,
+                    routingByLanguage = true,
+                )
+            val submission = SubmissionMockBuilder.build(language = Submission.Language.JAVA_21)
+
+            sut.produce(submission)
+
+            val messageSlot = slot<RabbitMQMessage<SubmissionQueueMessageBody>>()
+            verify {
+                rabbitMQProducer.produce(capture(messageSlot))
+            }
+            messageSlot.captured.exchange shouldBe exchange
+            messageSlot.captured.routingKey shouldBe "$routingKey-java-21"
+            messageSlot.captured.body.submissionId shouldBe submission.id
+        }
     })